@@ -0,0 +1,13 @@
+"""
+Benchmarks of the simulators.
+
+Run them from the repository's root, saving the results as JSON:
+
+    python -m benchmarks.run --output results.json
+
+and compare a later run against them, which flags the benchmarks whose
+throughput dropped by more than the tolerance:
+
+    python -m benchmarks.run --compare results.json
+    python -m benchmarks.compare results.json other_results.json
+"""
@@ -0,0 +1,105 @@
+"""
+Compares two sets of benchmark results, flagging regressions.
+
+    python -m benchmarks.compare baseline.json results.json --tolerance 0.1
+
+A benchmark has regressed when its throughput dropped by more than the
+tolerance, as a fraction of the baseline's. The command exits with status 1
+if any benchmark has.
+"""
+import argparse
+import json
+import sys
+
+
+def load_results(path):
+    """
+    The results of a file written by benchmarks.run.
+    """
+    with open(path) as results_file:
+        return json.load(results_file)
+
+
+def compare(baseline, results, tolerance, out):
+    """
+    Writes a table comparing each benchmark's throughput in results to the
+    baseline's.
+
+    Args:
+        baseline: the earlier results, as returned by load_results.
+        results: the later results.
+        tolerance: the fraction a throughput can drop by without being a
+                   regression.
+        out: the file to write the table to.
+    Returns:
+        The names of the benchmarks that regressed.
+    """
+    regressions = []
+
+    before = baseline["results"]
+    after = results["results"]
+
+    out.write("{:<50}{:>14}{:>14}{:>10}\n".format(
+        "benchmark", "baseline", "current", "change"))
+
+    for name in after:
+        if name not in before:
+            out.write("{:<50}{:>14}{:>14.1f}{:>10}\n".format(
+                name, "-", after[name]["throughput"], "new"))
+            continue
+
+        old = before[name]["throughput"]
+        new = after[name]["throughput"]
+        change = (new - old)/old if old else 0.0
+
+        flag = ""
+        if change < -tolerance:
+            regressions.append(name)
+            flag = "  REGRESSION"
+
+        out.write("{:<50}{:>14.1f}{:>14.1f}{:>+10.1%}{}\n".format(
+            name, old, new, change, flag))
+
+    for name in before:
+        if name not in after:
+            out.write("{:<50}{:>14.1f}{:>14}{:>10}\n".format(
+                name, before[name]["throughput"], "-", "missing"))
+
+    out.write("{} of {} benchmarks regressed by more than {:.0%}\n".format(
+        len(regressions), len(after), tolerance))
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Compare benchmark results to a baseline.')
+
+    parser.add_argument(
+        'baseline',
+        help='The results to compare to.')
+
+    parser.add_argument(
+        'results',
+        help='The results to compare.')
+
+    parser.add_argument(
+        '--tolerance',
+        type=float,
+        default=0.1,
+        help='The fraction a throughput can drop by without being flagged '
+             'as a regression.')
+
+    cmd_args = parser.parse_args()
+
+    regressions = compare(
+        load_results(cmd_args.baseline), load_results(cmd_args.results),
+        cmd_args.tolerance, sys.stdout)
+
+    if regressions:
+        sys.exit(1)
+
+
+#invoke the "main" function when this module is run on its own
+if __name__ == "__main__":
+    main()
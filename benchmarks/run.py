@@ -0,0 +1,349 @@
+"""
+Runs the benchmarks and writes their results as JSON.
+
+Every benchmark times a piece of work a few times and keeps the fastest
+time, which is the least disturbed by whatever else the machine is doing,
+and reports its throughput: how many units of work (days, instances or whole
+runs) it does per second. The benchmarks are:
+
+    no_learning/<phase>/<agent>/<market>
+        no_learning_case for every agent of both phases in every market,
+        in days per second.
+    learn/<agent>/<dataset>
+        an agent learning a dataset's instances, in instances per second.
+    learning_case/<agent>/<dataset>
+        learning_case for an agent that has learned, in days per second.
+    main/<phase>
+        the simulator's main() run as a command, imports included, in runs
+        per second.
+
+The datasets are the CSVs of phase2/data and synthetic datasets (see
+phase2.master.synthetic) with the numbers of rows given by --rows.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+from collections import OrderedDict
+from timeit import default_timer
+
+from phase1 import agents as agents1
+from phase1.master import simulator as simulator1
+from phase2 import agents as agents2
+from phase2.master import simulator as simulator2
+from phase2.master.synthetic import synthetic_instances
+from phase2.master.tape import ProductTape
+
+
+#: The root of the repository, which the simulators are run from.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+#: The directory of the phase 2 datasets.
+DATA_DIRECTORY = os.path.join(ROOT, "phase2", "data")
+
+#: The market presets, by name.
+MARKETS = OrderedDict([
+    ("UNFAVORABLE", simulator1.UNFAVORABLE),
+    ("FAIR", simulator1.FAIR),
+    ("FAVORABLE", simulator1.FAVORABLE),
+])
+
+#: The default numbers of rows of the synthetic datasets.
+DEFAULT_ROWS = [10000, 100000, 1000000]
+
+#: The number of features of the synthetic datasets.
+SYNTHETIC_FEATURES = 10
+
+#: The most days learning_case is timed for, whatever the dataset's size.
+MAX_TEST_DAYS = 10000
+
+#: The seed of every simulation and synthetic dataset.
+SEED = 0
+
+
+#: The arguments of the agents whose constructors need some, by short_name.
+ARGUMENTS = {
+    "PB": "percent_worth=75",
+}
+
+
+def registry_agents(registry):
+    """
+    One of every agent of a phase's registry, in the registry's order.
+    """
+    agents = []
+
+    for entry in registry.entries():
+        name = entry.short_name or entry.name
+        if name in ARGUMENTS:
+            name = "{}:{}".format(name, ARGUMENTS[name])
+
+        agents.append(registry.make_agent(name, SEED))
+
+    return agents
+
+
+def phase1_agents():
+    """
+    One of every phase 1 agent, by id.
+    """
+    return registry_agents(agents1.registry)
+
+
+def phase2_agents():
+    """
+    One of every phase 2 agent, by id.
+    """
+    return registry_agents(agents2.registry)
+
+
+def learning_agents():
+    """
+    One of every phase 2 agent that learns from the instances: those that
+    phase 1, where agents don't learn, doesn't have.
+    """
+    names = set(entry.name for entry in agents1.registry.entries())
+
+    return [agent for agent in phase2_agents()
+            if type(agent).__name__ not in names]
+
+
+def best_time(work, repeat):
+    """
+    The fastest of repeat timings of work(), in seconds.
+
+    Args:
+        work: a function doing the work to time.
+        repeat: the number of timings.
+    """
+    times = []
+
+    for i in range(0, repeat):
+        start = default_timer()
+        work()
+        times.append(default_timer() - start)
+
+    return min(times)
+
+
+def no_learning_benchmarks(repeat):
+    """
+    Times no_learning_case for every agent of both phases in every market.
+    """
+    for phase, simulator, make_agents in [
+            ("phase1", simulator1, phase1_agents),
+            ("phase2", simulator2, phase2_agents)]:
+        for market, odds in MARKETS.items():
+            for index in range(0, len(make_agents())):
+                def work():
+                    #a fresh agent for every timing, so each flips the same
+                    #coins
+                    agent = make_agents()[index]
+                    simulator.no_learning_case(agent, odds, SEED)
+
+                name = "no_learning/{}/{}/{}".format(
+                    phase, make_agents()[index].id, market)
+                yield name, best_time(work, repeat), simulator.NUM_DAYS, \
+                    "days"
+
+
+def learning_benchmarks(datasets, repeat):
+    """
+    Times learning and learning_case for every learning agent on every
+    (name, instances) dataset. Each dataset's first rows, up to
+    MAX_TEST_DAYS of them and at most a fifth of the dataset, are its test
+    instances; the agents learn the rest.
+    """
+    for dataset, instances in datasets:
+        test_size = min(len(instances)//5, MAX_TEST_DAYS)
+        test_instances = instances[:test_size]
+        training_instances = instances[test_size:]
+
+        tape = ProductTape(SEED, test_size)
+
+        for index in range(0, len(learning_agents())):
+            agent_id = learning_agents()[index].id
+
+            def learn():
+                learning_agents()[index].learn(training_instances)
+
+            yield "learn/{}/{}".format(agent_id, dataset), \
+                best_time(learn, repeat), len(training_instances), \
+                "instances"
+
+            agent = learning_agents()[index]
+            agent.learn(training_instances)
+
+            def simulate():
+                simulator2.learning_case(
+                    agent, None, test_instances, SEED, tape)
+
+            yield "learning_case/{}/{}".format(agent_id, dataset), \
+                best_time(simulate, repeat), test_size, "days"
+
+
+def main_benchmarks(repeat):
+    """
+    Times both simulators' main() as commands, writing their tables to
+    os.devnull.
+    """
+    commands = [
+        ("main/phase1", ["-m", "phase1.master.simulator"]),
+        ("main/phase2", ["-m", "phase2.master.simulator",
+                         os.path.join(DATA_DIRECTORY, "ten_feats_50_cd.csv")]),
+    ]
+
+    for name, arguments in commands:
+        def run():
+            subprocess.check_call(
+                [sys.executable] + arguments + ["--output", os.devnull],
+                cwd=ROOT)
+
+        yield name, best_time(run, repeat), 1, "runs"
+
+
+def csv_datasets():
+    """
+    The (name, instances) of every CSV of phase2/data, read like main() reads
+    them.
+    """
+    datasets = []
+
+    for name in sorted(os.listdir(DATA_DIRECTORY)):
+        if not name.endswith(".csv"):
+            continue
+
+        with open(os.path.join(DATA_DIRECTORY, name)) as product_data:
+            datasets.append((name[:-len(".csv")],
+                             simulator2.read_instances(product_data)))
+
+    return datasets
+
+
+def run(cmd_args):
+    """
+    Runs the benchmarks selected on the command line, writing a line to
+    stderr as each finishes.
+
+    Returns:
+        The results as a dict: {"meta": {...}, "results": {name: {"seconds":
+        seconds, "units": units, "unit": unit, "throughput": units per
+        second}}}.
+    """
+    results = OrderedDict()
+
+    def benchmarks():
+        if "no_learning" in cmd_args.groups:
+            for result in no_learning_benchmarks(cmd_args.repeat):
+                yield result
+
+        if "learning" in cmd_args.groups:
+            datasets = csv_datasets()
+            for rows in cmd_args.rows:
+                datasets.append((
+                    "synthetic_{}".format(rows),
+                    synthetic_instances(
+                        rows, SYNTHETIC_FEATURES, seed=SEED)))
+
+            for result in learning_benchmarks(datasets, cmd_args.repeat):
+                yield result
+
+        if "main" in cmd_args.groups:
+            for result in main_benchmarks(cmd_args.repeat):
+                yield result
+
+    for name, seconds, units, unit in benchmarks():
+        throughput = units/seconds if seconds > 0 else float("inf")
+
+        results[name] = OrderedDict([
+            ("seconds", seconds),
+            ("units", units),
+            ("unit", unit),
+            ("throughput", throughput),
+        ])
+
+        sys.stderr.write("{:<50}{:>16.1f} {}/s\n".format(
+            name, throughput, unit))
+
+    return OrderedDict([
+        ("meta", OrderedDict([
+            ("python", platform.python_version()),
+            ("platform", platform.platform()),
+            ("repeat", cmd_args.repeat),
+        ])),
+        ("results", results),
+    ])
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the simulators.')
+
+    parser.add_argument(
+        '--groups',
+        nargs='+',
+        choices=["no_learning", "learning", "main"],
+        default=["no_learning", "learning", "main"],
+        help='The groups of benchmarks to run.')
+
+    parser.add_argument(
+        '--rows',
+        type=int,
+        nargs='*',
+        default=DEFAULT_ROWS,
+        help='The numbers of rows of the synthetic datasets, e.g. 10000 '
+             '10000000.')
+
+    parser.add_argument(
+        '--repeat',
+        type=int,
+        default=3,
+        help='The number of times to time each benchmark; the fastest time '
+             'is kept.')
+
+    parser.add_argument(
+        '--output',
+        help='A file to write the results to as JSON. Defaults to stdout, '
+             'unless comparing.')
+
+    parser.add_argument(
+        '--compare',
+        help='A file of earlier results to compare the results to.')
+
+    parser.add_argument(
+        '--tolerance',
+        type=float,
+        default=0.1,
+        help='With --compare, the fraction a throughput can drop by without '
+             'being flagged as a regression.')
+
+    cmd_args = parser.parse_args()
+
+    if cmd_args.repeat < 1:
+        parser.error('--repeat must be at least 1')
+
+    results = run(cmd_args)
+
+    if cmd_args.output is not None:
+        with open(cmd_args.output, 'w') as out:
+            json.dump(results, out, indent=2)
+            out.write("\n")
+    elif cmd_args.compare is None:
+        json.dump(results, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+
+    if cmd_args.compare is not None:
+        from .compare import compare, load_results
+
+        regressions = compare(
+            load_results(cmd_args.compare), results, cmd_args.tolerance,
+            sys.stdout)
+        if regressions:
+            sys.exit(1)
+
+
+#invoke the "main" function when this module is run on its own
+if __name__ == "__main__":
+    main()
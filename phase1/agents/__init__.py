@@ -1,4 +1,43 @@
-from .agent import Agent
-from .flip_coin_agent import FlipCoinAgent
-from .half_prob_agent import HalfProbAgent
-from .percent_believer import PercentBeliever
+"""
+The agents.
+
+Every class of the package can be imported from it, e.g. with
+"from phase1.agents import PercentBeliever", but a class's module is only
+imported when the class is first used, so that importing the package (or
+simulating a few agents) doesn't import every agent's module. The registry
+module finds the classes without importing them.
+"""
+import sys
+import types
+from importlib import import_module
+
+from . import registry
+
+
+class _LazyPackage(types.ModuleType):
+    """
+    This package, importing the module of a class when the class is first
+    looked up.
+    """
+
+    def __getattr__(self, name):
+        if name == "__all__":
+            return registry.class_names()
+
+        module = registry.module_of(name)
+        if module is None:
+            raise AttributeError("module {} has no attribute {}".format(
+                self.__name__, name))
+
+        value = getattr(import_module("." + module, self.__name__), name)
+        setattr(self, name, value)
+
+        return value
+
+
+#replace this module with a _LazyPackage of the same contents, keeping a
+#reference to it, since Python 2 clears the globals of unreferenced modules
+_package = _LazyPackage(__name__, __doc__)
+_package.__dict__.update(sys.modules[__name__].__dict__)
+_package._module = sys.modules[__name__]
+sys.modules[__name__] = _package
@@ -1,13 +1,20 @@
+from ..master.product import Product
+
+
 class Agent(object):
     """The base Agent class. All agents should inherit this class.
 
     In the single agent case, this agent receives a product and decides to
     buy the product or not; a one time decision for a given product.
 
-    In the multi-agent case, it receives the product with the newDay method,
-    receives maxBidder's id and bid through currentBidInfo, and when asked,
-    it provides a bid through myBidIs function. It learns the result of the
-    bidding through endOfDay function."""
+    In the multi-agent case, it receives the product with the new_day method,
+    receives the highest bidder's id and bid through current_bid_info, and
+    when asked, it provides a bid through the my_bid_is method. It learns the
+    result of the bidding through the end_of_day method."""
+
+    #: A short name to select the agent by on the command line, like "PB",
+    #: which is also the start of its id there; see registry.
+    short_name = None
 
     def __init__(this, id, balance=0):
         this.id = id
@@ -41,6 +48,109 @@ class Agent(object):
         prob = self.compute_prob_of_good(prod_features)
         return self.will_buy(prod, prob)
 
+    def will_buy_batch(self, values, prices, probs_of_good):
+        """
+        The batch counterpart of will_buy: decides, for many products at once,
+        whether to buy each of them.
+
+        This default calls will_buy once per product, in order. Agents that
+        can decide without a Python call per product should override it.
+
+        Args:
+            values: an array of the products' values
+            prices: an array of the products' prices
+            probs_of_good: an array of the probabilities of each product being
+                           in a good condition
+        Returns:
+            A boolean NumPy array, True where the agent would buy the product
+        """
+        import numpy
+
+        will_buy = numpy.empty(len(values), dtype=bool)
+
+        for i in range(0, len(values)):
+            prod = Product(float(values[i]), float(prices[i]))
+            will_buy[i] = self.will_buy(prod, float(probs_of_good[i]))
+
+        return will_buy
+
+    def will_buy_given_features_batch(self, values, prices, features):
+        """
+        The batch counterpart of will_buy_given_features.
+
+        Args:
+            values: an array of the products' values
+            prices: an array of the products' prices
+            features: a sequence of feature lists, one per product
+        Returns:
+            A boolean NumPy array, True where the agent would buy the product
+        """
+        probs = self.compute_prob_of_good_batch(features)
+        return self.will_buy_batch(values, prices, probs)
+
+    #BIDDING:
+    def new_day(self, prod, prob_of_good, min_bid):
+        """
+        In the multi-agent case, tells the agent the day's product before the
+        bidding starts.
+
+        Args:
+            prod: the product. Its price is the least it can be sold for.
+            prob_of_good: probability of the product being in a good condition
+            min_bid: the least the first bid may be
+        """
+        self.product = prod
+        self.prob_of_good = prob_of_good
+        self.max_bidder_id = None
+        self.max_bid = None
+        self.min_bid = min_bid
+
+    def current_bid_info(self, max_bidder_id, max_bid, min_bid):
+        """
+        In the multi-agent case, tells the agent of a new highest bid.
+
+        Args:
+            max_bidder_id: the id of the agent with the highest bid
+            max_bid: the highest bid
+            min_bid: the least the next bid may be
+        """
+        self.max_bidder_id = max_bidder_id
+        self.max_bid = max_bid
+        self.min_bid = min_bid
+
+    def my_bid_is(self):
+        """
+        In the multi-agent case, asks the agent for its bid. The agent isn't
+        asked while it has the highest bid.
+
+        This default bids the least it may for as long as the agent can afford
+        it and will_buy would buy the product at that price.
+
+        Returns:
+            The bid, which must be at least the last min_bid, or None to drop
+            out of the bidding for the rest of the day.
+        """
+        if self.min_bid > self.balance:
+            return None
+
+        prod = Product(self.product.value, self.min_bid)
+
+        if self.will_buy(prod, self.prob_of_good):
+            return self.min_bid
+
+        return None
+
+    def end_of_day(self, winner_id, price):
+        """
+        In the multi-agent case, tells the agent who bought the day's product.
+
+        Args:
+            winner_id: the id of the agent that bought the product, or None if
+                       no one bid
+            price: the price it paid, or None
+        """
+        pass
+
     #LEARN AND PREDICT:
     def learn(self, training_instances):
         """
@@ -66,5 +176,27 @@ class Agent(object):
         """
         raise NotImplementedError
 
+    def compute_prob_of_good_batch(self, features):
+        """
+        The batch counterpart of compute_prob_of_good.
+
+        This default calls compute_prob_of_good once per product, in order.
+
+        Args:
+            features: a sequence of feature lists, one per product. These do
+                      not include the class information.
+        Returns:
+            A NumPy array of the probabilities of each product being in a good
+            condition.
+        """
+        import numpy
+
+        probs = numpy.empty(len(features))
+
+        for i in range(0, len(features)):
+            probs[i] = self.compute_prob_of_good(features[i])
+
+        return probs
+
     def __unicode__(self):
         return "Agent [id={}]".format(self.id)
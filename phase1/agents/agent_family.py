@@ -0,0 +1,75 @@
+class AgentFamily(object):
+    """
+    A family of agents of one kind that differ only in one parameter, like
+    PercentBelievers over a range of percents.
+
+    The simulator advances every member of a family together against the same
+    products (see family_case), keeping the members' balances in one array,
+    and asks the family to decide for all of its members at once through
+    will_buy_batch. Sweeping a parameter at a fine resolution then costs
+    about as much as a single simulation.
+
+    Subclasses set member_type to the agent class of their members, which is
+    constructed with a member's id and parameter.
+
+    Args:
+        id: the id of the family. Each member's id is the family's id
+            followed by the member's parameter.
+        parameters: the parameter of every member, in order.
+    """
+
+    #: The Agent subclass of the members.
+    member_type = None
+
+    def __init__(self, id, parameters):
+        self.id = id
+        self.parameters = list(parameters)
+        self.ids = ["{}{}".format(id, parameter)
+                    for parameter in self.parameters]
+
+        self._members = None
+
+    def __len__(self):
+        return len(self.parameters)
+
+    def member(self, index):
+        """
+        The member at the given index, as an ordinary agent.
+        """
+        return self.member_type(self.ids[index], self.parameters[index])
+
+    def will_buy_batch(self, values, prices, probs_of_good):
+        """
+        Decides, for every member, whether to buy the day's product.
+
+        This default calls will_buy on every member, in order. Families that
+        can decide without a Python call per member should override it.
+
+        Args:
+            values: an array of the product's value for each member (which
+                    depends on the member's balance)
+            prices: an array of the product's price for each member
+            probs_of_good: the probability of the product being in a good
+                           condition, or an array of it for each member
+        Returns:
+            A boolean NumPy array, True where the member would buy the product
+        """
+        import numpy
+
+        from ..master.product import Product
+
+        if self._members is None:
+            self._members = [self.member(index)
+                             for index in range(0, len(self))]
+
+        probs_of_good = numpy.broadcast_to(probs_of_good, (len(self),))
+        will_buy = numpy.empty(len(self), dtype=bool)
+
+        for index, agent in enumerate(self._members):
+            prod = Product(float(values[index]), float(prices[index]))
+            will_buy[index] = agent.will_buy(prod, float(probs_of_good[index]))
+
+        return will_buy
+
+    def __unicode__(self):
+        return "AgentFamily [id={}, members={}]".format(self.id, len(self))
@@ -8,6 +8,7 @@ class HalfProbAgent(Agent):
     product. It believes the product is in good condition when the given or
     computed probability is greater than 0.5.
     """
+    short_name = "HP"
 
     def will_buy(self, prod, prob_of_good):
         if prob_of_good > 0.5:
@@ -15,8 +16,16 @@ class HalfProbAgent(Agent):
 
         return False
 
+    def will_buy_batch(self, values, prices, probs_of_good):
+        import numpy
+        return numpy.asarray(probs_of_good) > 0.5
+
     def learn(self, training_instances):
         pass
 
     def compute_prob_of_good(self, prod_features):
         return 0
+
+    def compute_prob_of_good_batch(self, features):
+        import numpy
+        return numpy.zeros(len(features))
@@ -6,18 +6,38 @@ class PercentBeliever(Agent):
     An agent that always believes that a product is worth only a fixed percent
     of its value. The percent is provided initially.
     """
+    short_name = "PB"
+
     def __init__(self, id, percent_worth, balance=0):
         self.percent_worth = percent_worth
         super(PercentBeliever, self).__init__(id, balance)
 
+    @staticmethod
+    def worth_buying(values, prices, percent_worth):
+        """
+        Whether products are worth their prices to a believer in the given
+        percent. Works on numbers as well as on NumPy arrays of them, which
+        may hold a percent per product, like a PercentBelieverFamily's.
+        """
+        return prices <= (values*percent_worth)/100
+
     def will_buy(self, prod, prob_of_good):
-        if prod.price <= (prod.value*self.percent_worth)/100:
+        if self.worth_buying(prod.value, prod.price, self.percent_worth):
             return True
 
         return False
 
+    def will_buy_batch(self, values, prices, probs_of_good):
+        import numpy
+        return self.worth_buying(numpy.asarray(values), numpy.asarray(prices),
+                                 self.percent_worth)
+
     def learn(self, training_instances):
         pass
 
     def compute_prob_of_good(self, prod_features):
         return 0
+
+    def compute_prob_of_good_batch(self, features):
+        import numpy
+        return numpy.zeros(len(features))
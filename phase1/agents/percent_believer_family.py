@@ -0,0 +1,23 @@
+from .agent_family import AgentFamily
+from .percent_believer import PercentBeliever
+
+
+class PercentBelieverFamily(AgentFamily):
+    """
+    PercentBelievers over an array of percents, which all decide at once with
+    PercentBeliever's own rule.
+    """
+    member_type = PercentBeliever
+
+    def __init__(self, id, percents):
+        self._percents = None
+        super(PercentBelieverFamily, self).__init__(id, percents)
+
+    def will_buy_batch(self, values, prices, probs_of_good):
+        import numpy
+
+        if self._percents is None:
+            self._percents = numpy.array(self.parameters, dtype=float)
+
+        return PercentBeliever.worth_buying(
+            numpy.asarray(values), numpy.asarray(prices), self._percents)
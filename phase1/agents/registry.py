@@ -0,0 +1,285 @@
+"""
+A registry of the agents in this package, found without importing them.
+
+The registry reads the source of every module of the package and finds the
+classes that derive, directly or not, from Agent. An agent class can be
+selected by its name or by its short_name, a string class attribute:
+
+    class PercentBeliever(Agent):
+        short_name = "PB"
+
+so adding an agent is only adding its module. A class that is only a base
+for other agents sets abstract = True in its own body, and isn't listed. A
+class is imported when it's first selected, so simulating a few agents never imports the others' modules
+(or whatever they import).
+
+Agents are selected with specs like "PB:percent_worth=75": a name, then
+optionally a colon and a comma-separated list of the constructor's keyword
+arguments, whose values are Python literals (anything else is a string).
+Run this module to list the agents:
+
+    python -m phase1.agents.registry
+"""
+import ast
+import inspect
+import os
+import sys
+from collections import OrderedDict
+from importlib import import_module
+
+
+#: The class agents derive from.
+ROOT = "Agent"
+
+#: The package the registry scans: the registry's own.
+PACKAGE = __name__.rpartition(".")[0]
+
+#: The constructor arguments the registry passes itself.
+RESERVED = ["self", "this", "id", "balance"]
+
+
+class AgentEntry(object):
+    """
+    An agent class of the package, as found in its module's source.
+
+    Attributes:
+        name: the name of the class.
+        module: the name of its module in the package.
+        short_name: its short_name, or None.
+        parameters: the arguments of its constructor, other than RESERVED.
+    """
+
+    def __init__(self, name, module, short_name, parameters):
+        self.name = name
+        self.module = module
+        self.short_name = short_name
+        self.parameters = parameters
+
+    def load(self):
+        """
+        Imports the class.
+        """
+        return getattr(import_module("." + self.module, PACKAGE), self.name)
+
+    def __unicode__(self):
+        return "AgentEntry [name={}, module={}, short_name={}]".format(
+            self.name, self.module, self.short_name)
+
+
+#the package's entries and the module of each of its classes, once scanned
+_entries = None
+_modules = None
+
+
+def entries():
+    """
+    The AgentEntry of every agent class of the package, by module and then in
+    the order of the source.
+    """
+    _scan()
+    return list(_entries)
+
+
+def module_of(class_name):
+    """
+    The name of the package's module defining a class, or None.
+    """
+    _scan()
+    return _modules.get(class_name)
+
+
+def class_names():
+    """
+    The names of every class of the package, agent or not.
+    """
+    _scan()
+    return sorted(_modules)
+
+
+def find(name):
+    """
+    The AgentEntry of the agent class with the given short_name or name.
+
+    Raises:
+        ValueError: if no class, or more than one, has that name.
+    """
+    for attribute in ["short_name", "name"]:
+        found = [entry for entry in entries()
+                 if getattr(entry, attribute) == name]
+
+        if len(found) > 1:
+            raise ValueError("More than one agent is called {}: {}".format(
+                name, ", ".join(entry.name for entry in found)))
+
+        if found:
+            return found[0]
+
+    raise ValueError("Unknown agent: {}".format(name))
+
+
+def parse_spec(spec):
+    """
+    Parses an agent spec.
+
+    Returns:
+        A (name, arguments) pair, where arguments is an OrderedDict of the
+        constructor's keyword arguments.
+    """
+    name, separator, rest = spec.partition(":")
+    arguments = OrderedDict()
+
+    if not name:
+        raise ValueError("No agent named in {!r}".format(spec))
+
+    for argument in rest.split(",") if rest else []:
+        key, equals, value = argument.partition("=")
+
+        if not key or not equals:
+            raise ValueError("Expected key=value, not {!r}".format(argument))
+
+        #ids are always strings
+        if key == "id":
+            arguments[key] = value
+            continue
+
+        try:
+            arguments[key] = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            arguments[key] = value
+
+    return name, arguments
+
+
+def make_agent(spec, seed=None):
+    """
+    Creates the agent of a spec.
+
+    Its id is the spec's id argument, or else the spec's name followed by
+    the values of its arguments joined by "_", e.g. "PB75". An agent whose
+    constructor takes a seed that the spec doesn't give gets the given one.
+    """
+    name, arguments = parse_spec(spec)
+    entry = find(name)
+
+    for key in arguments:
+        if key != "id" and key not in entry.parameters:
+            raise ValueError("{} takes no argument {}".format(
+                entry.name, key))
+
+    agent_id = arguments.pop("id", None)
+    if agent_id is None:
+        agent_id = name + "_".join(
+            "{}".format(value) for value in arguments.values())
+
+    cls = entry.load()
+
+    getargspec = getattr(inspect, "getfullargspec", None) or \
+        inspect.getargspec
+    if "seed" not in arguments and "seed" in getargspec(cls.__init__).args:
+        arguments["seed"] = seed
+
+    return cls(agent_id, **arguments)
+
+
+def _scan():
+    global _entries, _modules
+
+    if _entries is not None:
+        return
+
+    directory = os.path.dirname(os.path.abspath(__file__))
+
+    #class name -> (module, base names, short_name, parameters or None,
+    #abstract)
+    classes = OrderedDict()
+
+    for file_name in sorted(os.listdir(directory)):
+        module, extension = os.path.splitext(file_name)
+        if extension != ".py" or module in ["__init__", "registry"]:
+            continue
+
+        with open(os.path.join(directory, file_name)) as source:
+            tree = ast.parse(source.read(), file_name)
+
+        for node in tree.body:
+            if isinstance(node, ast.ClassDef):
+                classes[node.name] = (module,) + _describe(node)
+
+    def is_agent(name, seen=()):
+        if name not in classes or name in seen:
+            return False
+
+        return any(base == ROOT or is_agent(base, seen + (name,))
+                   for base in classes[name][1])
+
+    def parameters(name):
+        #a class without a constructor of its own has its base's
+        module, bases, short_name, own, abstract = classes[name]
+        if own is not None:
+            return own
+
+        for base in bases:
+            if base in classes:
+                return parameters(base)
+
+        return []
+
+    _modules = dict((name, description[0])
+                    for name, description in classes.items())
+    _entries = [
+        AgentEntry(name, description[0], description[2], parameters(name))
+        for name, description in classes.items()
+        if is_agent(name) and not description[4]]
+
+
+def _describe(node):
+    #the base names, short_name, constructor parameters and abstract marker
+    #of a class
+    bases = []
+    for base in node.bases:
+        if isinstance(base, ast.Name):
+            bases.append(base.id)
+        elif isinstance(base, ast.Attribute):
+            bases.append(base.attr)
+
+    short_name = None
+    parameters = None
+    abstract = False
+
+    for statement in node.body:
+        if isinstance(statement, ast.Assign) and any(
+                isinstance(target, ast.Name) and target.id == "short_name"
+                for target in statement.targets):
+            try:
+                short_name = ast.literal_eval(statement.value)
+            except ValueError:
+                pass
+        elif isinstance(statement, ast.Assign) and any(
+                isinstance(target, ast.Name) and target.id == "abstract"
+                for target in statement.targets):
+            try:
+                abstract = ast.literal_eval(statement.value) is True
+            except ValueError:
+                pass
+        elif isinstance(statement, ast.FunctionDef) and \
+                statement.name == "__init__":
+            parameters = [
+                getattr(argument, "arg", None) or argument.id
+                for argument in statement.args.args]
+            parameters = [parameter for parameter in parameters
+                          if parameter not in RESERVED]
+
+    return bases, short_name, parameters, abstract
+
+
+def main():
+    sys.stdout.write("{:<8}{:<26}{}\n".format("name", "class", "arguments"))
+
+    for entry in entries():
+        sys.stdout.write("{:<8}{:<26}{}\n".format(
+            entry.short_name or "", entry.name, ", ".join(entry.parameters)))
+
+
+#invoke the "main" function when this module is run on its own
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+"""
+Streaming statistics of daily balances across runs.
+
+An Aggregator folds in each run's daily_balance as soon as the run completes,
+so the runs never need to be kept. For every agent and day it keeps a running
+mean and variance (Welford's algorithm) and, optionally, a small quantile
+sketch, so its memory grows with the number of days and agents but not with
+the number of runs. Aggregators of disjoint runs can be merged.
+"""
+import math
+from array import array
+from collections import OrderedDict
+
+
+#: The statistics reported for each agent, after the mean.
+STATISTICS = ["std", "ci95_low", "ci95_high", "p5", "p50", "p95"]
+
+#: Two-sided 95% critical values of Student's t distribution, indexed by
+#: degrees of freedom. Beyond the table the normal value is close enough.
+T_95 = [
+    float("nan"), 12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306,
+    2.262, 2.228, 2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101,
+    2.093, 2.086, 2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048,
+    2.045, 2.042,
+]
+
+#: The normal 95% critical value.
+Z_95 = 1.96
+
+
+class Aggregator(object):
+    """
+    Per-day statistics of every agent's balance.
+
+    Args:
+        num_days: the number of days in every run.
+        quantiles: whether to keep quantile sketches. Without them only the
+                   mean, standard deviation and confidence interval are known.
+        sketch_size: the accuracy of the quantile sketches; see
+                     QuantileSketch.
+    """
+
+    def __init__(self, num_days, quantiles=False, sketch_size=128):
+        self.num_days = num_days
+        self.quantiles = quantiles
+        self.sketch_size = sketch_size
+
+        #agent id -> DailyStats, in the order agents were first seen
+        self.stats = OrderedDict()
+
+    def add(self, agent_id, daily_balance):
+        """
+        Folds in one run's daily balances for the given agent.
+        """
+        if agent_id not in self.stats:
+            self.stats[agent_id] = DailyStats(
+                self.num_days, self.quantiles, self.sketch_size)
+
+        self.stats[agent_id].add(daily_balance)
+
+    def merge(self, other):
+        """
+        Folds in the statistics of another Aggregator's runs.
+        """
+        for agent_id, stats in other.stats.items():
+            if agent_id not in self.stats:
+                self.stats[agent_id] = DailyStats(
+                    self.num_days, self.quantiles, self.sketch_size)
+
+            self.stats[agent_id].merge(stats)
+
+    def columns(self, with_statistics=False):
+        """
+        The names of the columns of a result table: the agents' ids, each
+        followed by its statistics when with_statistics is True.
+        """
+        columns = []
+
+        for agent_id in self.stats.keys():
+            columns.append("{}".format(agent_id))
+
+            if with_statistics:
+                columns.extend(
+                    "{}_{}".format(agent_id, statistic)
+                    for statistic in STATISTICS)
+
+        return columns
+
+    def row(self, day, with_statistics=False):
+        """
+        The values of a day's row of a result table, in the order of columns.
+        """
+        row = []
+
+        for stats in self.stats.values():
+            row.append(stats.mean(day))
+
+            if with_statistics:
+                low, high = stats.ci95(day)
+                row.extend([
+                    stats.std(day), low, high,
+                    stats.quantile(day, 0.05),
+                    stats.quantile(day, 0.5),
+                    stats.quantile(day, 0.95),
+                ])
+
+        return row
+
+
+class DailyStats(object):
+    """
+    Running statistics of one agent's balance on each day.
+    """
+
+    def __init__(self, num_days, quantiles=False, sketch_size=128):
+        self.count = 0
+        self.means = array('d', [0.0])*num_days
+        self.m2 = array('d', [0.0])*num_days
+
+        #the sums of the balances on the leading days on which every run's
+        #balance was an int (they stay ints until an agent first buys), whose
+        #means are reported as ints
+        self.int_sums = [0]*num_days
+
+        if quantiles:
+            self.sketches = [
+                QuantileSketch(sketch_size) for d in range(0, num_days)]
+        else:
+            self.sketches = None
+
+    def add(self, daily_balance):
+        """
+        Folds in one run's daily balances.
+        """
+        self.count += 1
+        count = self.count
+        means = self.means
+        m2 = self.m2
+
+        for d in range(0, len(means)):
+            balance = daily_balance[d]
+            delta = balance - means[d]
+            means[d] += delta/count
+            m2[d] += delta*(balance - means[d])
+
+        int_sums = self.int_sums
+        for d in range(0, len(int_sums)):
+            if isinstance(daily_balance[d], float):
+                del int_sums[d:]
+                break
+            int_sums[d] += daily_balance[d]
+
+        if self.sketches is not None:
+            for d in range(0, len(means)):
+                self.sketches[d].add(daily_balance[d])
+
+    def merge(self, other):
+        """
+        Folds in the statistics of another DailyStats' runs.
+        """
+        if other.count == 0:
+            return
+
+        count = self.count + other.count
+
+        for d in range(0, len(self.means)):
+            delta = other.means[d] - self.means[d]
+            self.means[d] += delta*other.count/count
+            self.m2[d] += other.m2[d] + \
+                delta*delta*self.count*other.count/count
+
+        self.count = count
+
+        del self.int_sums[len(other.int_sums):]
+        for d in range(0, len(self.int_sums)):
+            self.int_sums[d] += other.int_sums[d]
+
+        if self.sketches is not None:
+            for d in range(0, len(self.means)):
+                self.sketches[d].merge(other.sketches[d])
+
+    def mean(self, day):
+        """
+        The mean balance on the given day: an int, rounded down, if every
+        run's balance was an int that day.
+        """
+        if self.count > 0 and day < len(self.int_sums):
+            return self.int_sums[day]//self.count
+
+        return self.means[day]
+
+    def std(self, day):
+        """
+        The sample standard deviation of the balance on the given day.
+        """
+        if self.count < 2:
+            return float("nan")
+
+        return math.sqrt(self.m2[day]/(self.count - 1))
+
+    def ci95(self, day):
+        """
+        The 95% confidence interval of the mean balance on the given day, as a
+        (low, high) pair.
+        """
+        if self.count < 2:
+            return float("nan"), float("nan")
+
+        df = self.count - 1
+        critical = T_95[df] if df < len(T_95) else Z_95
+        half_width = critical*self.std(day)/math.sqrt(self.count)
+
+        return self.means[day] - half_width, self.means[day] + half_width
+
+    def quantile(self, day, q):
+        if self.sketches is None:
+            raise ValueError("Quantiles were not kept")
+
+        return self.sketches[day].quantile(q)
+
+
+class QuantileSketch(object):
+    """
+    A mergeable sketch of a distribution, for approximate quantiles.
+
+    This is a simplified KLL sketch: values are kept in levels, where a value
+    on level i stands for 2**i of the values added. Whenever a level holds k
+    values it is sorted and every other value is promoted to the next level.
+    The sketch keeps O(k log(n/k)) values, and is exact while fewer than k
+    values have been added.
+    """
+
+    def __init__(self, k=128):
+        self.k = k
+        self.count = 0
+        self.levels = [[]]
+
+        #alternates which half of a level is promoted, to avoid bias
+        self._offset = 0
+
+    def add(self, value):
+        self.count += 1
+        self.levels[0].append(value)
+
+        if len(self.levels[0]) >= self.k:
+            self._compact()
+
+    def merge(self, other):
+        self.count += other.count
+
+        for level, values in enumerate(other.levels):
+            if level == len(self.levels):
+                self.levels.append([])
+            self.levels[level].extend(values)
+
+        self._compact()
+
+    def quantile(self, q):
+        """
+        The approximate q-quantile (0 <= q <= 1) of the values added.
+        """
+        weighted = []
+        for level, values in enumerate(self.levels):
+            weighted.extend((value, 1 << level) for value in values)
+
+        if not weighted:
+            return float("nan")
+
+        weighted.sort()
+        total = sum(weight for value, weight in weighted)
+        target = q*total
+
+        seen = 0
+        for value, weight in weighted:
+            seen += weight
+            if seen >= target:
+                return value
+
+        return weighted[-1][0]
+
+    def _compact(self):
+        level = 0
+
+        while level < len(self.levels):
+            values = self.levels[level]
+
+            if len(values) >= self.k:
+                values.sort()
+
+                #an odd value out stays on this level
+                keep = [values.pop()] if len(values) % 2 else []
+
+                if level + 1 == len(self.levels):
+                    self.levels.append([])
+                self.levels[level + 1].extend(values[self._offset::2])
+                self.levels[level] = keep
+
+                self._offset = 1 - self._offset
+
+            level += 1
@@ -0,0 +1,178 @@
+"""
+An auction engine for the multi-agent case.
+
+Every agent of a market bids on each day's product, through the new_day,
+current_bid_info, my_bid_is and end_of_day methods of Agent. The product goes
+to the highest bidder of an ascending auction, for its bid:
+
+- Each round, every agent still bidding is asked for a bid, except the one
+  with the highest bid. A bid must beat the highest bid so far by at least
+  the increment; the first must be at least the product's price.
+- An agent that doesn't bid drops out for the rest of the day. It isn't asked
+  again, nor told of later bids.
+- The bids are kept in a heap, so the highest is found without a pass over
+  every bid. Ties go to the agent that was asked first.
+- After a round, the new highest bid is told once to each agent still
+  bidding, rather than every bid being told to every agent, so a round costs
+  time in proportion to the agents still bidding.
+- The day ends as soon as a round brings no new bid.
+
+The day's product is drawn like in the single agent case, with the richest
+agent's balance standing in for the agent's: its value is capped at the
+largest balance of the market (and MAXIMUM_VALUE), so some agent can always
+afford the product's price.
+
+This module is imported by the simulator when the auction engine is selected.
+"""
+import heapq
+from random import Random
+
+from . import simulator
+from .product import Product
+from .tape import ProductTape
+
+
+#: The least a bid must beat the highest bid by, as a fraction of the
+#: product's value.
+INCREMENT = 0.01
+
+#: The most rounds of bidding in a day.
+MAX_ROUNDS = 1000
+
+
+def auction_case(agents, market_odds, seed=None, tape=None,
+                 increment=INCREMENT, max_rounds=MAX_ROUNDS):
+    """
+    Given a market of agents and a seed, simulates them bidding against each
+    other for one product a day.
+
+    Args:
+        agents: the agents of the market. Their ids must be distinct.
+        market_odds: the market's ratio of good vs. bad products.
+        seed: seed for the random number generator. If None/default, the
+              system time is used.
+        tape: a ProductTape of the products to auction. If None/default, one
+              is drawn from the seed.
+        increment: the least a bid must beat the highest bid by, as a fraction
+                   of the product's value.
+        max_rounds: the most rounds of bidding in a day.
+    Returns:
+        A list with one daily_balance list per agent, in the order of agents.
+
+    The product's value is capped by the richest agent's balance at the
+    start of the day, rather than by each agent's own.
+    """
+    if tape is None:
+        tape = ProductTape(seed, simulator.NUM_DAYS, market_odds)
+
+    #the order agents are asked in, which breaks ties, changes every day
+    random = Random(seed)
+    order = list(range(0, len(agents)))
+
+    daily_balances = [[] for agent in agents]
+
+    for agent in agents:
+        agent.balance = simulator.INITIAL_MONEY
+
+    for d in range(0, simulator.NUM_DAYS):
+        richest = max(agent.balance for agent in agents)
+        max_value = min(richest, simulator.MAXIMUM_VALUE)
+        value = tape.value_draws[d]*max_value
+        price = tape.price_draws[d]*value
+
+        prod = Product(value, price)
+        random.shuffle(order)
+
+        winner, winning_bid, rounds = run_auction(
+            agents, prod, tape.probs[d], order, increment*value, max_rounds)
+
+        if winner is not None:
+            agents[winner].balance -= winning_bid
+
+            if tape.working[d]:
+                agents[winner].balance += prod.value
+
+        winner_id = agents[winner].id if winner is not None else None
+
+        for index, agent in enumerate(agents):
+            agent.end_of_day(winner_id, winning_bid)
+
+            agent.balance += simulator.DAILY_EARNINGS
+            daily_balances[index].append(agent.balance)
+
+    return daily_balances
+
+
+def run_auction(agents, prod, prob_of_good, order, increment,
+                max_rounds=MAX_ROUNDS):
+    """
+    Auctions one product.
+
+    Args:
+        agents: the agents of the market.
+        prod: the product. Its price is the least it can be sold for.
+        prob_of_good: probability of the product being in a good condition.
+        order: the indices of the agents, in the order they're asked for bids.
+        increment: the least a bid must beat the highest bid by.
+        max_rounds: the most rounds of bidding.
+    Returns:
+        A (winner, bid, rounds) tuple: the index of the agent with the highest
+        bid and its bid, or None and None if no one bid, and the number of
+        rounds it took.
+    """
+    min_bid = prod.price
+
+    for agent in agents:
+        agent.new_day(prod, prob_of_good, min_bid)
+
+    #(-bid, arrival, index) of every bid, so the highest is on top
+    bids = []
+    arrival = 0
+
+    leader = None
+    bidding = list(order)
+    rounds = 0
+
+    while rounds < max_rounds:
+        rounds += 1
+        still_bidding = []
+
+        for index in bidding:
+            if index == leader:
+                still_bidding.append(index)
+                continue
+
+            bid = agents[index].my_bid_is()
+            if bid is None:
+                continue
+
+            if bid < min_bid:
+                raise ValueError("{} bid {}, less than the least bid {}"
+                                 .format(agents[index].id, bid, min_bid))
+
+            heapq.heappush(bids, (-bid, arrival, index))
+            arrival += 1
+            still_bidding.append(index)
+
+        bidding = still_bidding
+
+        if not bids or bids[0][2] == leader:
+            #no one outbid the leader; the bidding has converged
+            break
+
+        leader = bids[0][2]
+        max_bid = -bids[0][0]
+        min_bid = max_bid + increment
+
+        #only one agent is left bidding
+        if len(bidding) == 1:
+            break
+
+        max_bidder_id = agents[leader].id
+        for index in bidding:
+            agents[index].current_bid_info(max_bidder_id, max_bid, min_bid)
+
+    if not bids:
+        return None, None, rounds
+
+    return bids[0][2], -bids[0][0], rounds
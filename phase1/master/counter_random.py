@@ -0,0 +1,103 @@
+"""
+A counter-based random number generator.
+
+random.Random is sequential: the draws of day d come after every draw of the
+days before it, so they can only be had by making those first. CounterRandom
+instead computes each draw directly from its coordinates -- the seed, the
+day, a stream number saying what the draw is for, and an index within the
+stream -- as a SplitMix64 hash of a counter built from them. Any day, or any
+block of days, can be drawn without the ones before it, in any order and in
+any process, and always gives the same numbers.
+
+The draws for many days can be made at once with NumPy, through the methods
+ending in "s"; they give exactly the same floats as the scalar methods.
+"""
+from .beta import beta_sampler
+
+
+MASK_64 = (1 << 64) - 1
+
+#: The SplitMix64 increment, the golden ratio as a 64-bit fraction.
+GAMMA = 0x9E3779B97F4A7C15
+
+#: The streams of a day's draws.
+VALUE_STREAM = 0
+PRICE_STREAM = 1
+BETA_STREAM = 2
+WORKING_STREAM = 3
+
+#: The most draws one stream can make in a day.
+MAX_INDEX = 1 << 8
+
+#: The most streams a day can have.
+MAX_STREAMS = 1 << 8
+
+
+def _mix(z):
+    z = ((z ^ (z >> 30))*0xBF58476D1CE4E5B9) & MASK_64
+    z = ((z ^ (z >> 27))*0x94D049BB133111EB) & MASK_64
+    return z ^ (z >> 31)
+
+
+class CounterRandom(object):
+    """
+    Random draws addressed by (day, stream, index), for one seed.
+
+    The draw at a counter n is the n-th output of a SplitMix64 generator
+    seeded with a hash of the seed, which SplitMix64 can compute without the
+    n - 1 outputs before it.
+
+    Args:
+        seed: a non-negative integer.
+    """
+
+    def __init__(self, seed):
+        if seed is None or seed < 0:
+            raise ValueError("A CounterRandom needs a non-negative seed")
+
+        self.seed = seed
+        self.key = _mix((seed + GAMMA) & MASK_64)
+
+    def random(self, day, stream, index=0):
+        """
+        The uniform draw in [0, 1) of the given day, stream and index.
+        """
+        counter = (day*MAX_STREAMS + stream)*MAX_INDEX + index + 1
+        z = _mix((self.key + counter*GAMMA) & MASK_64)
+
+        #the top 53 bits make a double, like random.random()
+        return (z >> 11)*(1.0/(1 << 53))
+
+    def randoms(self, days, stream, index=0):
+        """
+        The vectorized random, for a NumPy array of days.
+        """
+        import numpy
+
+        counters = (numpy.asarray(days, dtype=numpy.uint64) *
+                    numpy.uint64(MAX_STREAMS) + numpy.uint64(stream)) * \
+            numpy.uint64(MAX_INDEX) + numpy.uint64(index + 1)
+
+        z = numpy.uint64(self.key) + counters*numpy.uint64(GAMMA)
+        z = (z ^ (z >> numpy.uint64(30)))*numpy.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> numpy.uint64(27)))*numpy.uint64(0x94D049BB133111EB)
+        z = z ^ (z >> numpy.uint64(31))
+
+        return (z >> numpy.uint64(11)).astype(numpy.float64)*(1.0/(1 << 53))
+
+    def betavariate(self, day, alpha, beta, stream=BETA_STREAM):
+        """
+        A draw of the given day from the beta distribution, by inverse
+        transform of one uniform draw (see BetaSampler).
+        """
+        return beta_sampler(alpha, beta).sample(self.random(day, stream))
+
+    def betavariates(self, days, alpha, beta, stream=BETA_STREAM):
+        """
+        The vectorized betavariate, for a NumPy array of days.
+        """
+        return beta_sampler(alpha, beta).samples(self.randoms(days, stream))
+
+    def __unicode__(self):
+        return "CounterRandom [seed={}]".format(self.seed)
+
@@ -0,0 +1,146 @@
+"""
+Long-horizon simulation, in memory that doesn't grow with the number of days.
+
+no_learning_case keeps a ProductTape and a balance for every day, which is
+fine for NUM_DAYS but not for hundreds of millions of days. long_horizon_case
+draws each day's product as it goes (see stream_products) and folds each
+day's balance into a BalanceReducer, which divides the days into a fixed
+number of buckets of consecutive days and keeps, for each bucket:
+
+    the balance on the bucket's last day (so every k-th day's balance)
+    the smallest, the largest and the mean balance of the bucket's days
+
+Only the reducer's arrays, one entry per bucket, are ever allocated.
+"""
+from array import array
+
+from . import simulator
+from .product import Product
+from .tape import stream_products
+
+
+#: The values a BalanceReducer keeps for each bucket, after the balance on
+#: its last day.
+ENVELOPE = ["min", "max", "mean"]
+
+
+class BalanceReducer(object):
+    """
+    Reduces an agent's daily balances to a fixed number of buckets.
+
+    Args:
+        num_days: the number of days the balances will be added for.
+        num_buckets: the most buckets to divide the days into. Every bucket
+                     but the last has the same number of days.
+    """
+
+    def __init__(self, num_days, num_buckets):
+        if num_days < 1 or num_buckets < 1:
+            raise ValueError("A BalanceReducer needs days and buckets")
+
+        self.num_days = num_days
+        self.bucket_size = -(-num_days//num_buckets)
+        self.num_buckets = -(-num_days//self.bucket_size)
+
+        self.samples = array('d', [0.0])*self.num_buckets
+        self.mins = array('d', [0.0])*self.num_buckets
+        self.maxes = array('d', [0.0])*self.num_buckets
+        self.means = array('d', [0.0])*self.num_buckets
+
+        #the days added so far, and the running envelope of the bucket
+        self.days = 0
+        self._total = 0.0
+        self._min = float("inf")
+        self._max = float("-inf")
+
+    def add(self, balance):
+        """
+        Adds the balance of the next day.
+        """
+        self._total += balance
+        if balance < self._min:
+            self._min = balance
+        if balance > self._max:
+            self._max = balance
+
+        self.days += 1
+
+        if self.days % self.bucket_size == 0 or self.days == self.num_days:
+            bucket = (self.days - 1)//self.bucket_size
+            in_bucket = self.days - bucket*self.bucket_size
+
+            self.samples[bucket] = balance
+            self.mins[bucket] = self._min
+            self.maxes[bucket] = self._max
+            self.means[bucket] = self._total/in_bucket
+
+            self._total = 0.0
+            self._min = float("inf")
+            self._max = float("-inf")
+
+    def last_day(self, bucket):
+        """
+        The last day (counting from 0) of the given bucket.
+        """
+        return min((bucket + 1)*self.bucket_size, self.num_days) - 1
+
+    def series(self):
+        """
+        The reduced balances as (suffix, values) pairs: the balance on every
+        bucket's last day, with no suffix, then each of ENVELOPE.
+        """
+        return [("", self.samples), ("_min", self.mins),
+                ("_max", self.maxes), ("_mean", self.means)]
+
+    def __unicode__(self):
+        return "BalanceReducer [days={}, buckets={}]".format(
+            self.num_days, self.num_buckets)
+
+
+def long_horizon_case(agent, market_odds, seed, num_days, num_buckets,
+                      generator="random"):
+    """
+    Simulates an agent like no_learning_case, for any number of days.
+
+    The products are the ones a ProductTape(seed, num_days, market_odds,
+    generator) would hold, so over NUM_DAYS days the balances on each
+    bucket's last day are the balances no_learning_case gives on those days.
+
+    Args:
+        agent: Agent to simulate.
+        market_odds: the market's ratio of good vs. bad products.
+        seed: seed for the random number generator.
+        num_days: the number of days to simulate.
+        num_buckets: the most buckets to reduce the balances to.
+        generator: the generator to draw the products with; one of
+                   GENERATORS.
+    Returns:
+        The BalanceReducer of the agent's daily balances.
+    """
+    reducer = BalanceReducer(num_days, num_buckets)
+    products = stream_products(seed, market_odds, generator)
+
+    maximum_value = simulator.MAXIMUM_VALUE
+    daily_earnings = simulator.DAILY_EARNINGS
+
+    agent.balance = simulator.INITIAL_MONEY
+
+    for d in xrange(0, num_days):
+        value_draw, price_draw, prob, product_working = next(products)
+
+        max_value = min(agent.balance, maximum_value)
+        value = value_draw*max_value
+        price = price_draw*value
+
+        prod = Product(value, price)
+
+        if agent.will_buy(prod, prob):
+            agent.balance -= prod.price
+
+            if product_working:
+                agent.balance += prod.value
+
+        agent.balance += daily_earnings
+        reducer.add(agent.balance)
+
+    return reducer
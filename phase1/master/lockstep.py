@@ -0,0 +1,201 @@
+"""
+A lockstep engine for the no learning case.
+
+Instead of running no_learning_case once per agent per seed, this engine keeps
+the balance of every (agent, tape) pair -- a "lane" -- in one NumPy array and
+advances all lanes one day at a time with vectorized operations.
+
+Each lane decides through its agent's will_buy_batch, so the engine can't go
+out of sync with the agents' own rules. Agents that don't override
+Agent.will_buy_batch fall back to calling will_buy with the day's Product, as
+do subclasses that override will_buy but inherit their parent's batch rule.
+
+family_case does the same for the members of an AgentFamily on one tape.
+
+This module needs NumPy, so the simulator only imports it when the lockstep
+engine is selected.
+"""
+import numpy
+
+from ..agents import Agent
+from . import simulator
+from .product import Product
+
+
+def lockstep_case(lanes):
+    """
+    Simulates every lane together, one day at a time.
+
+    The daily balances are exactly the ones no_learning_case would produce for
+    each agent and tape, including staying ints until the agent's first
+    purchase.
+
+    Args:
+        lanes: a list of (agent, tape) pairs, where tape is the ProductTape
+               the agent should replay. Lanes may share a tape.
+    Returns:
+        A list with one daily_balance list per lane, in the order of lanes.
+    """
+    num_days = simulator.NUM_DAYS
+    num_lanes = len(lanes)
+
+    #stack the distinct tapes day-major, so one day is a single row
+    tapes = []
+    tape_index = {}
+    lane_tapes = numpy.empty(num_lanes, dtype=numpy.intp)
+
+    for lane, (agent, tape) in enumerate(lanes):
+        if id(tape) not in tape_index:
+            tape_index[id(tape)] = len(tapes)
+            tapes.append(tape)
+        lane_tapes[lane] = tape_index[id(tape)]
+
+    value_draws = _day_major(tapes, "value_draws", numpy.float64, num_days)
+    price_draws = _day_major(tapes, "price_draws", numpy.float64, num_days)
+    probs = _day_major(tapes, "probs", numpy.float64, num_days)
+    working = _day_major(tapes, "working", numpy.uint8, num_days) != 0
+
+    deciders = [_decider(agent) for agent, tape in lanes]
+
+    balances = numpy.empty(num_lanes)
+    balances.fill(simulator.INITIAL_MONEY)
+    will_buy = numpy.empty(num_lanes, dtype=bool)
+
+    #balances are ints until an agent first buys something
+    first_purchase = numpy.empty(num_lanes, dtype=numpy.intp)
+    first_purchase.fill(num_days)
+
+    daily_balances = numpy.empty((num_days, num_lanes))
+
+    for d in range(0, num_days):
+        max_values = numpy.minimum(balances, simulator.MAXIMUM_VALUE)
+        values = value_draws[d][lane_tapes]*max_values
+        prices = price_draws[d][lane_tapes]*values
+        day_probs = probs[d][lane_tapes]
+        product_working = working[d][lane_tapes]
+
+        for lane, decide in enumerate(deciders):
+            will_buy[lane:lane + 1] = decide(
+                values[lane:lane + 1], prices[lane:lane + 1],
+                day_probs[lane:lane + 1], balances[lane])
+
+        numpy.minimum(first_purchase, numpy.where(will_buy, d, num_days),
+                      out=first_purchase)
+
+        #withdraw the price, then deposit the value of working products
+        balances = numpy.where(will_buy, balances - prices, balances)
+        balances = numpy.where(
+            will_buy & product_working, balances + values, balances)
+
+        #deposit the agents' independent earnings
+        balances += simulator.DAILY_EARNINGS
+
+        daily_balances[d] = balances
+
+    results = []
+    for lane, (agent, tape) in enumerate(lanes):
+        daily_balance = daily_balances[:, lane].tolist()
+
+        for d in range(0, first_purchase[lane]):
+            daily_balance[d] = int(daily_balance[d])
+
+        agent.balance = daily_balance[-1] if daily_balance else \
+            simulator.INITIAL_MONEY
+        results.append(daily_balance)
+
+    return results
+
+
+def family_case(family, tape):
+    """
+    Simulates every member of an AgentFamily together on one tape, one day at
+    a time, with the members' balances in one array.
+
+    The daily balances are the ones no_learning_case would produce for each
+    member, as floats.
+
+    Args:
+        family: the AgentFamily to simulate.
+        tape: the ProductTape every member replays.
+    Returns:
+        A (num_days, len(family)) array of every member's daily balances.
+    """
+    num_days = simulator.NUM_DAYS
+
+    balances = numpy.empty(len(family))
+    balances.fill(simulator.INITIAL_MONEY)
+
+    daily_balances = numpy.empty((num_days, len(family)))
+
+    for d in range(0, num_days):
+        max_values = numpy.minimum(balances, simulator.MAXIMUM_VALUE)
+        values = tape.value_draws[d]*max_values
+        prices = tape.price_draws[d]*values
+
+        will_buy = family.will_buy_batch(values, prices, tape.probs[d])
+
+        #withdraw the price, then deposit the value of working products
+        balances = numpy.where(will_buy, balances - prices, balances)
+        if tape.working[d]:
+            balances = numpy.where(will_buy, balances + values, balances)
+
+        #deposit the members' independent earnings
+        balances += simulator.DAILY_EARNINGS
+
+        daily_balances[d] = balances
+
+    return daily_balances
+
+
+def _day_major(tapes, name, dtype, num_days):
+    """
+    Stacks one field of every tape into a (num_days, len(tapes)) array.
+    """
+    columns = numpy.empty((num_days, len(tapes)), dtype=dtype)
+
+    for index, tape in enumerate(tapes):
+        columns[:, index] = numpy.frombuffer(
+            getattr(tape, name), dtype=dtype)[:num_days]
+
+    return columns
+
+
+def _decider(agent):
+    """
+    A function deciding whether a lane's agent buys the day's product, given
+    one-element arrays of its value, price and probability of being good, and
+    the lane's balance.
+    """
+    if _decides_in_batches(type(agent)):
+        def decide(values, prices, probs, balance):
+            #agents may look at their own balance when deciding
+            agent.balance = float(balance)
+            return agent.will_buy_batch(values, prices, probs)
+    else:
+        def decide(values, prices, probs, balance):
+            agent.balance = float(balance)
+            prod = Product(float(values[0]), float(prices[0]))
+            return agent.will_buy(prod, float(probs[0]))
+
+    return decide
+
+
+def _decides_in_batches(agent_type):
+    """
+    Whether agent_type overrides Agent.will_buy_batch, in a class that is at
+    least as derived as the one its will_buy comes from -- a subclass that
+    only overrides will_buy can't decide with its parent's batch rule.
+    """
+    batch_type = _defined_in(agent_type, "will_buy_batch")
+
+    return batch_type is not Agent and \
+        issubclass(batch_type, _defined_in(agent_type, "will_buy"))
+
+
+def _defined_in(agent_type, name):
+    """
+    The class of agent_type's method resolution order that defines name.
+    """
+    for base in agent_type.__mro__:
+        if name in vars(base):
+            return base
@@ -0,0 +1,262 @@
+"""
+Profiling of simulations.
+
+A Profiler stands in for a Tracer (and forwards every event to the Tracer it
+wraps, if any), so the simulators need no code of their own for it and cost
+nothing extra when it is off. From the events it times each simulated day's
+phases:
+
+    draw:   drawing the day's product and building it
+    decide: the agent's decision
+    settle: paying for the product and the day's earnings
+    record: recording the day's balance
+    trace:  writing the events to the wrapped Tracer
+
+It also times the calls to the agent's own methods (see METHODS), and can
+run each (agent, seed) run under cProfile. The times of the phases and of the
+methods are summed by agent id, in nanoseconds; a method's time includes the
+time of the methods it calls.
+"""
+import cProfile
+import json
+import os
+from collections import OrderedDict
+from timeit import default_timer
+
+
+#: The phases of a simulated day.
+PHASES = ["draw", "decide", "settle", "record", "trace"]
+
+#: The agent methods that are timed, where an agent has them.
+METHODS = [
+    "will_buy",
+    "compute_prob_of_good",
+    "will_buy_given_features",
+    "learn",
+    "unlearn",
+    "relearn",
+    "my_bid_is",
+]
+
+NANOSECONDS = 1000000000
+
+
+class Profiler(object):
+    """
+    Times simulations, as their Tracer.
+
+    Args:
+        tracer: the Tracer to forward the events to. If None/default, nothing
+                is recorded.
+        runs_directory: a directory to write a cProfile dump of every run
+                        to, as <agent id>-<seed>.prof. If None/default, the
+                        runs aren't run under cProfile.
+
+    Attributes:
+        phases: agent id -> phase -> [calls, nanoseconds]
+        methods: agent id -> method name -> [calls, nanoseconds]
+    """
+
+    def __init__(self, tracer=None, runs_directory=None):
+        if runs_directory is not None and not os.path.isdir(runs_directory):
+            os.makedirs(runs_directory)
+
+        self.tracer = tracer
+        self.runs_directory = runs_directory
+
+        self.phases = OrderedDict()
+        self.methods = OrderedDict()
+
+        self._agent_id = None
+        self._seed = None
+        self._profile = None
+        self._traced = False
+        self._last = None
+
+    def instrument(self, agent):
+        """
+        Replaces the agent's METHODS with timed versions. An agent is only
+        instrumented once.
+        """
+        if getattr(agent, "_profiler", None) is self:
+            return
+
+        for name in METHODS:
+            method = getattr(agent, name, None)
+            if method is not None:
+                setattr(agent, name, self._timed(agent, name, method))
+
+        agent._profiler = self
+
+    def _timed(self, agent, name, method):
+        def timed(*args, **kwargs):
+            start = default_timer()
+
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self._add(self.methods, agent.id, name,
+                          default_timer() - start)
+
+        return timed
+
+    def sample(self, day):
+        #every day is timed, but the wrapped tracer still picks its own
+        self._traced = self.tracer is not None and self.tracer.sample(day)
+        return True
+
+    def run_start(self, agent, seed):
+        self.instrument(agent)
+
+        self._agent_id = agent.id
+        self._seed = seed
+        self._last = None
+
+        if self.tracer is not None:
+            self.tracer.run_start(agent, seed)
+
+        if self.runs_directory is not None:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+
+    def day_start(self, day, balance):
+        #the first day's draw starts here; later ones, at the last balance
+        first_day = self._last is None
+
+        self._forward("day_start", day, balance)
+
+        if first_day:
+            self._last = default_timer()
+
+    def product_offered(self, day, prod, prob_of_good=None):
+        self._phase("draw")
+        self._forward("product_offered", day, prod, prob_of_good)
+        self._last = default_timer()
+
+    def decision(self, day, agent, will_buy):
+        self._phase("decide")
+        self._forward("decision", day, agent, will_buy)
+        self._last = default_timer()
+
+    def outcome(self, day, product_working):
+        #the forwarding is left out of the settle phase, like the others'
+        start = default_timer()
+        self._forward("outcome", day, product_working)
+        self._last += default_timer() - start
+
+    def settled(self, day):
+        self._phase("settle")
+        self._forward("settled", day)
+        self._last = default_timer()
+
+    def balance(self, day, balance):
+        self._phase("record")
+        self._forward("balance", day, balance)
+        self._last = default_timer()
+
+    def run_end(self, agent):
+        if self._profile is not None:
+            self._profile.disable()
+            self._profile.dump_stats(os.path.join(
+                self.runs_directory,
+                "{}-{}.prof".format(agent.id, self._seed)))
+            self._profile = None
+
+        if self.tracer is not None:
+            self.tracer.run_end(agent)
+
+    def close(self):
+        if self.tracer is not None:
+            self.tracer.close()
+
+    def _phase(self, phase):
+        #each hook ends by restarting the clock, so a phase's time doesn't
+        #include the profiler's own
+        self._add(self.phases, self._agent_id, phase,
+                  default_timer() - self._last)
+
+    def _forward(self, event, *args):
+        if not self._traced:
+            return
+
+        start = default_timer()
+        getattr(self.tracer, event)(*args)
+        self._add(self.phases, self._agent_id, "trace",
+                  default_timer() - start)
+
+    def _add(self, totals, agent_id, name, seconds):
+        by_name = totals.get(agent_id)
+        if by_name is None:
+            by_name = totals[agent_id] = OrderedDict()
+
+        counts = by_name.get(name)
+        if counts is None:
+            counts = by_name[name] = [0, 0]
+
+        counts[0] += 1
+        counts[1] += int(seconds*NANOSECONDS)
+
+    def rows(self):
+        """
+        The summary as (agent id, kind, name, calls, nanoseconds) rows, where
+        kind is "phase" or "method", with each agent's phases in the order of
+        PHASES followed by its methods.
+        """
+        rows = []
+
+        for agent_id in _agent_ids(self.phases, self.methods):
+            phases = self.phases.get(agent_id, {})
+            for phase in PHASES:
+                if phase in phases:
+                    calls, ns = phases[phase]
+                    rows.append((agent_id, "phase", phase, calls, ns))
+
+            for name, (calls, ns) in self.methods.get(agent_id, {}).items():
+                rows.append((agent_id, "method", name, calls, ns))
+
+        return rows
+
+    def write_summary(self, out):
+        """
+        Writes the summary as a table.
+        """
+        out.write("{:<12}{:<8}{:<26}{:>12}{:>14}{:>14}\n".format(
+            "agent", "kind", "name", "calls", "total ms", "per call us"))
+
+        for agent_id, kind, name, calls, ns in self.rows():
+            out.write("{:<12}{:<8}{:<26}{:>12}{:>14.3f}{:>14.3f}\n".format(
+                agent_id, kind, name, calls, ns/1e6,
+                ns/1e3/calls if calls else 0.0))
+
+    def write_json(self, out):
+        """
+        Writes the summary as JSON: {"phases": {agent id: {phase: {"calls":
+        calls, "ns": nanoseconds}}}, "methods": {...}}.
+        """
+        summary = OrderedDict()
+
+        for kind, totals in [("phases", self.phases),
+                             ("methods", self.methods)]:
+            summary[kind] = OrderedDict(
+                (agent_id, OrderedDict(
+                    (name, OrderedDict([("calls", calls), ("ns", ns)]))
+                    for name, (calls, ns) in by_name.items()))
+                for agent_id, by_name in totals.items())
+
+        json.dump(summary, out, indent=2)
+        out.write("\n")
+
+    def __unicode__(self):
+        return "Profiler [agents={}]".format(
+            len(_agent_ids(self.phases, self.methods)))
+
+
+def _agent_ids(*totals):
+    agent_ids = []
+
+    for by_agent in totals:
+        for agent_id in by_agent:
+            if agent_id not in agent_ids:
+                agent_ids.append(agent_id)
+
+    return agent_ids
@@ -0,0 +1,238 @@
+"""
+A content-addressed on-disk cache of simulation results.
+
+A run's daily_balance depends only on the agent's code and parameters, the
+seed, the simulator's constants and the products (and the code drawing
+them), so the simulators can key
+each run on a hash of those (see run_key) and skip the runs whose results
+are already cached. Changing any of them, such as editing an agent, changes
+the key, so stale results are never used; they're evicted once the cache
+outgrows its size.
+
+Each result is a file in the cache directory, named after its key: a header
+followed by the balances as little-endian doubles.
+"""
+import hashlib
+import inspect
+import os
+import pickle
+import struct
+from collections import OrderedDict
+from importlib import import_module
+
+
+#: The cache file's header: a magic string and the number of balances at the
+#: start that are ints (balances stay ints until an agent first buys).
+HEADER = struct.Struct("<4sQ")
+
+MAGIC = b"BAL1"
+
+#: The suffix of the cache's files.
+SUFFIX = ".bal"
+
+#: The default size of a cache, in bytes.
+DEFAULT_MAX_BYTES = 1 << 30
+
+
+class ResultCache(object):
+    """
+    Daily balances on disk, by key.
+
+    Args:
+        directory: the directory to keep the results in. It's created if
+                   needed.
+        max_bytes: the size of the cache. When it's exceeded, the least
+                   recently used results are deleted.
+
+    Attributes:
+        hits: the number of results found in the cache.
+        misses: the number of results that weren't.
+    """
+
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES):
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+        #path -> size of every result, least recently used first; the
+        #directory is only listed once, and self.size is their total
+        self._sizes = OrderedDict()
+        for path in sorted(self._paths(), key=os.path.getmtime):
+            self._sizes[path] = os.path.getsize(path)
+
+        self.size = sum(self._sizes.values())
+
+    def get(self, key):
+        """
+        The daily balances stored under key, or None if there are none.
+        """
+        path = self._path(key)
+
+        try:
+            with open(path, "rb") as result:
+                data = result.read()
+        except (IOError, OSError):
+            self.misses += 1
+            return None
+
+        if len(data) < HEADER.size or \
+                (len(data) - HEADER.size) % 8 != 0:
+            self.misses += 1
+            return None
+
+        magic, int_prefix = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            self.misses += 1
+            return None
+
+        num_days = (len(data) - HEADER.size)//8
+        daily_balance = list(struct.unpack_from(
+            "<{}d".format(num_days), data, HEADER.size))
+        for d in range(0, int_prefix):
+            daily_balance[d] = int(daily_balance[d])
+
+        #mark it as recently used, here and for later caches of the
+        #directory
+        self._touch(path, len(data))
+        os.utime(path, None)
+
+        self.hits += 1
+        return daily_balance
+
+    def put(self, key, daily_balance):
+        """
+        Stores daily balances under key, then evicts the least recently used
+        results while the cache is too large.
+
+        Results with an int balance after a float one aren't stored, since
+        only a leading run of ints can be restored.
+        """
+        int_prefix = 0
+        while int_prefix < len(daily_balance) and \
+                not isinstance(daily_balance[int_prefix], float):
+            int_prefix += 1
+
+        if any(not isinstance(balance, float)
+               for balance in daily_balance[int_prefix:]):
+            return
+
+        path = self._path(key)
+
+        #write to a temporary file first, so a reader never sees half a result
+        temp_path = "{}.{}.tmp".format(path, os.getpid())
+
+        with open(temp_path, "wb") as result:
+            result.write(HEADER.pack(MAGIC, int_prefix))
+            result.write(struct.pack(
+                "<{}d".format(len(daily_balance)), *daily_balance))
+
+        os.rename(temp_path, path)
+        self._touch(path, HEADER.size + 8*len(daily_balance))
+
+        if self.size > self.max_bytes:
+            self._evict()
+
+    def _touch(self, path, size):
+        #move a result to the most recently used end, with its new size
+        self.size -= self._sizes.pop(path, 0)
+        self._sizes[path] = size
+        self.size += size
+
+    def _evict(self):
+        while self.size > self.max_bytes and self._sizes:
+            path, size = self._sizes.popitem(last=False)
+            self.size -= size
+
+            try:
+                os.remove(path)
+            except OSError:
+                #another process already evicted it
+                pass
+
+    def _paths(self):
+        return [os.path.join(self.directory, name)
+                for name in os.listdir(self.directory)
+                if name.endswith(SUFFIX)]
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + SUFFIX)
+
+    def __unicode__(self):
+        return "ResultCache [directory={}, hits={}, misses={}]".format(
+            self.directory, self.hits, self.misses)
+
+
+def run_key(*parts):
+    """
+    The key of a run: a SHA-1 digest of everything its result depends on.
+    Every part must have a stable repr, like strings, numbers and tuples of
+    them; if any part is None the run can't be cached, and the key is None.
+    """
+    if any(part is None for part in parts):
+        return None
+
+    return hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()
+
+
+def source_fingerprint(obj):
+    """
+    A digest of the source code of a module, class or function, or None if it
+    can't be found.
+    """
+    try:
+        source = inspect.getsource(obj)
+    except (IOError, OSError, TypeError):
+        return None
+
+    return hashlib.sha1(source.encode("utf-8")).hexdigest()
+
+
+def modules_fingerprint(package, names):
+    """
+    A digest of the source code of the named modules of a package, which are
+    imported if need be, or None if any can't be found.
+    """
+    sha1 = hashlib.sha1()
+
+    for name in names:
+        source = source_fingerprint(import_module(package + "." + name))
+        if source is None:
+            return None
+        sha1.update(source.encode("utf-8"))
+
+    return sha1.hexdigest()
+
+
+def agent_fingerprint(agent):
+    """
+    A digest of an agent's code -- the modules of its class and of every base
+    class -- and its attributes, which should be taken before it learns
+    anything. None if the code can't be found or the attributes can't be
+    pickled, so that the agent's runs aren't cached.
+    """
+    sha1 = hashlib.sha1()
+    modules = []
+
+    for cls in type(agent).__mro__:
+        module = inspect.getmodule(cls)
+
+        if cls is object or module in modules:
+            continue
+        modules.append(module)
+
+        source = source_fingerprint(module)
+        if source is None:
+            return None
+        sha1.update(source.encode("utf-8"))
+
+    try:
+        attributes = pickle.dumps(sorted(vars(agent).items()), 2)
+    except (pickle.PicklingError, TypeError, AttributeError):
+        return None
+    sha1.update(attributes)
+
+    return sha1.hexdigest()
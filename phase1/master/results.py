@@ -0,0 +1,137 @@
+"""
+Writers for the simulator's result table.
+
+The table has one row per day and one column per agent. It can be written as
+
+    tsv: tab-separated text (the default)
+    csv: comma-separated text
+    npy: a NumPy .npy file of a 2-D float64 array, column by column: the
+         day, then one column per agent. The column names are written next
+         to it, as a JSON list, to path + COLUMNS_SUFFIX. Load it with
+         numpy.load(path) and take an agent's column with
+         table[:, names.index("FC")]; every column is contiguous.
+
+Rows are written as soon as they are given, so the table is never held in
+memory as text.
+"""
+import csv
+import json
+import sys
+
+
+#: The formats a result table can be written in.
+FORMATS = ["tsv", "csv", "npy"]
+
+#: The suffix of the file of an npy table's column names.
+COLUMNS_SUFFIX = ".columns.json"
+
+
+def open_writer(path, format, agent_ids, num_days):
+    """
+    Opens a writer for a result table.
+
+    Args:
+        path: the file to write to, or "-" for stdout. The npy format needs
+              a file.
+        format: one of FORMATS.
+        agent_ids: the ids of the agents, in the order of the table's columns.
+        num_days: the number of rows the table will have.
+    Returns:
+        A writer with write_row(day, values) and close() methods.
+    """
+    if format == "npy":
+        if path == "-":
+            raise ValueError("The npy format can't be written to stdout")
+        return NpyWriter(path, agent_ids, num_days)
+
+    if format == "tsv":
+        return DelimitedWriter(path, agent_ids, "\t")
+    elif format == "csv":
+        return DelimitedWriter(path, agent_ids, ",")
+
+    raise ValueError("Unknown result format: {}".format(format))
+
+
+class DelimitedWriter(object):
+    """
+    Writes the table as delimited text, one line per day.
+
+    Tab-separated tables are written exactly as the simulator always printed
+    them; comma-separated ones are quoted where needed.
+    """
+
+    #: The size of the buffer for files opened by the writer.
+    BUFFER_SIZE = 1 << 16
+
+    def __init__(self, path, agent_ids, delimiter):
+        if path == "-":
+            self.out = sys.stdout
+        else:
+            self.out = open(path, "w", self.BUFFER_SIZE)
+
+        self.delimiter = delimiter
+
+        if delimiter == "\t":
+            self._write = self._write_tsv
+        else:
+            self._csv = csv.writer(
+                self.out, delimiter=delimiter, lineterminator="\n")
+            self._write = self._csv.writerow
+
+        self._write(
+            ["Day"] + ["{}".format(agent_id) for agent_id in agent_ids])
+
+    def write_row(self, day, values):
+        """
+        Writes the row of the given day (counting from 0).
+        """
+        fields = ["{}".format(day+1)]
+        fields.extend(map("{}".format, values))
+        self._write(fields)
+
+    def close(self):
+        if self.out is sys.stdout:
+            self.out.flush()
+        else:
+            self.out.close()
+
+    def _write_tsv(self, fields):
+        self.out.write(self.delimiter.join(fields))
+        self.out.write("\n")
+
+
+class NpyWriter(object):
+    """
+    Writes the table to a .npy file in column-major order, through a memory
+    map, and its column names to path + COLUMNS_SUFFIX.
+    """
+
+    def __init__(self, path, agent_ids, num_days):
+        from numpy.lib.format import open_memmap
+
+        names = ["Day"] + ["{}".format(agent_id) for agent_id in agent_ids]
+
+        if len(set(names)) != len(names):
+            raise ValueError("The columns' names must be distinct")
+
+        with open(path + COLUMNS_SUFFIX, "w") as columns:
+            json.dump(names, columns)
+            columns.write("\n")
+
+        self.table = open_memmap(
+            path, mode="w+", dtype="<f8", shape=(num_days, len(names)),
+            fortran_order=True)
+        self.rows = 0
+
+    def write_row(self, day, values):
+        """
+        Writes the row of the given day (counting from 0) after the rows
+        already written.
+        """
+        self.table[self.rows, 0] = day+1
+        self.table[self.rows, 1:] = values
+        self.rows += 1
+
+    def close(self):
+        self.table.flush()
+        del self.table
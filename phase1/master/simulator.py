@@ -1,8 +1,16 @@
+import argparse
+import sys
 from collections import OrderedDict
-from random import Random
 
-from ..agents import *
+from ..agents import registry
+from .aggregate import Aggregator, DailyStats
 from .product import Product
+from .result_cache import (
+    ResultCache, agent_fingerprint, modules_fingerprint, run_key,
+    source_fingerprint)
+from .results import FORMATS as RESULT_FORMATS, open_writer
+from .tape import GENERATORS, ProductTape
+from .trace import FORMATS as TRACE_FORMATS, Tracer
 
 
 #: Number of days
@@ -28,11 +36,36 @@ FAIR = (1, 1)
 #: A favorable market ratio.
 FAVORABLE = (3, 1)
 
-#: Debug mode. When True, shows the full trace.
+#: The metrics the adaptive mode can sample seeds until it knows, each a
+#: function of a run's daily_balance.
+METRICS = {
+    "final": lambda daily_balance: daily_balance[-1],
+    "mean": lambda daily_balance: sum(daily_balance)/float(len(daily_balance)),
+    "min": min,
+}
+
+#: The modules that draw each day's product, whose code a cached result
+#: depends on.
+DRAW_MODULES = ["product", "tape", "counter_random", "beta"]
+
+#: The agents simulated by default, as registry specs.
+DEFAULT_AGENTS = [
+    "FC",
+    "HP",
+    "PB:percent_worth=0",
+    "PB:percent_worth=25",
+    "PB:percent_worth=50",
+    "PB:percent_worth=75",
+    "PB:percent_worth=100",
+    #"Agent1234:id=1234",
+]
+
+#: Debug mode. When True, prints the full trace (unless --trace is given).
 DEBUG = False
 
 
-def no_learning_case(agent, market_odds, seed=None):
+def no_learning_case(agent, market_odds, seed=None, tape=None,
+                     tracer=None, generator="random"):
     """
     Given an agent and a seed, simulates agent.
 
@@ -41,79 +74,107 @@ def no_learning_case(agent, market_odds, seed=None):
     Args:
         agent: Agent to simulate.
         seed: seed for the random number generator. If None/default, the system time is used.
+        tape: a ProductTape of the products to replay. If None/default, one is
+              drawn from the seed.
+        tracer: a Tracer to record the simulation to. If None/default, nothing
+                is recorded.
+        generator: the generator to draw the tape with, when it isn't given;
+                   one of GENERATORS.
     """
 
-    rand = Random(seed)
+    if tape is None:
+        tape = ProductTape(seed, NUM_DAYS, market_odds, generator)
 
     agent.balance = INITIAL_MONEY
     daily_balance = []
 
-    debug_print("Seed={}".format(seed))
+    if tracer is not None:
+        tracer.run_start(agent, seed)
 
     for d in xrange(0, NUM_DAYS):
-        debug_print("Day {}".format(d))
-        debug_print("The balance at the beginning of the day is: {}".format(
-            agent.balance))
+        traced = tracer is not None and tracer.sample(d)
+        if traced:
+            tracer.day_start(d, agent.balance)
 
         max_value = min(agent.balance, MAXIMUM_VALUE)
-        value = rand.random()*max_value
-        price = rand.random()*value
+        value = tape.value_draws[d]*max_value
+        price = tape.price_draws[d]*value
 
         #probability the product is in working condition
-        #use the beta distribution
-        prob = rand.betavariate(market_odds[0], market_odds[1])
+        #(drawn from the beta distribution when the tape was made)
+        prob = tape.probs[d]
 
         #is the product *actually* in working condition?
-        draw = rand.random()
-        product_working = draw <= prob
+        product_working = tape.working[d]
 
         prod = Product(value, price)
 
-        debug_print("Product is {}".format(prod))
-        debug_print("The probability of the product being in working condition is {}".format(prob))
+        if traced:
+            tracer.product_offered(d, prod, prob)
 
         will_buy = agent.will_buy(prod, prob)
 
-        if will_buy:
-            debug_print("Agent {} decides to buy it.".format(agent))
+        if traced:
+            tracer.decision(d, agent, will_buy)
+            tracer.outcome(d, product_working)
 
+        if will_buy:
             #withdraw the product's price from the agent's account
             agent.balance -= prod.price
 
             if product_working:
-                debug_print("Good call: the product is in working condition.")
-                debug_print("The agent's profit is: {}.".format(
-                    prod.value - prod.price))
-
                 #deposit the product's value to the agent's account
                 agent.balance += prod.value
-            else:
-                debug_print("Bad call: the product is faulty.")
-                debug_print("The agent loses {}.".format(prod.price))
-
-                #no deposit
-        else:
-            debug_print("Agent {} decides not to buy it.".format(agent))
-
-            if product_working:
-                debug_print("Missed opportunity: the product was in working condition.")
-            else:
-                debug_print("Good call: the product was faulty.")
 
         #deposit the agent's independent earnings
         agent.balance += DAILY_EARNINGS
 
+        if traced:
+            tracer.settled(d)
+
         #record the agent's balance
         daily_balance.append(agent.balance)
 
-        debug_print("Day {}:\t{}".format(d+1, agent.balance))
+        if traced:
+            tracer.balance(d, agent.balance)
+
+    if tracer is not None:
+        tracer.run_end(agent)
 
     return daily_balance
 
 
-def debug_print(text):
-    if DEBUG:
-        print(text)
+def simulate(agent, market_odds, seed, tape, tracer=None):
+    """
+    Runs no_learning_case for one agent of main()'s table.
+    """
+    return no_learning_case(agent, market_odds, seed, tape, tracer)
+
+
+def simulate_in_pool(runs, market_odds, workers):
+    """
+    Runs simulate for every (agent, seed, tape) in runs across a pool of
+    processes.
+
+    The results come back in the order of runs, whichever process finishes
+    first, so the averages are summed in the same order as a serial run.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(workers) as executor:
+        return list(executor.map(
+            simulate,
+            [agent for agent, seed, tape in runs],
+            [market_odds]*len(runs),
+            [seed for agent, seed, tape in runs],
+            [tape for agent, seed, tape in runs]))
+
+
+def make_agents(seed, specs=DEFAULT_AGENTS):
+    """
+    The agents to simulate with the given seed, from their registry specs.
+    """
+    return [registry.make_agent(spec, seed) for spec in specs]
 
 
 def main():
@@ -124,45 +185,510 @@ def main():
 
     market_odds = FAVORABLE
 
-    #The average value on a given day for a given agent.
-    #i.e. averages["FC"][10] to get FC's average on the eleventh day.
-    averages = OrderedDict()
-
-    for seed in seeds:
-        agents = [
-            FlipCoinAgent("FC", seed),
-            HalfProbAgent("HP"),
-            PercentBeliever("PB0", 0),
-            PercentBeliever("PB25", 25),
-            PercentBeliever("PB50", 50),
-            PercentBeliever("PB75", 75),
-            PercentBeliever("PB100", 100),
-            #Agent1234("1234")
-        ]
-        for agent in agents:
-            debug_print("Simulating Agent: {}".format(agent))
-
-            #run the simulation
-            daily_balance = no_learning_case(agent, market_odds, seed)
-
-            if not agent.id in averages:
-                averages[agent.id] = []
-
-            for d in xrange(0, NUM_DAYS):
-                if len(averages[agent.id]) < d+1:
-                    averages[agent.id].append(0)
-                averages[agent.id][d] += daily_balance[d]/len(seeds)
-
-    table_header = "Day"
-    for agent_id in averages.keys():
-        table_header += "\t{}".format(agent_id)
-    print(table_header)
+    parser = argparse.ArgumentParser(
+        description='Run the agent simulation without learning.')
+
+    parser.add_argument(
+        '--engine',
+        choices=['scalar', 'lockstep', 'auction'],
+        default='scalar',
+        help='Simulate one agent at a time (scalar), all agents and seeds '
+             'together with NumPy (lockstep), or all agents bidding against '
+             'each other in one market per seed (auction).')
+
+    parser.add_argument(
+        '--generator',
+        choices=GENERATORS,
+        default='random',
+        help='Draw the products sequentially with random.Random, as always, '
+             'or with a counter-based generator that can draw any day '
+             'directly.')
+
+    parser.add_argument(
+        '--agent',
+        action='append',
+        help='An agent to simulate instead of the default ones, as a name '
+             'and keyword arguments, e.g. PB:percent_worth=75 (see python -m '
+             'phase1.agents.registry). Can be given more than once.')
+
+    parser.add_argument(
+        '--target-width',
+        type=float,
+        help='Keep simulating batches of new seeds for each agent until the '
+             '95%% confidence interval of its --metric is at most this '
+             'fraction of the metric\'s mean wide, e.g. 0.05.')
+
+    parser.add_argument(
+        '--metric',
+        choices=sorted(METRICS),
+        default='final',
+        help='With --target-width, the metric of a run to estimate: the '
+             'final balance, the mean daily balance or the smallest one.')
+
+    parser.add_argument(
+        '--batch',
+        type=int,
+        default=10,
+        help='With --target-width, the number of seeds to add at a time.')
+
+    parser.add_argument(
+        '--max-seeds',
+        type=int,
+        default=1000,
+        help='With --target-width, the most seeds to simulate an agent with.')
+
+    parser.add_argument(
+        '--family',
+        type=int,
+        default=0,
+        help='Also simulate a family of this many PercentBelievers, with '
+             'percents evenly spaced from 0 to 100, all together in one '
+             'pass per seed. Needs NumPy.')
+
+    parser.add_argument(
+        '--days',
+        type=int,
+        help='Simulate this many days instead of {}, in long-horizon mode: '
+             'the products are drawn as they are needed and the balances '
+             'are reduced to --buckets rows.'.format(NUM_DAYS))
+
+    parser.add_argument(
+        '--buckets',
+        type=int,
+        default=1000,
+        help='In long-horizon mode, the number of rows to reduce the days '
+             'to. Each row holds the balance on its last day and the '
+             'smallest, largest and mean balance of its days.')
+
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help='The number of processes to run the scalar simulations in.')
+
+    parser.add_argument(
+        '--cache',
+        help='A directory to cache the result of every scalar simulation '
+             'in. A simulation is only run again when the agent\'s code or '
+             'parameters or the products have changed.')
+
+    parser.add_argument(
+        '--cache-size',
+        type=int,
+        default=1024,
+        help='The size of the --cache directory, in megabytes.')
+
+    parser.add_argument(
+        '--output',
+        default='-',
+        help='The file to write the results to. Defaults to stdout.')
+
+    parser.add_argument(
+        '--output-format',
+        choices=RESULT_FORMATS,
+        default='tsv',
+        help='The format of the results.')
+
+    parser.add_argument(
+        '--stats',
+        action='store_true',
+        help='Also report the standard deviation, 95%% confidence interval '
+             'and 5th, 50th and 95th percentiles of each agent\'s balance.')
+
+    parser.add_argument(
+        '--trace',
+        help='A file to record every simulated day to.')
+
+    parser.add_argument(
+        '--trace-format',
+        choices=TRACE_FORMATS,
+        default='jsonl',
+        help='The format of the trace.')
+
+    parser.add_argument(
+        '--trace-sample',
+        type=float,
+        default=1.0,
+        help='The fraction of days to trace.')
+
+    parser.add_argument(
+        '--trace-seed',
+        type=int,
+        help='Seed the choice of the days to trace. Defaults to the seed of '
+             'each run.')
+
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        help='Time each phase of the simulated days and each agent method, '
+             'and write a summary to stderr.')
+
+    parser.add_argument(
+        '--profile-json',
+        help='With --profile, also write the summary to this file as JSON.')
+
+    parser.add_argument(
+        '--profile-runs',
+        help='With --profile, run every simulation under cProfile and write '
+             'its stats to this directory, as <agent>-<seed>.prof.')
+
+    cmd_args = parser.parse_args()
+    tracer = make_tracer(cmd_args)
+
+    if cmd_args.output_format == 'npy' and cmd_args.output == '-':
+        parser.error('the npy format needs an --output file')
+
+    if (cmd_args.profile_json is not None or
+            cmd_args.profile_runs is not None) and not cmd_args.profile:
+        parser.error('--profile-json and --profile-runs need --profile')
+
+    if cmd_args.profile and (
+            cmd_args.workers > 1 or cmd_args.engine != 'scalar' or
+            cmd_args.cache is not None or cmd_args.days is not None):
+        parser.error('profiling is only supported by the scalar engine in a '
+                     'single process, without the cache or long-horizon '
+                     'mode')
+
+    #the profiler sees the days through the tracer's events, and passes them
+    #on to the tracer
+    profiler = None
+    if cmd_args.profile:
+        from .profiler import Profiler
+        profiler = tracer = Profiler(tracer, cmd_args.profile_runs)
+
+    if tracer is not None and \
+            (cmd_args.workers > 1 or cmd_args.engine != 'scalar'):
+        parser.error('tracing is only supported by the scalar engine in a '
+                     'single process')
+
+    if cmd_args.cache is not None and (
+            cmd_args.engine != 'scalar' or tracer is not None or
+            cmd_args.days is not None):
+        parser.error('only the scalar engine, without tracing or '
+                     'long-horizon mode, can use the cache')
+
+    long_horizon = cmd_args.days is not None
+    if long_horizon and (cmd_args.engine != 'scalar' or tracer is not None):
+        parser.error('long-horizon mode is only supported by the scalar '
+                     'engine, without tracing')
+
+    if cmd_args.target_width is not None and (
+            long_horizon or cmd_args.engine == 'auction'):
+        parser.error('the number of seeds can\'t be adaptive in long-horizon '
+                     'mode or with the auction engine')
+
+    if cmd_args.family > 0 and (long_horizon or cmd_args.engine == 'auction'):
+        parser.error('families are not supported in long-horizon mode or by '
+                     'the auction engine')
+
+    if cmd_args.family > 0:
+        from ..agents import PercentBelieverFamily
+
+    specs = cmd_args.agent or DEFAULT_AGENTS
+    try:
+        agent_ids = [agent.id for agent in make_agents(seeds[0], specs)]
+    except (ValueError, TypeError) as error:
+        parser.error('invalid --agent: {}'.format(error))
+
+    duplicates = sorted(set(
+        agent_id for agent_id in agent_ids if agent_ids.count(agent_id) > 1))
+    if duplicates:
+        parser.error('more than one agent is called {}; give each its own '
+                     'id, e.g. --agent {}:id=...'.format(
+                         ", ".join(duplicates), duplicates[0]))
+
+    cache = None
+    if cmd_args.cache is not None:
+        cache = ResultCache(cmd_args.cache, cmd_args.cache_size << 20)
+
+        #everything else every simulation's result depends on
+        constants = (
+            NUM_DAYS, MAXIMUM_VALUE, INITIAL_MONEY, DAILY_EARNINGS,
+            market_odds, cmd_args.generator,
+            source_fingerprint(no_learning_case),
+            modules_fingerprint(Product.__module__.rpartition(".")[0],
+                                DRAW_MODULES))
+
+    adaptive = cmd_args.target_width is not None
+    if adaptive:
+        batches = seed_batches(seeds, cmd_args.batch, cmd_args.max_seeds)
+    else:
+        batches = [seeds]
+
+    #The statistics of each agent's balance on each day, across seeds.
+    #i.e. aggregator.stats["FC"].mean(10) for FC's average on the eleventh day.
+    aggregator = Aggregator(NUM_DAYS, quantiles=cmd_args.stats)
+
+    #agent id -> DailyStats of the adaptive mode's metric, across seeds
+    metrics = OrderedDict()
+
+    #the ids of the agents whose metric is known well enough
+    stopped = set()
+
+    for batch in batches:
+        #every (agent, seed, tape) simulation to run, in the order of the
+        #table
+        runs = []
+
+        #the result cache key of every run, or None
+        keys = []
+
+        #every (agents, seed, tape) market of the auction engine
+        markets = []
+
+        #every (family, seed, tape) family simulation to run
+        families = []
+
+        for seed in batch:
+            #every agent replays the same products for this seed (long runs
+            #draw them as they go instead)
+            if long_horizon:
+                tape = None
+            else:
+                tape = ProductTape(
+                    seed, NUM_DAYS, market_odds, cmd_args.generator)
+
+            agents = [agent for agent in make_agents(seed, specs)
+                      if agent.id not in stopped]
+            for agent in agents:
+                runs.append((agent, seed, tape))
+
+                if cache is not None:
+                    keys.append(run_key(
+                        agent_fingerprint(agent), seed, constants))
+                else:
+                    keys.append(None)
+            markets.append((agents, seed, tape))
+
+            if cmd_args.family > 0:
+                percents = [index*100.0/max(cmd_args.family - 1, 1)
+                            for index in range(0, cmd_args.family)]
+                families.append((PercentBelieverFamily("PBF", percents),
+                                 seed, tape))
+
+        if long_horizon:
+            write_long_horizon(runs, market_odds, cmd_args)
+            return
+
+        if cmd_args.engine == 'lockstep':
+            from .lockstep import lockstep_case
+            results = lockstep_case(
+                [(agent, tape) for agent, seed, tape in runs])
+        elif cmd_args.engine == 'auction':
+            from .auction import auction_case
+            results = []
+            for agents, seed, tape in markets:
+                results.extend(auction_case(agents, market_odds, seed, tape))
+        elif cmd_args.workers > 1:
+            results = run_in_pool(
+                runs, keys, cache, market_odds, cmd_args.workers)
+        else:
+            results = run_serially(runs, keys, cache, market_odds, tracer)
+
+        for index, daily_balance in enumerate(results):
+            agent, seed, tape = runs[index]
+            aggregator.add(agent.id, daily_balance)
+
+            if adaptive:
+                if agent.id not in metrics:
+                    metrics[agent.id] = DailyStats(1)
+                metrics[agent.id].add(
+                    [METRICS[cmd_args.metric](daily_balance)])
+
+        if families:
+            from .lockstep import family_case
+
+        for family, seed, tape in families:
+            daily_balances = family_case(family, tape)
+
+            for index, member_id in enumerate(family.ids):
+                aggregator.add(member_id, daily_balances[:, index].tolist())
+
+        if adaptive:
+            stopped.update(converged(metrics, cmd_args.target_width))
+
+            if all(agent_id in stopped for agent_id in metrics):
+                break
+
+    writer = open_writer(
+        cmd_args.output, cmd_args.output_format,
+        aggregator.columns(cmd_args.stats), NUM_DAYS)
 
     for d in xrange(0, NUM_DAYS):
-        table_row = "{}".format(d+1)
-        for agent_id in averages.keys():
-            table_row += "\t{}".format(averages[agent_id][d])
-        print(table_row)
+        writer.write_row(d, aggregator.row(d, cmd_args.stats))
+
+    writer.close()
+
+    if cmd_args.trace is not None:
+        tracer.close()
+
+    if profiler is not None:
+        profiler.write_summary(sys.stderr)
+
+        if cmd_args.profile_json is not None:
+            with open(cmd_args.profile_json, 'w') as out:
+                profiler.write_json(out)
+
+    if cache is not None:
+        sys.stderr.write("result cache: {} hits, {} misses\n".format(
+            cache.hits, cache.misses))
+
+    for agent_id, stats in metrics.items():
+        low, high = stats.ci95(0)
+        sys.stderr.write("{}\t{} seeds, {} {:.6g} ({:.6g} to {:.6g})\n".format(
+            agent_id, stats.count, cmd_args.metric, stats.mean(0), low, high))
+
+
+def seed_batches(seeds, batch_size, max_seeds):
+    """
+    The seeds of the adaptive mode, as a generator of lists: first the given
+    seeds, then batches of batch_size new seeds, up to max_seeds in all.
+    """
+    seeds = list(seeds[:max_seeds])
+    yield seeds
+
+    next_seed = max(seeds) + 1
+    count = len(seeds)
+
+    while count < max_seeds:
+        size = min(batch_size, max_seeds - count)
+        yield list(range(next_seed, next_seed + size))
+
+        next_seed += size
+        count += size
+
+
+def converged(metrics, target_width):
+    """
+    The ids of the agents whose metric's 95% confidence interval is at most
+    target_width times the mean's magnitude wide.
+    """
+    agent_ids = []
+
+    for agent_id, stats in metrics.items():
+        if stats.count < 2:
+            continue
+
+        low, high = stats.ci95(0)
+        if high - low <= target_width*abs(stats.mean(0)):
+            agent_ids.append(agent_id)
+
+    return agent_ids
+
+
+def run_serially(runs, keys, cache, market_odds, tracer=None):
+    """
+    Runs simulate for every (agent, seed, tape) in runs, in order, as a
+    generator of their results.
+
+    The results of runs whose key is in the cache are taken from it, and the
+    others are stored in it.
+    """
+    for (agent, seed, tape), key in zip(runs, keys):
+        daily_balance = cache.get(key) if key is not None else None
+
+        if daily_balance is None:
+            daily_balance = simulate(agent, market_odds, seed, tape, tracer)
+
+            if key is not None:
+                cache.put(key, daily_balance)
+
+        yield daily_balance
+
+
+def run_in_pool(runs, keys, cache, market_odds, workers):
+    """
+    Like run_serially, but runs what isn't cached across a pool of processes
+    with simulate_in_pool, and returns a list.
+    """
+    results = [cache.get(key) if key is not None else None for key in keys]
+    pending = [index for index, daily_balance in enumerate(results)
+               if daily_balance is None]
+
+    computed = simulate_in_pool(
+        [runs[index] for index in pending], market_odds, workers)
+
+    for index, daily_balance in zip(pending, computed):
+        results[index] = daily_balance
+
+        if keys[index] is not None:
+            cache.put(keys[index], daily_balance)
+
+    return results
+
+
+def simulate_long(agent, market_odds, seed, num_days, num_buckets,
+                  generator):
+    """
+    Runs long_horizon_case for one agent of main()'s table.
+    """
+    from .horizon import long_horizon_case
+
+    return long_horizon_case(
+        agent, market_odds, seed, num_days, num_buckets, generator)
+
+
+def write_long_horizon(runs, market_odds, cmd_args):
+    """
+    Runs every (agent, seed, tape) in runs in long-horizon mode and writes
+    the table of their reduced balances, averaged across seeds.
+    """
+    from .horizon import BalanceReducer
+
+    arguments = [
+        [agent for agent, seed, tape in runs],
+        [market_odds]*len(runs),
+        [seed for agent, seed, tape in runs],
+        [cmd_args.days]*len(runs),
+        [cmd_args.buckets]*len(runs),
+        [cmd_args.generator]*len(runs)]
+
+    if cmd_args.workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(cmd_args.workers) as executor:
+            results = list(executor.map(simulate_long, *arguments))
+    else:
+        results = map(simulate_long, *arguments)
+
+    #the buckets every reducer divided the days into
+    buckets = BalanceReducer(cmd_args.days, cmd_args.buckets)
+
+    aggregator = Aggregator(buckets.num_buckets, quantiles=cmd_args.stats)
+
+    for index, reducer in enumerate(results):
+        agent, seed, tape = runs[index]
+
+        for suffix, values in reducer.series():
+            aggregator.add("{}{}".format(agent.id, suffix), values)
+
+    writer = open_writer(
+        cmd_args.output, cmd_args.output_format,
+        aggregator.columns(cmd_args.stats), buckets.num_buckets)
+
+    for bucket in xrange(0, buckets.num_buckets):
+        writer.write_row(
+            buckets.last_day(bucket), aggregator.row(bucket, cmd_args.stats))
+
+    writer.close()
+
+
+def make_tracer(cmd_args):
+    """
+    Creates the Tracer asked for on the command line, or a text Tracer on
+    stdout in DEBUG mode. Returns None when nothing should be traced.
+    """
+    if cmd_args.trace is not None:
+        mode = 'wb' if cmd_args.trace_format == 'binary' else 'w'
+        return Tracer(
+            open(cmd_args.trace, mode), cmd_args.trace_format,
+            cmd_args.trace_sample, cmd_args.trace_seed)
+
+    if DEBUG:
+        return Tracer(sys.stdout, 'text', cmd_args.trace_sample,
+                      cmd_args.trace_seed)
+
+    return None
 
 
 #invoke the "main" function when this module is run on its own
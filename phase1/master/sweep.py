@@ -0,0 +1,367 @@
+"""
+Parameter sweeps over the simulator's economy.
+
+A sweep simulates the agents of simulator.make_agents under many settings of
+the simulator's constants, given by a JSON spec, and writes one tidy table
+with a row per setting, agent and seed:
+
+    python -m phase1.master.sweep spec.json --workers 4 --output sweep.tsv
+
+The spec can give a grid of values for each constant, whose every
+combination is a setting, and/or a number of random settings drawn from
+ranges. For example:
+
+    {
+        "grid": {"MAXIMUM_VALUE": [10000, 50000],
+                 "market_odds": ["UNFAVORABLE", "FAIR", "FAVORABLE"]},
+        "random": {"count": 20, "seed": 0,
+                   "INITIAL_MONEY": [500, 5000],
+                   "market_odds": ["FAIR", [2, 1]]},
+        "seeds": [0, 1, 2, 3, 4, 5, 6, 7, 8, 9]
+    }
+
+A random range of two numbers is sampled uniformly (as an int when both are
+ints); the market odds are the name of one of the simulator's markets or a
+pair of numbers, and random ones are picked from the list given. Constants
+that aren't swept keep the simulator's values.
+
+The economy constants don't change the random draws behind the products,
+only how they're scaled, so the settings that share market odds and a
+number of days replay the same ProductTape for each seed. The runs are
+scheduled in groups that share a tape, which is drawn once per group.
+
+With --objective, the sweep races the settings: the seeds are simulated a
+batch at a time, and after each batch the settings whose 95% confidence
+interval of the objective agent's final balance lies entirely below
+another setting's are dropped.
+
+phase2/master/sweep.py sweeps the constants of phase 2's learning case.
+"""
+import argparse
+import csv
+import itertools
+import json
+import sys
+from random import Random
+
+from . import simulator
+from .aggregate import DailyStats
+from .tape import GENERATORS, ProductTape
+
+
+#: The constants a sweep can set, in the order of the table's columns.
+PARAMETERS = ["NUM_DAYS", "MAXIMUM_VALUE", "INITIAL_MONEY", "DAILY_EARNINGS",
+              "market_odds"]
+
+#: The named market odds.
+MARKETS = {
+    "UNFAVORABLE": simulator.UNFAVORABLE,
+    "FAIR": simulator.FAIR,
+    "FAVORABLE": simulator.FAVORABLE,
+}
+
+#: The seeds simulated when the spec gives none.
+DEFAULT_SEEDS = list(range(0, 10))
+
+#: The columns of the table, after the parameters.
+COLUMNS = ["agent", "seed", "final_balance", "min_balance"]
+
+
+def settings(spec):
+    """
+    Every setting of a spec, as a dict of the constants it sets.
+    """
+    for key in spec:
+        if key not in ["grid", "random", "seeds"]:
+            raise ValueError("Unknown spec entry: {}".format(key))
+
+    result = []
+
+    grid = spec.get("grid", {})
+    _check_parameters(grid)
+    if grid:
+        names = sorted(grid)
+        for values in itertools.product(*[grid[name] for name in names]):
+            result.append(dict(zip(names, values)))
+
+    if "random" in spec:
+        ranges = dict(spec["random"])
+        count = ranges.pop("count")
+        rand = Random(ranges.pop("seed", None))
+        _check_parameters(ranges)
+
+        for i in range(0, count):
+            setting = {}
+            for name in sorted(ranges):
+                setting[name] = _draw(rand, name, ranges[name])
+            result.append(setting)
+
+    if not result:
+        result.append({})
+
+    for setting in result:
+        if "market_odds" in setting:
+            setting["market_odds"] = market_odds(setting["market_odds"])
+
+    return result
+
+
+def market_odds(value):
+    """
+    The market odds for the name of a market or a pair of numbers.
+    """
+    if isinstance(value, (list, tuple)) and len(value) == 2:
+        return tuple(value)
+
+    if value in MARKETS:
+        return MARKETS[value]
+
+    raise ValueError("Unknown market odds: {}".format(value))
+
+
+def _check_parameters(parameters):
+    for name in parameters:
+        if name not in PARAMETERS:
+            raise ValueError("{} can't be swept".format(name))
+
+
+def _draw(rand, name, values):
+    if name == "market_odds":
+        return rand.choice(values)
+
+    low, high = values
+    if isinstance(low, int) and isinstance(high, int):
+        return rand.randint(low, high)
+
+    return rand.uniform(low, high)
+
+
+class Constants(object):
+    """
+    Sets the simulator's constants to a setting's values for the length of a
+    with block, so no_learning_case simulates that setting's economy.
+    """
+
+    def __init__(self, setting):
+        self.setting = setting
+        self.saved = None
+
+    def __enter__(self):
+        self.saved = {}
+
+        for name, value in self.setting.items():
+            if name != "market_odds":
+                self.saved[name] = getattr(simulator, name)
+                setattr(simulator, name, value)
+
+        return self
+
+    def __exit__(self, *exc_info):
+        for name, value in self.saved.items():
+            setattr(simulator, name, value)
+
+
+def value_of(setting, name, default_market_odds=simulator.FAVORABLE):
+    """
+    The value of a constant in a setting, or the simulator's if it isn't set.
+    """
+    if name in setting:
+        return setting[name]
+
+    if name == "market_odds":
+        return default_market_odds
+
+    return getattr(simulator, name)
+
+
+def run_group(seed, odds, num_days, generator, group):
+    """
+    Simulates every agent under every setting of a group with the same tape.
+
+    Args:
+        seed: the seed of the tape and the agents.
+        odds: the market odds of every setting of the group.
+        num_days: the number of days of every setting of the group.
+        generator: the generator to draw the tape with.
+        group: a list of (setting index, setting) pairs.
+    Returns:
+        A list of (setting index, agent id, seed, final balance, min balance)
+        rows.
+    """
+    tape = ProductTape(seed, num_days, odds, generator)
+    rows = []
+
+    for index, setting in group:
+        with Constants(setting):
+            for agent in simulator.make_agents(seed):
+                daily_balance = simulator.no_learning_case(
+                    agent, odds, seed, tape)
+
+                rows.append((index, agent.id, seed, daily_balance[-1],
+                             min(daily_balance)))
+
+    return rows
+
+
+def schedule(all_settings, alive, seeds, generator):
+    """
+    Groups the runs of the living settings on the given seeds by the tape
+    they replay, as arguments of run_group.
+    """
+    groups = {}
+
+    for seed in seeds:
+        for index in alive:
+            setting = all_settings[index]
+            key = (seed, value_of(setting, "market_odds"),
+                   value_of(setting, "NUM_DAYS"), generator)
+            groups.setdefault(key, []).append((index, setting))
+
+    return [key + (groups[key],) for key in sorted(groups)]
+
+
+def prune(statistics, alive):
+    """
+    The living settings whose objective's confidence interval doesn't lie
+    entirely below another's.
+    """
+    intervals = {}
+    for index in alive:
+        if statistics[index].count >= 2:
+            intervals[index] = statistics[index].ci95(0)
+
+    if not intervals:
+        return alive
+
+    best_low = max(low for low, high in intervals.values())
+
+    return [index for index in alive
+            if index not in intervals or intervals[index][1] >= best_low]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Sweep the simulator\'s constants.')
+
+    parser.add_argument(
+        'spec',
+        type=argparse.FileType('r'),
+        help='The JSON spec of the settings to simulate.')
+
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help='The number of processes to run the simulations in.')
+
+    parser.add_argument(
+        '--generator',
+        choices=GENERATORS,
+        default='random',
+        help='The generator to draw the products with.')
+
+    parser.add_argument(
+        '--objective',
+        help='Race the settings on the final balance of the agent with this '
+             'id, dropping those that are clearly worse.')
+
+    parser.add_argument(
+        '--batch',
+        type=int,
+        default=2,
+        help='With --objective, the number of seeds to simulate between '
+             'prunings.')
+
+    parser.add_argument(
+        '--output',
+        default='-',
+        help='The file to write the table to. Defaults to stdout.')
+
+    parser.add_argument(
+        '--output-format',
+        choices=['tsv', 'csv'],
+        default='tsv',
+        help='The format of the table.')
+
+    cmd_args = parser.parse_args()
+
+    spec = json.load(cmd_args.spec)
+
+    try:
+        all_settings = settings(spec)
+    except (KeyError, ValueError) as error:
+        parser.error('invalid spec: {}'.format(error))
+
+    seeds = spec.get("seeds", DEFAULT_SEEDS)
+
+    agent_ids = [agent.id for agent in simulator.make_agents(seeds[0])]
+    if cmd_args.objective is not None and \
+            cmd_args.objective not in agent_ids:
+        parser.error('--objective must be the id of an agent: {}'.format(
+            ", ".join(agent_ids)))
+
+    if cmd_args.objective is None:
+        batches = [seeds]
+    else:
+        batches = [seeds[start:start + cmd_args.batch]
+                   for start in range(0, len(seeds), max(cmd_args.batch, 1))]
+
+    out = sys.stdout if cmd_args.output == '-' else open(cmd_args.output, 'w')
+    writer = csv.writer(
+        out, delimiter='\t' if cmd_args.output_format == 'tsv' else ',',
+        lineterminator='\n')
+    writer.writerow(["setting"] + PARAMETERS + COLUMNS)
+
+    alive = list(range(0, len(all_settings)))
+    statistics = [DailyStats(1) for setting in all_settings]
+
+    executor = None
+    if cmd_args.workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        executor = ProcessPoolExecutor(cmd_args.workers)
+
+    try:
+        for batch in batches:
+            groups = schedule(all_settings, alive, batch, cmd_args.generator)
+            if not groups:
+                continue
+
+            arguments = [list(column) for column in zip(*groups)]
+
+            if executor is not None:
+                results = executor.map(run_group, *arguments)
+            else:
+                results = map(run_group, *arguments)
+
+            for rows in results:
+                for index, agent_id, seed, final, lowest in rows:
+                    setting = all_settings[index]
+                    writer.writerow(
+                        [index] +
+                        [_format(value_of(setting, name))
+                         for name in PARAMETERS] +
+                        [agent_id, seed, final, lowest])
+
+                    if agent_id == cmd_args.objective:
+                        statistics[index].add([final])
+
+            if cmd_args.objective is not None:
+                alive = prune(statistics, alive)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    if out is not sys.stdout:
+        out.close()
+
+
+def _format(value):
+    if isinstance(value, tuple):
+        return ":".join("{}".format(part) for part in value)
+
+    return value
+
+
+#invoke the "main" function when this module is run on its own
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+from array import array
+from random import Random
+
+from .counter_random import (
+    PRICE_STREAM, VALUE_STREAM, WORKING_STREAM, CounterRandom)
+
+
+#: The generators a tape can be drawn with: the sequential random.Random the
+#: simulators have always used, or a CounterRandom.
+GENERATORS = ["random", "counter"]
+
+
+class ProductTape(object):
+    """
+    The random draws behind one seed's stream of products, made once so that
+    every agent simulated with that seed can replay them.
+
+    Only a product's value depends on the agent (through its balance), so the
+    tape keeps the raw uniform draws for the value and the price rather than
+    the value and the price themselves. Replaying them as
+
+        value = tape.value_draws[d]*max_value
+        price = tape.price_draws[d]*value
+
+    gives exactly the floats a fresh Random(seed) would have produced.
+
+    When market_odds is None, only the value and price draws are made. This is
+    the learning case, where the product's condition comes from the data.
+
+    With the counter generator, the draws of every day are computed from the
+    seed and the day alone, so a tape can start at any first_day: the tape
+    of days 500 to 999 holds the same draws as the second half of the tape
+    of days 0 to 999. The counter generator's draws differ from random's.
+    """
+
+    def __init__(self, seed, num_days, market_odds=None, generator="random",
+                 first_day=0):
+        self.seed = seed
+        self.market_odds = market_odds
+        self.generator = generator
+        self.first_day = first_day
+
+        #uniform draws that scale the value and the price
+        self.value_draws = array('d')
+        self.price_draws = array('d')
+
+        #probability of working condition, and whether the product works
+        self.probs = array('d')
+        self.working = bytearray()
+
+        if generator == "counter":
+            self._draw_counter(num_days)
+            return
+
+        if generator != "random":
+            raise ValueError("Unknown generator {}".format(generator))
+
+        if first_day != 0:
+            raise ValueError("A random tape must start on the first day")
+
+        rand = Random(seed)
+
+        for d in range(0, num_days):
+            #these must be drawn in the same order as the simulator used to
+            self.value_draws.append(rand.random())
+            self.price_draws.append(rand.random())
+
+            if market_odds is not None:
+                prob = rand.betavariate(market_odds[0], market_odds[1])
+                self.probs.append(prob)
+                self.working.append(rand.random() <= prob)
+
+    def _draw_counter(self, num_days):
+        rand = CounterRandom(self.seed)
+        market_odds = self.market_odds
+
+        for day in range(self.first_day, self.first_day + num_days):
+            self.value_draws.append(rand.random(day, VALUE_STREAM))
+            self.price_draws.append(rand.random(day, PRICE_STREAM))
+
+            if market_odds is not None:
+                prob = rand.betavariate(day, market_odds[0], market_odds[1])
+                self.probs.append(prob)
+                self.working.append(
+                    rand.random(day, WORKING_STREAM) <= prob)
+
+    def __len__(self):
+        return len(self.value_draws)
+
+    def __unicode__(self):
+        return "ProductTape [seed={}, days={}, generator={}]".format(
+            self.seed, len(self), self.generator)
+
+
+def stream_products(seed, market_odds, generator="random"):
+    """
+    The draws a ProductTape(seed, num_days, market_odds, generator) would
+    make, for any number of days, as an endless generator of (value_draw,
+    price_draw, prob, working) tuples. Unlike a tape, it takes no memory per
+    day.
+    """
+    if generator == "counter":
+        rand = CounterRandom(seed)
+        day = 0
+
+        while True:
+            prob = rand.betavariate(day, market_odds[0], market_odds[1])
+            yield (rand.random(day, VALUE_STREAM),
+                   rand.random(day, PRICE_STREAM), prob,
+                   rand.random(day, WORKING_STREAM) <= prob)
+            day += 1
+
+    if generator != "random":
+        raise ValueError("Unknown generator {}".format(generator))
+
+    rand = Random(seed)
+
+    while True:
+        #in the same order as ProductTape
+        value_draw = rand.random()
+        price_draw = rand.random()
+        prob = rand.betavariate(market_odds[0], market_odds[1])
+        yield value_draw, price_draw, prob, rand.random() <= prob
@@ -0,0 +1,250 @@
+"""
+Structured tracing of simulations.
+
+A Tracer records typed events -- a run starting, a day starting, the product
+offered, the agent's decision, the product's condition and the balance at the
+end of the day -- in one of three formats:
+
+    text:   the human readable trace the simulator prints in DEBUG mode
+    jsonl:  one JSON object per event
+    binary: fixed-size little-endian records (see RECORD)
+
+The simulator only touches a tracer when it has been given one, so tracing
+costs nothing when it is off. Tracing can also be limited to a random sample
+of the days.
+"""
+import json
+import struct
+from random import Random
+
+
+#: Event types.
+RUN_START = 0
+DAY_START = 1
+PRODUCT_OFFERED = 2
+DECISION = 3
+OUTCOME = 4
+BALANCE = 5
+
+#: Event names, indexed by event type.
+EVENT_NAMES = [
+    "run_start",
+    "day_start",
+    "product_offered",
+    "decision",
+    "outcome",
+    "balance",
+]
+
+#: The formats a Tracer can write.
+FORMATS = ["text", "jsonl", "binary"]
+
+#: A binary record: the event type, the day and three values. Unused values
+#: are NaN. A run_start record's day is instead the length of the agent's id,
+#: which follows the record encoded as UTF-8, and its first value is the seed.
+RECORD = struct.Struct("<BI3d")
+
+NAN = float("nan")
+
+
+class Tracer(object):
+    """
+    Writes the events of simulated days to a file.
+
+    Args:
+        out: the file to write to. For the binary format it must be opened in
+             binary mode.
+        format: one of FORMATS.
+        sample_rate: the fraction of days to trace.
+        sample_seed: seed for choosing which days to trace. If None/default,
+                     each run's days are chosen with its own seed, so every
+                     agent of a seed is traced on the same days.
+    """
+
+    def __init__(self, out, format="jsonl", sample_rate=1.0, sample_seed=None):
+        if format not in FORMATS:
+            raise ValueError("Unknown trace format: {}".format(format))
+
+        self.out = out
+        self.format = format
+        self.sample_rate = sample_rate
+        self.sample_seed = sample_seed
+        self._sampler = Random(sample_seed)
+
+        #the text format describes an outcome in terms of the decision
+        self._will_buy = False
+        self._prod = None
+
+    def sample(self, day):
+        """
+        Decides whether to trace the given day.
+        """
+        return self.sample_rate >= 1 or \
+            self._sampler.random() < self.sample_rate
+
+    def run_start(self, agent, seed):
+        if self.sample_seed is None:
+            self._sampler.seed(seed)
+
+        if self.format == "text":
+            self.out.write("Simulating Agent: {}\n".format(
+                agent.__unicode__()))
+            self.out.write("Seed={}\n".format(seed))
+        elif self.format == "jsonl":
+            self._write_json(
+                {"event": "run_start", "agent": agent.id, "seed": seed})
+        else:
+            agent_id = u"{}".format(agent.id).encode("utf-8")
+            self.out.write(RECORD.pack(
+                RUN_START, len(agent_id),
+                NAN if seed is None else seed, NAN, NAN))
+            self.out.write(agent_id)
+
+    def day_start(self, day, balance):
+        if self.format == "text":
+            self.out.write("Day {}\n".format(day))
+            self.out.write(
+                "The balance at the beginning of the day is: {}\n".format(
+                    balance))
+        elif self.format == "jsonl":
+            self._write_json(
+                {"event": "day_start", "day": day, "balance": balance})
+        else:
+            self.out.write(RECORD.pack(DAY_START, day, balance, NAN, NAN))
+
+    def product_offered(self, day, prod, prob_of_good=None):
+        """
+        prob_of_good is None in the learning case, where the agent computes
+        the probability itself.
+        """
+        self._prod = prod
+
+        if self.format == "text":
+            self.out.write("Product is {}\n".format(prod.__unicode__()))
+            if prob_of_good is not None:
+                self.out.write(
+                    "The probability of the product being in working "
+                    "condition is {}\n".format(prob_of_good))
+        elif self.format == "jsonl":
+            self._write_json({
+                "event": "product_offered",
+                "day": day,
+                "value": prod.value,
+                "price": prod.price,
+                "prob_of_good": prob_of_good,
+            })
+        else:
+            self.out.write(RECORD.pack(
+                PRODUCT_OFFERED, day, prod.value, prod.price,
+                NAN if prob_of_good is None else prob_of_good))
+
+    def decision(self, day, agent, will_buy):
+        self._will_buy = will_buy
+
+        if self.format == "text":
+            if will_buy:
+                self.out.write("Agent {} decides to buy it.\n".format(
+                    agent.__unicode__()))
+            else:
+                self.out.write("Agent {} decides not to buy it.\n".format(
+                    agent.__unicode__()))
+        elif self.format == "jsonl":
+            self._write_json(
+                {"event": "decision", "day": day, "will_buy": bool(will_buy)})
+        else:
+            self.out.write(RECORD.pack(
+                DECISION, day, 1 if will_buy else 0, NAN, NAN))
+
+    def outcome(self, day, product_working):
+        if self.format == "text":
+            prod = self._prod
+
+            if self._will_buy and product_working:
+                self.out.write(
+                    "Good call: the product is in working condition.\n")
+                self.out.write("The agent's profit is: {}.\n".format(
+                    prod.value - prod.price))
+            elif self._will_buy:
+                self.out.write("Bad call: the product is faulty.\n")
+                self.out.write("The agent loses {}.\n".format(prod.price))
+            elif product_working:
+                self.out.write(
+                    "Missed opportunity: the product was in working "
+                    "condition.\n")
+            else:
+                self.out.write("Good call: the product was faulty.\n")
+        elif self.format == "jsonl":
+            self._write_json({
+                "event": "outcome",
+                "day": day,
+                "working": bool(product_working),
+            })
+        else:
+            self.out.write(RECORD.pack(
+                OUTCOME, day, 1 if product_working else 0, NAN, NAN))
+
+    def settled(self, day):
+        """
+        Nothing is written when a day is settled, before its balance is
+        recorded; see Profiler.
+        """
+
+    def balance(self, day, balance):
+        if self.format == "text":
+            self.out.write("Day {}:\t{}\n".format(day+1, balance))
+        elif self.format == "jsonl":
+            self._write_json(
+                {"event": "balance", "day": day, "balance": balance})
+        else:
+            self.out.write(RECORD.pack(BALANCE, day, balance, NAN, NAN))
+
+    def run_end(self, agent):
+        """
+        Nothing is written at the end of a run; see Profiler.
+        """
+
+    def close(self):
+        self.out.close()
+
+    def _write_json(self, event):
+        self.out.write(json.dumps(event))
+        self.out.write("\n")
+
+
+def read_binary_trace(trace_file):
+    """
+    Reads back a trace written in the binary format.
+
+    Args:
+        trace_file: the trace, opened in binary mode.
+    Returns:
+        A generator of events, as the dicts the jsonl format would have
+        written.
+    """
+    while True:
+        record = trace_file.read(RECORD.size)
+        if len(record) < RECORD.size:
+            return
+
+        event_type, day, first, second, third = RECORD.unpack(record)
+
+        if event_type == RUN_START:
+            agent_id = trace_file.read(day).decode("utf-8")
+            seed = None if first != first else int(first)
+            yield {"event": "run_start", "agent": agent_id, "seed": seed}
+        elif event_type == DAY_START:
+            yield {"event": "day_start", "day": day, "balance": first}
+        elif event_type == PRODUCT_OFFERED:
+            yield {
+                "event": "product_offered",
+                "day": day,
+                "value": first,
+                "price": second,
+                "prob_of_good": None if third != third else third,
+            }
+        elif event_type == DECISION:
+            yield {"event": "decision", "day": day, "will_buy": first == 1}
+        elif event_type == OUTCOME:
+            yield {"event": "outcome", "day": day, "working": first == 1}
+        elif event_type == BALANCE:
+            yield {"event": "balance", "day": day, "balance": first}
@@ -1,17 +1,71 @@
-class Agent(object):
+import functools
+
+from ..master.product import Product
+from .prob_cache import ProbCache
+
+
+#: The methods that change what an agent has learned, after which its
+#: remembered probabilities are stale.
+LEARNING_METHODS = ["learn", "unlearn", "relearn"]
+
+
+class AgentType(type):
+    """
+    The type of agents. It has every learning method of an agent class clear
+    the agent's ProbCache first, so that subclasses never need to.
+    """
+
+    def __new__(mcs, name, bases, namespace):
+        for method in LEARNING_METHODS:
+            if method in namespace:
+                namespace[method] = _clearing_prob_cache(namespace[method])
+
+        return super(AgentType, mcs).__new__(mcs, name, bases, namespace)
+
+
+def _clearing_prob_cache(method):
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        self.clear_prob_cache()
+        return method(self, *args, **kwargs)
+
+    return wrapper
+
+
+#the metaclass syntax differs between Python 2 and 3, but calling it doesn't
+_AgentBase = AgentType("_AgentBase", (object,), {})
+
+
+class Agent(_AgentBase):
     """The base Agent class. All agents should inherit this class.
 
     In the single agent case, this agent receives a product and decides to
     buy the product or not; a one time decision for a given product.
 
-    In the multi-agent case, it receives the product with the newDay method,
-    receives maxBidder's id and bid through currentBidInfo, and when asked,
-    it provides a bid through myBidIs function. It learns the result of the
-    bidding through endOfDay function."""
+    The multi-agent case, where agents bid through new_day, current_bid_info,
+    my_bid_is and end_of_day, is only simulated in phase 1 (see
+    phase1/master/auction.py)."""
+
+    #: Whether the agent implements unlearn and relearn. The simulator then
+    #: has it learn every instance once, and only unlearns each fold's test
+    #: instances, instead of learning every fold's training instances afresh.
+    #: The first seed's agent then runs every seed's fold, so an incremental
+    #: agent must not hold any state that depends on its seed.
+    incremental = False
+
+    #: A short name to select the agent by on the command line, like "PB",
+    #: which is also the start of its id there; see registry.
+    short_name = None
+
+    #: The number of compute_prob_of_good results to remember, for agents
+    #: whose compute_prob_of_good is expensive. 0 remembers none.
+    prob_cache_size = 0
 
     def __init__(this, id, balance=0):
         this.id = id
         this.balance = balance
+        this.prob_cache = None
+        this.enable_prob_cache(this.prob_cache_size)
 
     #DECISION MAKING:
     def will_buy(self, prod, prob_of_good):
@@ -38,9 +92,54 @@ class Agent(object):
         Returns:
             True if the agent decides to buy the product
         """
-        prob = self.compute_prob_of_good(prod_features)
+        if self.prob_cache is not None:
+            prob = self.prob_cache.get(
+                prod_features, self.compute_prob_of_good)
+        else:
+            prob = self.compute_prob_of_good(prod_features)
+
         return self.will_buy(prod, prob)
 
+    def will_buy_batch(self, values, prices, probs_of_good):
+        """
+        The batch counterpart of will_buy: decides, for many products at once,
+        whether to buy each of them.
+
+        This default calls will_buy once per product, in order. Agents that
+        can decide without a Python call per product should override it.
+
+        Args:
+            values: an array of the products' values
+            prices: an array of the products' prices
+            probs_of_good: an array of the probabilities of each product being
+                           in a good condition
+        Returns:
+            A boolean NumPy array, True where the agent would buy the product
+        """
+        import numpy
+
+        will_buy = numpy.empty(len(values), dtype=bool)
+
+        for i in range(0, len(values)):
+            prod = Product(float(values[i]), float(prices[i]))
+            will_buy[i] = self.will_buy(prod, float(probs_of_good[i]))
+
+        return will_buy
+
+    def will_buy_given_features_batch(self, values, prices, features):
+        """
+        The batch counterpart of will_buy_given_features.
+
+        Args:
+            values: an array of the products' values
+            prices: an array of the products' prices
+            features: a sequence of feature lists, one per product
+        Returns:
+            A boolean NumPy array, True where the agent would buy the product
+        """
+        probs = self.compute_prob_of_good_batch(features)
+        return self.will_buy_batch(values, prices, probs)
+
     #LEARN AND PREDICT:
     def learn(self, training_instances):
         """
@@ -54,6 +153,29 @@ class Agent(object):
         """
         raise NotImplementedError
 
+    def unlearn(self, instances):
+        """
+        Forget some of the instances the agent has learned, so that it is as
+        if learn had been called without them. Only needed when incremental
+        is True.
+
+        Args:
+            instances: a list of instances the agent has learned, represented
+                       as in learn.
+        """
+        raise NotImplementedError
+
+    def relearn(self, instances):
+        """
+        Learn instances in addition to those already learned, so that it is as
+        if learn had been called with them too; this undoes unlearn. Only
+        needed when incremental is True.
+
+        Args:
+            instances: a list of instances, represented as in learn.
+        """
+        raise NotImplementedError
+
     def compute_prob_of_good(self, prod_features):
         """
         Given product features, predict whether the product's class is G.
@@ -66,5 +188,45 @@ class Agent(object):
         """
         raise NotImplementedError
 
+    def compute_prob_of_good_batch(self, features):
+        """
+        The batch counterpart of compute_prob_of_good.
+
+        This default calls compute_prob_of_good once per product, in order.
+
+        Args:
+            features: a sequence of feature lists, one per product. These do
+                      not include the class information.
+        Returns:
+            A NumPy array of the probabilities of each product being in a good
+            condition.
+        """
+        import numpy
+
+        probs = numpy.empty(len(features))
+
+        for i in range(0, len(features)):
+            probs[i] = self.compute_prob_of_good(features[i])
+
+        return probs
+
+    #CACHING:
+    def enable_prob_cache(self, size):
+        """
+        Has will_buy_given_features remember the probabilities of the given
+        number of the most recently seen feature lists, instead of calling
+        compute_prob_of_good for every product. The cache is cleared whenever
+        the agent learns, unlearns or relearns.
+
+        Args:
+            size: the number of probabilities to remember. 0 disables the
+                  cache.
+        """
+        self.prob_cache = ProbCache(size) if size > 0 else None
+
+    def clear_prob_cache(self):
+        if getattr(self, 'prob_cache', None) is not None:
+            self.prob_cache.clear()
+
     def __unicode__(self):
         return "Agent [id={}]".format(self.id)
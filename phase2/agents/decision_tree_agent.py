@@ -0,0 +1,76 @@
+import numpy
+
+from .table_agent import TableAgent
+
+
+class DecisionTreeAgent(TableAgent):
+    """
+    A learning agent that fits a shallow decision tree, splitting on the
+    feature with the highest information gain at every node.
+
+    The tree is grown on the counts of every combination of features, so
+    growing it costs nothing per training instance. Every leaf believes a
+    product is good as often as its training products were, with Laplace
+    smoothing.
+    """
+    short_name = "DT"
+
+    def __init__(self, id, max_depth=3, min_leaf=10, balance=0):
+        self.max_depth = max_depth
+        self.min_leaf = min_leaf
+        super(DecisionTreeAgent, self).__init__(id, balance)
+
+    def build_table(self, totals, goods):
+        table = numpy.empty(len(totals))
+        masks = numpy.arange(len(totals))
+
+        self._grow(table, masks, totals, goods, list(range(self.num_features)),
+                   self.max_depth)
+
+        return table
+
+    def _grow(self, table, masks, totals, goods, features, depth):
+        """
+        Fills in the table entries of the feature bitmasks that reach a node.
+        """
+        total = totals[masks].sum()
+        good = goods[masks].sum()
+
+        best = None
+        if depth > 0 and total >= 2*self.min_leaf:
+            best_entropy = _entropy(good, total)
+
+            for feature in features:
+                is_true = (masks >> feature) & 1 == 1
+                true_total = totals[masks[is_true]].sum()
+                false_total = total - true_total
+
+                if true_total < self.min_leaf or false_total < self.min_leaf:
+                    continue
+
+                true_good = goods[masks[is_true]].sum()
+                entropy = (
+                    true_total*_entropy(true_good, true_total) +
+                    false_total*_entropy(good - true_good, false_total)
+                )/total
+
+                if entropy < best_entropy:
+                    best, best_entropy = feature, entropy
+
+        if best is None:
+            table[masks] = (good + 1)/(total + 2)
+            return
+
+        is_true = (masks >> best) & 1 == 1
+        remaining = [feature for feature in features if feature != best]
+
+        self._grow(table, masks[is_true], totals, goods, remaining, depth - 1)
+        self._grow(table, masks[~is_true], totals, goods, remaining, depth - 1)
+
+
+def _entropy(good, total):
+    if total == 0 or good == 0 or good == total:
+        return 0.0
+
+    p = good/total
+    return -p*numpy.log2(p) - (1 - p)*numpy.log2(1 - p)
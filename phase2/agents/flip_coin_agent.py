@@ -11,6 +11,7 @@ class FlipCoinAgent(Agent):
     It ignores any other information, whether it be the price, the value, the
     features, or probabilities.
     """
+    short_name = "FC"
 
     def __init__(self, id, seed=None, balance=0):
         self.random = Random(seed)
@@ -25,8 +26,22 @@ class FlipCoinAgent(Agent):
 
         return False
 
+    def will_buy_batch(self, values, prices, probs_of_good):
+        import numpy
+
+        #flip one coin per product, in order, so the coin flips are the same
+        #ones will_buy would have made
+        random = self.random.random
+        fc = numpy.array([random() for i in range(0, len(values))])
+
+        return fc > 0.5
+
     def learn(self, training_instances):
         pass
 
     def compute_prob_of_good(self, prod_features):
         return 0
+
+    def compute_prob_of_good_batch(self, features):
+        import numpy
+        return numpy.zeros(len(features))
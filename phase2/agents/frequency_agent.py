@@ -0,0 +1,24 @@
+from .table_agent import TableAgent
+
+
+class FrequencyAgent(TableAgent):
+    """
+    A learning agent that believes a product is good as often as products
+    with exactly the same features were good in training.
+
+    Combinations of features that were rarely seen are smoothed towards the
+    overall market condition: smoothing is the number of made-up instances,
+    good as often as the market, added to every combination.
+    """
+    short_name = "FQ"
+
+    def __init__(self, id, smoothing=1.0, balance=0):
+        self.smoothing = smoothing
+        super(FrequencyAgent, self).__init__(id, balance)
+
+    def build_table(self, totals, goods):
+        total = totals.sum()
+        market_condition = goods.sum()/total if total else 0.5
+
+        return (goods + self.smoothing*market_condition) / \
+            (totals + self.smoothing)
@@ -0,0 +1,53 @@
+import numpy
+
+from .table_agent import TableAgent
+
+
+class NaiveBayesAgent(TableAgent):
+    """
+    A learning agent that assumes the features are independent given the
+    product's condition, with Laplace smoothing of the feature counts.
+    """
+    short_name = "NB"
+
+    def __init__(self, id, smoothing=1.0, balance=0):
+        self.smoothing = smoothing
+        super(NaiveBayesAgent, self).__init__(id, balance)
+
+    def build_table(self, totals, goods):
+        bads = totals - goods
+        alpha = self.smoothing
+
+        num_good = goods.sum()
+        num_bad = bads.sum()
+        num_total = num_good + num_bad + 2*alpha
+
+        #the log likelihood of every combination of the features seen so
+        #far, starting with none of them
+        log_good = numpy.array([numpy.log((num_good + alpha)/num_total)])
+        log_bad = numpy.array([numpy.log((num_bad + alpha)/num_total)])
+
+        for feature in range(0, self.num_features):
+            #how often the feature is 'T' among the good and the bad products
+            true_given_good = (
+                true_count(goods, feature) + alpha)/(num_good + 2*alpha)
+            true_given_bad = (
+                true_count(bads, feature) + alpha)/(num_bad + 2*alpha)
+
+            #the bitmasks without the feature, then the same ones with it
+            log_good = numpy.concatenate([
+                log_good + numpy.log(1 - true_given_good),
+                log_good + numpy.log(true_given_good)])
+            log_bad = numpy.concatenate([
+                log_bad + numpy.log(1 - true_given_bad),
+                log_bad + numpy.log(true_given_bad)])
+
+        return 1/(1 + numpy.exp(log_bad - log_good))
+
+
+def true_count(counts, feature):
+    """
+    The sum of the counts of the feature bitmasks where a feature is 'T'.
+    """
+    #bitmask m is at [m >> feature + 1, m >> feature & 1, the bits below]
+    return counts.reshape(-1, 2, 1 << feature)[:, 1, :].sum()
@@ -6,6 +6,8 @@ class PercentBeliever(Agent):
     An agent that always believes that a product is worth only a fixed percent
     of its value. The percent is provided initially.
     """
+    short_name = "PB"
+
     def __init__(self, id, percent_worth, balance=0):
         self.percent_worth = percent_worth
         super(PercentBeliever, self).__init__(id, balance)
@@ -16,8 +18,17 @@ class PercentBeliever(Agent):
 
         return False
 
+    def will_buy_batch(self, values, prices, probs_of_good):
+        import numpy
+        values = numpy.asarray(values)
+        return numpy.asarray(prices) <= (values*self.percent_worth)/100
+
     def learn(self, training_instances):
         pass
 
     def compute_prob_of_good(self, prod_features):
         return 0
+
+    def compute_prob_of_good_batch(self, features):
+        import numpy
+        return numpy.zeros(len(features))
@@ -0,0 +1,73 @@
+"""
+A bounded least-recently-used cache of compute_prob_of_good results.
+
+With a few binary features the same feature lists are offered over and over,
+so an agent whose compute_prob_of_good is expensive can remember its answers.
+Agents opt in by setting prob_cache_size (see Agent); the cache is keyed by
+the features as a tuple.
+"""
+from collections import OrderedDict
+
+
+class ProbCache(object):
+    """
+    Remembers the probabilities of the most recently seen feature lists.
+
+    Args:
+        size: the most feature lists to remember. When a new one is added to
+              a full cache, the least recently used one is forgotten.
+
+    Attributes:
+        hits: the number of lookups that were answered from the cache.
+        misses: the number of lookups that weren't.
+    """
+
+    def __init__(self, size):
+        if size < 1:
+            raise ValueError("A ProbCache must hold at least one entry")
+
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+
+        #features tuple -> probability, least recently used first
+        self.entries = OrderedDict()
+
+    def get(self, prod_features, compute):
+        """
+        The probability of the given features, computed by calling
+        compute(prod_features) only if it isn't remembered.
+        """
+        key = tuple(prod_features)
+        entries = self.entries
+
+        if key in entries:
+            self.hits += 1
+
+            #move it to the most recently used end
+            prob = entries.pop(key)
+            entries[key] = prob
+            return prob
+
+        self.misses += 1
+        prob = compute(prod_features)
+
+        if len(entries) >= self.size:
+            entries.popitem(last=False)
+        entries[key] = prob
+
+        return prob
+
+    def clear(self):
+        """
+        Forgets every probability, but not the hit and miss counts.
+        """
+        self.entries.clear()
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits*1.0/lookups if lookups else 0.0
+
+    def __unicode__(self):
+        return "ProbCache [size={}, hits={}, misses={}]".format(
+            self.size, self.hits, self.misses)
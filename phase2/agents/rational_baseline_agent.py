@@ -5,28 +5,74 @@ class RationalBaselineAgent(Agent):
     """
     A learning agent that only calculates the overall market condition.
     """
+    short_name = "RB"
+
+    incremental = True
+
     def __init__(self, id, balance=0):
         self.market_condition = 0.5
+        self.num_good_products = 0
+        self.num_products = 0
         super(RationalBaselineAgent, self).__init__(id, balance)
 
     def will_buy(self, prod, prob_of_good):
         return prob_of_good*prod.value > prod.price
 
+    def will_buy_batch(self, values, prices, probs_of_good):
+        import numpy
+        values = numpy.asarray(values)
+        return numpy.asarray(probs_of_good)*values > numpy.asarray(prices)
+
     def learn(self, training_instances):
         """
         Computer the market condition based on the number of good products.
         """
+        self.num_good_products = 0
+        self.num_products = 0
+        self.relearn(training_instances)
+
+    def unlearn(self, instances):
+        self.num_good_products -= self._count_good(instances)
+        self.num_products -= len(instances)
+        self._update_market_condition()
+
+    def relearn(self, instances):
+        self.num_good_products += self._count_good(instances)
+        self.num_products += len(instances)
+        self._update_market_condition()
+
+    def _count_good(self, instances):
+        if hasattr(instances, 'conditions'):
+            #bit-packed instances already hold their conditions as 0s and 1s
+            return int(instances.conditions.sum())
 
         num_good_products = 0
 
-        for product in training_instances:
+        for product in instances:
             condition = product[len(product)-1]
 
             if condition == 'G':
                 num_good_products += 1
 
-        self.market_condition = (num_good_products*1.0)/len(training_instances)
+        return num_good_products
+
+    def _update_market_condition(self):
+        #with nothing learned, the market is as likely good as bad
+        if self.num_products == 0:
+            self.market_condition = 0.5
+            return
+
+        self.market_condition = \
+            (self.num_good_products*1.0)/self.num_products
 
     def compute_prob_of_good(self, prod_features):
         # Ignore features; simply return the market condition
         return self.market_condition
+
+    def compute_prob_of_good_batch(self, features):
+        import numpy
+
+        probs = numpy.empty(len(features))
+        probs.fill(self.market_condition)
+
+        return probs
@@ -0,0 +1,136 @@
+import numpy
+
+from ..master.dataset import pack
+from .agent import Agent
+
+
+class TableAgent(Agent):
+    """
+    The base class of agents whose belief about a product depends only on its
+    features.
+
+    Learning counts the training instances, and the good ones among them, for
+    every combination of features, indexed by the combination's bitmask (bit
+    i is set when feature i is 'T'). Subclasses turn those counts into the
+    probability of a good condition for every combination, which is stored
+    in a table, so that compute_prob_of_good is a single lookup.
+
+    Since the counts are sufficient statistics, these agents are incremental.
+    """
+    incremental = True
+
+    #: Only a base class, which the registry doesn't list.
+    abstract = True
+
+    #: The most features a table is built for; it has 2**MAX_FEATURES entries.
+    MAX_FEATURES = 20
+
+    def __init__(self, id, balance=0):
+        self.num_features = 0
+        self.totals = None
+        self.goods = None
+        self.table = None
+        self._table = []
+        super(TableAgent, self).__init__(id, balance)
+
+    def will_buy(self, prod, prob_of_good):
+        return prob_of_good*prod.value > prod.price
+
+    def will_buy_batch(self, values, prices, probs_of_good):
+        values = numpy.asarray(values)
+        return numpy.asarray(probs_of_good)*values > numpy.asarray(prices)
+
+    def learn(self, training_instances):
+        masks, conditions, self.num_features = \
+            masks_and_conditions(training_instances)
+
+        if self.num_features > self.MAX_FEATURES:
+            raise ValueError("{} can use at most {} features".format(
+                type(self).__name__, self.MAX_FEATURES))
+
+        self.totals = numpy.zeros(1 << self.num_features)
+        self.goods = numpy.zeros(1 << self.num_features)
+        self._count(masks, conditions, 1)
+
+    def unlearn(self, instances):
+        masks, conditions, num_features = masks_and_conditions(instances)
+        self._count(masks, conditions, -1)
+
+    def relearn(self, instances):
+        masks, conditions, num_features = masks_and_conditions(instances)
+        self._count(masks, conditions, 1)
+
+    def compute_prob_of_good(self, prod_features):
+        return self._table[features_mask(prod_features)]
+
+    def compute_prob_of_good_batch(self, features):
+        masks = numpy.array([features_mask(row) for row in features],
+                            dtype=numpy.intp)
+        return self.table[masks]
+
+    def build_table(self, totals, goods):
+        """
+        Computes the probability of a good condition for every combination of
+        features.
+
+        Args:
+            totals: an array of the number of training instances with each
+                    feature bitmask.
+            goods: an array of the number of those in good condition.
+        Returns:
+            An array of the probability for every feature bitmask.
+        """
+        raise NotImplementedError
+
+    def _count(self, masks, conditions, sign):
+        size = len(self.totals)
+
+        self.totals += sign*numpy.bincount(masks, minlength=size)
+        self.goods += sign*numpy.bincount(
+            masks, weights=conditions, minlength=size)
+
+        self.table = self.build_table(self.totals, self.goods)
+
+        #a list is faster than an array to index one entry at a time
+        self._table = self.table.tolist()
+
+
+def masks_and_conditions(instances):
+    """
+    The feature bitmasks and conditions of instances, which may be a list of
+    instances or PackedInstances.
+
+    Returns:
+        A (masks, conditions, num_features) tuple, where masks is an intp
+        array and conditions a float array of 1s (good) and 0s (bad).
+    """
+    if hasattr(instances, 'features'):
+        return (instances.features.astype(numpy.intp),
+                instances.conditions.astype(float), instances.num_features)
+
+    masks = []
+    conditions = []
+    num_features = 0
+
+    for instance in instances:
+        mask, condition = pack(instance)
+        masks.append(mask)
+        conditions.append(condition)
+        num_features = len(instance) - 1
+
+    return (numpy.array(masks, dtype=numpy.intp),
+            numpy.array(conditions, dtype=float), num_features)
+
+
+def features_mask(prod_features):
+    """
+    The bitmask of a list of 'T'/'F' features.
+    """
+    mask = 0
+
+    for bit in range(0, len(prod_features)):
+        if prod_features[bit] == 'T':
+            mask |= 1 << bit
+
+    return mask
+
@@ -0,0 +1,154 @@
+"""
+Beta distribution sampling by inverse transform.
+
+random.betavariate draws two gamma variates, each taking several uniform
+draws and a rejection loop. A BetaSampler instead turns exactly one uniform
+draw u into the u-quantile of the distribution, which suits a counter-based
+generator and vectorizes:
+
+- When either shape is 1 the quantile has a closed form: Beta(a, 1) is
+  u**(1/a) and Beta(1, b) is 1 - (1 - u)**(1/b). This covers the market odds
+  the simulators use.
+- Otherwise the quantile is interpolated in a table of the distribution
+  function, computed once per pair of shapes.
+
+tests/test_beta.py checks the samplers against random.betavariate.
+"""
+import math
+from bisect import bisect_right
+
+
+#: The number of points in the table of a sampler without a closed form.
+TABLE_SIZE = 4097
+
+#: (alpha, beta) -> BetaSampler, so that each table is computed once.
+_samplers = {}
+
+
+def beta_sampler(alpha, beta):
+    """
+    The BetaSampler of the given shapes, shared by every caller.
+    """
+    key = (alpha, beta)
+
+    if key not in _samplers:
+        _samplers[key] = BetaSampler(alpha, beta)
+
+    return _samplers[key]
+
+
+class BetaSampler(object):
+    """
+    Draws from Beta(alpha, beta) given uniform draws.
+
+    Args:
+        alpha: the first shape, greater than 0.
+        beta: the second shape, greater than 0.
+        table_size: the number of points of the table of the distribution
+                    function, when there's no closed form.
+    """
+
+    def __init__(self, alpha, beta, table_size=TABLE_SIZE):
+        if alpha <= 0 or beta <= 0:
+            raise ValueError("Beta shapes must be positive, not {}, {}".format(
+                alpha, beta))
+
+        self.alpha = alpha
+        self.beta = beta
+
+        #the points (cdfs[i], xs[i]) of the distribution function, used when
+        #neither shape is 1
+        self.xs = None
+        self.cdfs = None
+
+        if alpha != 1 and beta != 1:
+            self.xs = [i*1.0/(table_size - 1) for i in range(0, table_size)]
+            self.cdfs = [regularized_beta(x, alpha, beta) for x in self.xs]
+
+    def sample(self, u):
+        """
+        The u-quantile of the distribution, for a uniform draw u in [0, 1).
+        """
+        if self.beta == 1:
+            return u**(1.0/self.alpha)
+
+        if self.alpha == 1:
+            return 1 - (1 - u)**(1.0/self.beta)
+
+        cdfs = self.cdfs
+        i = min(max(bisect_right(cdfs, u) - 1, 0), len(cdfs) - 2)
+
+        slope = (self.xs[i + 1] - self.xs[i])/(cdfs[i + 1] - cdfs[i])
+        return slope*(u - cdfs[i]) + self.xs[i]
+
+    def samples(self, us):
+        """
+        The vectorized sample, for a NumPy array of uniform draws. It gives
+        exactly the same floats as sample.
+        """
+        import numpy
+
+        us = numpy.asarray(us, dtype=numpy.float64)
+
+        if self.beta == 1:
+            return us**(1.0/self.alpha)
+
+        if self.alpha == 1:
+            return 1 - (1 - us)**(1.0/self.beta)
+
+        cdfs = numpy.array(self.cdfs)
+        xs = numpy.array(self.xs)
+        i = numpy.clip(numpy.searchsorted(cdfs, us, 'right') - 1,
+                       0, len(cdfs) - 2)
+
+        slope = (xs[i + 1] - xs[i])/(cdfs[i + 1] - cdfs[i])
+        return slope*(us - cdfs[i]) + xs[i]
+
+    def __unicode__(self):
+        return "BetaSampler [alpha={}, beta={}]".format(self.alpha, self.beta)
+
+
+def regularized_beta(x, a, b):
+    """
+    The distribution function of Beta(a, b) at x: the regularized incomplete
+    beta function I_x(a, b), by its continued fraction.
+    """
+    if x <= 0:
+        return 0.0
+    if x >= 1:
+        return 1.0
+
+    log_front = math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b) + \
+        a*math.log(x) + b*math.log(1 - x)
+
+    #the continued fraction converges quickly below the mean
+    if x < (a + 1)/(a + b + 2.0):
+        return math.exp(log_front)*_beta_fraction(x, a, b)/a
+
+    return 1 - math.exp(log_front)*_beta_fraction(1 - x, b, a)/b
+
+
+def _beta_fraction(x, a, b, iterations=300, epsilon=3e-16):
+    #Lentz's method for the continued fraction of I_x(a, b)
+    tiny = 1e-300
+    c = 1.0
+    d = 1 - (a + b)*x/(a + 1)
+    d = 1/(d if abs(d) > tiny else tiny)
+    fraction = d
+
+    for m in range(1, iterations + 1):
+        for numerator in (
+                m*(b - m)*x/((a + 2*m - 1)*(a + 2*m)),
+                -(a + m)*(a + b + m)*x/((a + 2*m)*(a + 2*m + 1))):
+            d = 1 + numerator*d
+            d = 1/(d if abs(d) > tiny else tiny)
+            c = 1 + numerator/c
+            if abs(c) < tiny:
+                c = tiny
+            fraction *= c*d
+
+        if abs(c*d - 1) < epsilon:
+            break
+
+    return fraction
+
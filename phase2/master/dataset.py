@@ -0,0 +1,421 @@
+"""
+A bit-packed form of the product data, with an on-disk cache.
+
+read_instances keeps every cell of the CSV as a Python string. Since every
+feature is either 'T' or 'F' and the condition is either 'G' or 'B', an
+instance fits in an integer bitmask of its features (bit i is set when
+feature i is 'T') plus one condition bit. PackedInstances keeps those in two
+NumPy arrays.
+
+load_packed packs a CSV a chunk of rows at a time into a cache file next to
+it, and memory-maps the cache, so the instances never all need to be in
+memory; later loads map the cache for as long as the CSV is unchanged.
+dump_packed and map_packed write and map the same format anywhere, which lets
+processes share instances through a file instead of pickling them, and a
+PackedWriter writes it a chunk of instances at a time.
+"""
+import csv
+import hashlib
+import os
+import struct
+from itertools import islice
+
+import numpy
+
+
+#: The suffix of the cache file written next to a CSV.
+CACHE_SUFFIX = ".packed"
+
+#: The cache file's header: a magic string, the number of rows and features,
+#: the CSV's mtime, size and SHA-1 digest, and the length of the feature
+#: names that follow it. The arrays start at the next multiple of 8 bytes.
+HEADER = struct.Struct("<4sQIdQ20sI")
+
+MAGIC = b"PKD1"
+
+#: The most features a bitmask can hold.
+MAX_FEATURES = 64
+
+#: The number of rows of a CSV packed at a time.
+CHUNK_ROWS = 1 << 16
+
+
+class PackedInstances(object):
+    """
+    Bit-packed product instances.
+
+    A PackedInstances can stand in for the list read_instances returns: its
+    len() is the number of instances, and indexing or iterating over it gives
+    each instance as the list of 'T'/'F' features followed by 'G'/'B'. Agents
+    that know about it can read the features and conditions arrays directly.
+
+    Attributes:
+        feature_names: the names of the features, in bit order.
+        features: a uint64 array of each instance's feature bitmask.
+        conditions: a uint8 array, 1 where the instance is in good condition.
+    """
+
+    def __init__(self, feature_names, features, conditions):
+        self.feature_names = list(feature_names)
+        self.features = features
+        self.conditions = conditions
+
+    @property
+    def num_features(self):
+        return len(self.feature_names)
+
+    def __len__(self):
+        return len(self.features)
+
+    def __getitem__(self, index):
+        #slicing gives views of the arrays, which stay memory-mapped
+        if isinstance(index, slice):
+            return PackedInstances(
+                self.feature_names, self.features[index],
+                self.conditions[index])
+
+        return unpack(
+            int(self.features[index]), int(self.conditions[index]),
+            self.num_features)
+
+    def __iter__(self):
+        num_features = self.num_features
+
+        for mask, condition in zip(self.features.tolist(),
+                                   self.conditions.tolist()):
+            yield unpack(mask, condition, num_features)
+
+    def select(self, indices):
+        """
+        The instances at the given indices, in that order.
+        """
+        indices = numpy.asarray(indices, dtype=numpy.intp)
+
+        return PackedInstances(
+            self.feature_names, self.features[indices],
+            self.conditions[indices])
+
+    def exclude_range(self, start, end):
+        """
+        The instances outside of the slice [start:end], in order, copied from
+        two slices without building an array of indices.
+        """
+        return PackedInstances(
+            self.feature_names,
+            numpy.concatenate((self.features[:start], self.features[end:])),
+            numpy.concatenate(
+                (self.conditions[:start], self.conditions[end:])))
+
+
+def pack(instance):
+    """
+    Packs a list of 'T'/'F' features followed by 'G'/'B' into a (bitmask,
+    condition) pair.
+    """
+    mask = 0
+
+    for bit in range(0, len(instance) - 1):
+        if instance[bit] == 'T':
+            mask |= 1 << bit
+
+    return mask, 1 if instance[len(instance) - 1] == 'G' else 0
+
+
+def unpack(mask, condition, num_features):
+    """
+    The inverse of pack: the instance as a list of strings.
+    """
+    instance = ['T' if mask >> bit & 1 else 'F'
+                for bit in range(0, num_features)]
+    instance.append('G' if condition else 'B')
+
+    return instance
+
+
+def pack_instances(product_data):
+    """
+    Reads and packs a product CSV file, like read_instances, in memory.
+
+    Args:
+        product_data: the CSV, as an open file.
+    Returns:
+        PackedInstances of the file's instances.
+    """
+    data_reader = csv.reader(product_data)
+
+    #the header names the features, followed by the condition
+    feature_names = next(data_reader)[:-1]
+
+    if len(feature_names) > MAX_FEATURES:
+        raise ValueError("At most {} features can be packed".format(
+            MAX_FEATURES))
+
+    features = []
+    conditions = bytearray()
+
+    for line in data_reader:
+        mask, condition = pack(line)
+        features.append(mask)
+        conditions.append(condition)
+
+    return PackedInstances(
+        feature_names,
+        numpy.array(features, dtype=numpy.uint64),
+        numpy.frombuffer(bytes(conditions), dtype=numpy.uint8))
+
+
+def load_packed(path):
+    """
+    Loads the packed instances of the product CSV at path.
+
+    The first load writes a cache file next to the CSV (path + CACHE_SUFFIX).
+    Every load memory-maps the cache, which later loads use instead of
+    parsing the CSV, as long as the CSV's mtime and size, or failing that its
+    SHA-1 digest, still match.
+    """
+    cache_path = path + CACHE_SUFFIX
+    stat = os.stat(path)
+
+    if os.path.exists(cache_path):
+        header = _read_header(cache_path)
+
+        if header is not None:
+            rows, num_features, mtime, size, digest, names_length = header
+
+            if size == stat.st_size and mtime == stat.st_mtime:
+                return _map_cache(cache_path, rows, names_length)
+
+            if size == stat.st_size and digest == file_digest(path):
+                #the CSV was only touched; remember its new mtime
+                with open(cache_path, "r+b") as cache:
+                    cache.write(HEADER.pack(
+                        MAGIC, rows, num_features, stat.st_mtime, size,
+                        digest, names_length))
+
+                return _map_cache(cache_path, rows, names_length)
+
+    write_cache(cache_path, path, stat, file_digest(path))
+
+    rows, num_features, mtime, size, digest, names_length = \
+        _read_header(cache_path)
+
+    return _map_cache(cache_path, rows, names_length)
+
+
+def fingerprint(instances):
+    """
+    A SHA-1 hex digest of instances, in order, which may be a list of
+    instances or PackedInstances. A StreamedFold is fingerprinted by the fold
+    it gives, not by the content of its file.
+    """
+    sha1 = hashlib.sha1()
+
+    if hasattr(instances, 'features'):
+        sha1.update(numpy.ascontiguousarray(
+            instances.features, dtype="<u8").tobytes())
+        sha1.update(numpy.ascontiguousarray(
+            instances.conditions, dtype=numpy.uint8).tobytes())
+    elif hasattr(instances, 'num_folds'):
+        sha1.update(repr((
+            instances.num_folds, instances.fold, instances.test,
+            instances.salt, instances.limit)).encode("utf-8"))
+    else:
+        for instance in instances:
+            sha1.update(u",".join(instance).encode("utf-8"))
+            sha1.update(b"\n")
+
+    return sha1.hexdigest()
+
+
+class PackedWriter(object):
+    """
+    Writes packed instances to a file of their own, for map_packed, a chunk
+    at a time, so they never all need to be in memory.
+
+    Args:
+        path: the file to write.
+        rows: the number of instances that will be written.
+        feature_names: the names of the features, in bit order.
+        mtime, size, digest: the mtime, size and SHA-1 digest of the CSV, if
+                             the file is its cache.
+    """
+
+    def __init__(self, path, rows, feature_names, mtime=0.0, size=0,
+                 digest=b"\0"*20):
+        if len(feature_names) > MAX_FEATURES:
+            raise ValueError("At most {} features can be packed".format(
+                MAX_FEATURES))
+
+        self.path = path
+        self.rows = rows
+        self.written = 0
+
+        names = u",".join(feature_names).encode("utf-8")
+        self._offset = _data_offset(len(names))
+
+        #write to a temporary file first, so a reader never sees half of it
+        self._temp_path = "{}.{}.tmp".format(path, os.getpid())
+        self._out = open(self._temp_path, "wb")
+
+        self._out.write(HEADER.pack(
+            MAGIC, rows, len(feature_names), mtime, size, digest,
+            len(names)))
+        self._out.write(names)
+        self._out.write(b"\0"*(self._offset - HEADER.size - len(names)))
+
+    def write(self, features, conditions):
+        """
+        Writes the next instances, given as arrays of their feature bitmasks
+        and conditions (1 for good).
+        """
+        if self.written + len(features) > self.rows:
+            raise ValueError("More than {} instances written".format(
+                self.rows))
+
+        #the file holds all the bitmasks, then all the conditions
+        self._out.seek(self._offset + 8*self.written)
+        self._out.write(numpy.asarray(features).astype("<u8").tobytes())
+
+        self._out.seek(self._offset + 8*self.rows + self.written)
+        self._out.write(numpy.asarray(conditions).astype(
+            numpy.uint8).tobytes())
+
+        self.written += len(features)
+
+    def close(self):
+        self._out.close()
+
+        if self.written != self.rows:
+            os.remove(self._temp_path)
+            raise ValueError("{} of {} instances written".format(
+                self.written, self.rows))
+
+        os.rename(self._temp_path, self.path)
+
+
+def dump_packed(instances, path):
+    """
+    Writes packed instances to a file of their own, for map_packed.
+    """
+    _write_packed(path, instances, 0.0, 0, b"\0"*20)
+
+
+def map_packed(path):
+    """
+    Memory-maps the packed instances of a file written by dump_packed, or
+    the cache file of a CSV.
+    """
+    header = _read_header(path)
+    if header is None:
+        raise ValueError("{} holds no packed instances".format(path))
+
+    rows, num_features, mtime, size, digest, names_length = header
+
+    return _map_cache(path, rows, names_length)
+
+
+def write_cache(cache_path, path, stat, digest):
+    """
+    Packs the product CSV at path into a cache file, CHUNK_ROWS rows at a
+    time, for the CSV's os.stat() result and SHA-1 digest.
+    """
+    #the file holds all the bitmasks before the conditions, so count the
+    #rows first
+    with open(path) as product_data:
+        data_reader = csv.reader(product_data)
+        feature_names = next(data_reader)[:-1]
+        rows = sum(1 for line in data_reader)
+
+    writer = PackedWriter(cache_path, rows, feature_names, stat.st_mtime,
+                          stat.st_size, digest)
+
+    with open(path) as product_data:
+        data_reader = csv.reader(product_data)
+
+        #strip out the header line
+        next(data_reader)
+
+        while True:
+            packed = [pack(line) for line in islice(data_reader, CHUNK_ROWS)]
+            if not packed:
+                break
+
+            writer.write(
+                numpy.array([mask for mask, condition in packed],
+                            dtype=numpy.uint64),
+                numpy.array([condition for mask, condition in packed],
+                            dtype=numpy.uint8))
+
+    writer.close()
+
+
+def _write_packed(path, instances, mtime, size, digest):
+    names = u",".join(instances.feature_names).encode("utf-8")
+
+    #write to a temporary file first, so a reader never sees half a cache
+    temp_path = "{}.{}.tmp".format(path, os.getpid())
+
+    with open(temp_path, "wb") as cache:
+        cache.write(HEADER.pack(
+            MAGIC, len(instances), instances.num_features, mtime, size,
+            digest, len(names)))
+        cache.write(names)
+        cache.write(b"\0"*(_data_offset(len(names)) - HEADER.size -
+                           len(names)))
+        cache.write(instances.features.astype("<u8").tobytes())
+        cache.write(instances.conditions.astype(numpy.uint8).tobytes())
+
+    os.rename(temp_path, path)
+
+
+def _read_header(cache_path):
+    with open(cache_path, "rb") as cache:
+        data = cache.read(HEADER.size)
+
+    if len(data) < HEADER.size:
+        return None
+
+    fields = HEADER.unpack(data)
+    if fields[0] != MAGIC:
+        return None
+
+    return fields[1:]
+
+
+def _map_cache(cache_path, rows, names_length):
+    with open(cache_path, "rb") as cache:
+        cache.seek(HEADER.size)
+        names = cache.read(names_length).decode("utf-8")
+
+    feature_names = names.split(u",") if names else []
+    offset = _data_offset(names_length)
+
+    if rows == 0:
+        return PackedInstances(
+            feature_names, numpy.zeros(0, dtype="<u8"),
+            numpy.zeros(0, dtype=numpy.uint8))
+
+    features = numpy.memmap(
+        cache_path, dtype="<u8", mode="r", offset=offset, shape=(rows,))
+    conditions = numpy.memmap(
+        cache_path, dtype=numpy.uint8, mode="r", offset=offset + 8*rows,
+        shape=(rows,))
+
+    return PackedInstances(feature_names, features, conditions)
+
+
+def _data_offset(names_length):
+    return (HEADER.size + names_length + 7)//8*8
+
+
+def file_digest(path):
+    """
+    The SHA-1 digest of a file.
+    """
+    sha1 = hashlib.sha1()
+
+    with open(path, "rb") as product_data:
+        for chunk in iter(lambda: product_data.read(1 << 20), b""):
+            sha1.update(chunk)
+
+    return sha1.digest()
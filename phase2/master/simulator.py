@@ -1,10 +1,18 @@
 import argparse
 import csv
+import sys
 from collections import OrderedDict
 from random import Random, shuffle
 
-from ..agents import *
+from ..agents import registry
+from .aggregate import Aggregator
 from .product import Product
+from .result_cache import (
+    ResultCache, agent_fingerprint, modules_fingerprint, run_key,
+    source_fingerprint)
+from .results import FORMATS as RESULT_FORMATS, open_writer
+from .tape import GENERATORS, ProductTape, stream_draws
+from .trace import FORMATS as TRACE_FORMATS, Tracer
 
 
 #: Number of days
@@ -30,11 +38,23 @@ FAIR = (1, 1)
 #: A favorable market ratio.
 FAVORABLE = (3, 1)
 
-#: Debug mode. When True, shows the full trace.
+#: The modules that draw each day's product, whose code a cached result
+#: depends on.
+DRAW_MODULES = ["product", "tape", "counter_random", "beta"]
+
+#: The agents simulated by default, as registry specs. NB, FQ and DT need
+#: NumPy, so they're only simulated when asked for with --agent.
+DEFAULT_AGENTS = [
+    "RB",
+    #"Agent1234:id=1234",
+]
+
+#: Debug mode. When True, prints the full trace (unless --trace is given).
 DEBUG = False
 
 
-def no_learning_case(agent, market_odds, seed=None):
+def no_learning_case(agent, market_odds, seed=None, tape=None,
+                     tracer=None, generator="random"):
     """
     Given an agent and a seed, simulates agent.
 
@@ -44,98 +64,126 @@ def no_learning_case(agent, market_odds, seed=None):
         agent:  Agent to simulate.
         seed:   Seed for the random number generator. If None/default, the
                 system time is used.
+        tape:   A ProductTape of the products to replay. If None/default, one
+                is drawn from the seed.
+        tracer: A Tracer to record the simulation to. If None/default, nothing
+                is recorded.
+        generator: The generator to draw the tape with, when it isn't given;
+                one of GENERATORS.
     """
 
-    rand = Random(seed)
+    if tape is None:
+        tape = ProductTape(seed, NUM_DAYS, market_odds, generator)
 
     agent.balance = INITIAL_MONEY
     daily_balance = []
 
-    debug_print("Seed={}".format(seed))
+    if tracer is not None:
+        tracer.run_start(agent, seed)
 
     for d in range(0, NUM_DAYS):
-        debug_print("Day {}".format(d))
-        debug_print("The balance at the beginning of the day is: {}".format(
-            agent.balance))
+        traced = tracer is not None and tracer.sample(d)
+        if traced:
+            tracer.day_start(d, agent.balance)
 
         max_value = min(agent.balance, MAXIMUM_VALUE)
-        value = rand.random()*max_value
-        price = rand.random()*value
+        value = tape.value_draws[d]*max_value
+        price = tape.price_draws[d]*value
 
         #probability the product is in working condition
-        #use the beta distribution
-        prob = rand.betavariate(market_odds[0], market_odds[1])
+        #(drawn from the beta distribution when the tape was made)
+        prob = tape.probs[d]
 
         #is the product *actually* in working condition?
-        draw = rand.random()
-        product_working = draw <= prob
+        product_working = tape.working[d]
 
         prod = Product(value, price)
 
-        debug_print("Product is {}".format(prod))
-        debug_print("The probability of the product being in working condition is {}".format(prob))
+        if traced:
+            tracer.product_offered(d, prod, prob)
 
         will_buy = agent.will_buy(prod, prob)
 
-        if will_buy:
-            debug_print("Agent {} decides to buy it.".format(agent))
+        if traced:
+            tracer.decision(d, agent, will_buy)
+            tracer.outcome(d, product_working)
 
+        if will_buy:
             #withdraw the product's price from the agent's account
             agent.balance -= prod.price
 
             if product_working:
-                debug_print("Good call: the product is in working condition.")
-                debug_print("The agent's profit is: {}.".format(
-                    prod.value - prod.price))
-
                 #deposit the product's value to the agent's account
                 agent.balance += prod.value
-            else:
-                debug_print("Bad call: the product is faulty.")
-                debug_print("The agent loses {}.".format(prod.price))
-
-                #no deposit
-        else:
-            debug_print("Agent {} decides not to buy it.".format(agent))
-
-            if product_working:
-                debug_print("Missed opportunity: the product was in working condition.")
-            else:
-                debug_print("Good call: the product was faulty.")
 
         #deposit the agent's independent earnings
         agent.balance += DAILY_EARNINGS
 
+        if traced:
+            tracer.settled(d)
+
         #record the agent's balance
         daily_balance.append(agent.balance)
 
-        debug_print("Day {}:\t{}".format(d+1, agent.balance))
+        if traced:
+            tracer.balance(d, agent.balance)
+
+    if tracer is not None:
+        tracer.run_end(agent)
 
     return daily_balance
 
 
-def learning_case(agent, training_instances, test_instances, seed):
-    rand = Random(seed)
+def learning_case(agent, training_instances, test_instances, seed, tape=None,
+                  tracer=None, generator="random"):
+    """
+    Given an agent, trains it on training_instances and simulates it on
+    test_instances, one product per day.
+
+    Args:
+        agent:  Agent to simulate.
+        training_instances: The instances the agent learns from, or None if
+                the agent has already learned.
+        test_instances: The instances the agent is offered, in order. This
+                may be any iterable, such as a generator reading them from a
+                file.
+        seed:   Seed for the random number generator.
+        tape:   A ProductTape of the products' values and prices to replay. If
+                None/default, they are drawn from the seed as they're needed.
+        tracer: A Tracer to record the simulation to. If None/default, nothing
+                is recorded.
+        generator: The generator to draw the values and prices with, when the
+                tape isn't given; one of GENERATORS.
+    """
+    if tape is None:
+        draws = stream_draws(seed, generator)
+    else:
+        draws = iter(zip(tape.value_draws, tape.price_draws))
 
     agent.balance = INITIAL_MONEY
     daily_balance = []
 
-    debug_print("Seed={}".format(seed))
-    debug_print("Agent is learning...")
-    agent.learn(training_instances)
-    debug_print("Agent has completed the learning process")
+    if tracer is not None:
+        tracer.run_start(agent, seed)
+
+    if training_instances is not None:
+        agent.learn(training_instances)
 
     for index, instance in enumerate(test_instances):
-        debug_print("Product#: {}".format(index+1))
-        debug_print("The balance at the beginning of the day is: {}".format(
-            agent.balance))
+        value_draw, price_draw = next(draws)
+
+        traced = tracer is not None and tracer.sample(index)
+        if traced:
+            tracer.day_start(index, agent.balance)
 
         max_value = min(agent.balance, MAXIMUM_VALUE)
-        value = rand.random()*max_value
-        price = rand.random()*value
+        value = value_draw*max_value
+        price = price_draw*value
 
         prod = Product(value, price)
-        debug_print("Product is {}".format(prod))
+
+        if traced:
+            tracer.product_offered(index, prod)
 
         #determine the working condition
         working_condition = instance[len(instance) - 1]
@@ -147,39 +195,32 @@ def learning_case(agent, training_instances, test_instances, seed):
 
         will_buy = agent.will_buy_given_features(prod, features)
 
-        if will_buy:
-            debug_print("Agent {} decides to buy it.".format(agent))
+        if traced:
+            tracer.decision(index, agent, will_buy)
+            tracer.outcome(index, product_working)
 
+        if will_buy:
             #withdraw the product's price from the agent's account
             agent.balance -= prod.price
 
             if product_working:
-                debug_print("Good call: the product is in working condition.")
-                debug_print("The agent's profit is: {}.".format(
-                    prod.value - prod.price))
-
                 #deposit the product's value to the agent's account
                 agent.balance += prod.value
-            else:
-                debug_print("Bad call: the product is faulty.")
-                debug_print("The agent loses {}.".format(prod.price))
-
-                #no deposit
-        else:
-            debug_print("Agent {} decides not to buy it.".format(agent))
-
-            if product_working:
-                debug_print("Missed opportunity: the product was in working condition.")
-            else:
-                debug_print("Good call: the product was faulty.")
 
         #deposit the agent's independent earnings
         agent.balance += DAILY_EARNINGS
 
+        if traced:
+            tracer.settled(index)
+
         #record the agent's balance
         daily_balance.append(agent.balance)
 
-        debug_print("Day {}:\t{}".format(index+1, agent.balance))
+        if traced:
+            tracer.balance(index, agent.balance)
+
+    if tracer is not None:
+        tracer.run_end(agent)
 
     return daily_balance
 
@@ -197,58 +238,108 @@ def read_instances(product_data):
     return instances
 
 
-def debug_print(text):
-    if DEBUG:
-        print(text)
+def split_fold(all_instances, fold_size, fold):
+    """
+    Divides instances into the test instances of the given fold and the
+    training instances of all the other folds.
 
+    Args:
+        all_instances: a list of instances, or PackedInstances.
+        fold_size: the number of instances in a fold.
+        fold: the index of the fold to test on.
+    Returns:
+        A (test_instances, training_instances) pair.
+    """
+    start = fold_size*fold
+    end = fold_size*(fold + 1)
 
-def main():
-    #TODO: change this to the last four digits of your A#
-    last_four_digits = 1234
+    if hasattr(all_instances, 'exclude_range'):
+        #the test instances are a view of all_instances
+        return (all_instances[start:end],
+                all_instances.exclude_range(start, end))
 
-    seeds = [0, 1, 2, 3, 4, 5, 6, 7, 8, last_four_digits]
-
-    market_odds = FAVORABLE
-
-    #The average value on a given day for a given agent.
-    #i.e. averages["FC"][10] to get FC's average on the eleventh day.
-    averages = OrderedDict()
-
-    for seed in seeds:
-        agents = [
-            FlipCoinAgent("FC", seed),
-            HalfProbAgent("HP"),
-            PercentBeliever("PB0", 0),
-            PercentBeliever("PB25", 25),
-            PercentBeliever("PB50", 50),
-            PercentBeliever("PB75", 75),
-            PercentBeliever("PB100", 100),
-            #Agent1234("1234")
-        ]
-        for agent in agents:
-            debug_print("Simulating Agent: {}".format(agent))
+    return (all_instances[start:end],
+            all_instances[:start] + all_instances[end:])
+
+
+def simulate(agent, training_instances, test_instances, seed, tape,
+             tracer=None):
+    """
+    Runs learning_case for one agent of main()'s table.
+
+    When training_instances is HeldOut instances, the agent is incremental and
+    has learned every instance, so it unlearns the held out instances for the
+    run and relearns them afterwards.
+    """
+    if not isinstance(training_instances, HeldOut):
+        return learning_case(
+            agent, training_instances, test_instances, seed, tape, tracer)
+
+    agent.unlearn(training_instances.instances)
+
+    try:
+        return learning_case(agent, None, test_instances, seed, tape, tracer)
+    finally:
+        agent.relearn(training_instances.instances)
+
+
+class HeldOut(object):
+    """
+    The training instances of a run of an incremental agent that has learned
+    every instance, given as the instances it should not have learned.
+    """
+
+    def __init__(self, instances):
+        self.instances = instances
+
+
+def simulate_in_pool(runs, workers):
+    """
+    Runs simulate for every (agent, training, test, seed, tape) in runs across
+    a pool of processes.
+
+    The results come back in the order of runs, whichever process finishes
+    first, so the averages are summed in the same order as a serial run.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(workers) as executor:
+        return list(executor.map(
+            simulate,
+            [agent for agent, training, test, seed, tape in runs],
+            [training for agent, training, test, seed, tape in runs],
+            [test for agent, training, test, seed, tape in runs],
+            [seed for agent, training, test, seed, tape in runs],
+            [tape for agent, training, test, seed, tape in runs]))
 
-            #run the simulation
-            daily_balance = no_learning_case(agent, market_odds, seed)
 
-            if not agent.id in averages:
-                averages[agent.id] = []
+def simulate_fold(shared_path, fold_size, fold, seed, generator, agents):
+    """
+    Runs learning_case for each of the agents on one fold, with the instances
+    memory-mapped from a file written by dump_packed rather than sent to the
+    process.
+
+    Returns:
+        The daily_balance of each agent, in order.
+    """
+    from .dataset import map_packed
 
-            for d in xrange(0, NUM_DAYS):
-                if len(averages[agent.id]) < d+1:
-                    averages[agent.id].append(0)
-                averages[agent.id][d] += daily_balance[d]/len(seeds)
+    test_instances, training_instances = split_fold(
+        map_packed(shared_path), fold_size, fold)
 
-    table_header = "Day"
-    for agent_id in averages.keys():
-        table_header += "\t{}".format(agent_id)
-    print(table_header)
+    #every agent replays the same products for this seed
+    tape = ProductTape(seed, len(test_instances), generator=generator)
 
-    for d in xrange(0, NUM_DAYS):
-        table_row = "{}".format(d+1)
-        for agent_id in averages.keys():
-            table_row += "\t{}".format(averages[agent_id][d])
-        print(table_row)
+    return [learning_case(agent, training_instances, test_instances, seed,
+                          tape)
+            for agent in agents]
+
+
+def make_agents(seed, specs=DEFAULT_AGENTS):
+    """
+    The agents to simulate with the given seed, from their registry specs.
+    """
+    return [registry.make_agent(spec, seed) for spec in specs]
 
 
 def main():
@@ -265,62 +356,501 @@ def main():
         type=argparse.FileType('r'),
         help='The file to read products from.')
 
+    parser.add_argument(
+        '--agent',
+        action='append',
+        help='An agent to simulate instead of the default ones, as a name '
+             'and keyword arguments, e.g. NB:smoothing=0.5 (see python -m '
+             'phase2.agents.registry). Can be given more than once.')
+
+    parser.add_argument(
+        '--packed',
+        action='store_true',
+        help='Load the products bit-packed, through a cache file written '
+             'next to the product file.')
+
+    parser.add_argument(
+        '--stream',
+        action='store_true',
+        help='Read the products from the file as they are needed instead of '
+             'loading them all, assigning each row to a fold by a hash of '
+             'its row number.')
+
+    parser.add_argument(
+        '--generator',
+        choices=GENERATORS,
+        default='random',
+        help='Draw the products sequentially with random.Random, as always, '
+             'or with a counter-based generator that can draw any day '
+             'directly.')
+
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help='The number of processes to run the simulations in.')
+
+    parser.add_argument(
+        '--parallel-folds',
+        action='store_true',
+        help='With --workers and --packed, simulate each fold in one '
+             'process, which maps the products from a shared file instead '
+             'of receiving every run\'s instances.')
+
+    parser.add_argument(
+        '--shuffle-seed',
+        type=int,
+        help='Seed the shuffle that divides the products into folds, so '
+             'that every invocation uses the same folds.')
+
+    parser.add_argument(
+        '--cache',
+        help='A directory to cache the result of every simulation in. A '
+             'simulation is only run again when the agent\'s code or '
+             'parameters, the products or the folds have changed (without '
+             '--stream, the folds only repeat with --shuffle-seed).')
+
+    parser.add_argument(
+        '--cache-size',
+        type=int,
+        default=1024,
+        help='The size of the --cache directory, in megabytes.')
+
+    parser.add_argument(
+        '--prob-cache',
+        type=int,
+        default=0,
+        help='Have every agent remember the probabilities of this many of '
+             'the most recently seen feature lists. The cache\'s hits and '
+             'misses are reported on stderr when running in one process.')
+
+    parser.add_argument(
+        '--output',
+        default='-',
+        help='The file to write the results to. Defaults to stdout.')
+
+    parser.add_argument(
+        '--output-format',
+        choices=RESULT_FORMATS,
+        default='tsv',
+        help='The format of the results.')
+
+    parser.add_argument(
+        '--stats',
+        action='store_true',
+        help='Also report the standard deviation, 95%% confidence interval '
+             'and 5th, 50th and 95th percentiles of each agent\'s balance.')
+
+    parser.add_argument(
+        '--trace',
+        help='A file to record every simulated day to.')
+
+    parser.add_argument(
+        '--trace-format',
+        choices=TRACE_FORMATS,
+        default='jsonl',
+        help='The format of the trace.')
+
+    parser.add_argument(
+        '--trace-sample',
+        type=float,
+        default=1.0,
+        help='The fraction of days to trace.')
+
+    parser.add_argument(
+        '--trace-seed',
+        type=int,
+        help='Seed the choice of the days to trace. Defaults to the seed of '
+             'each run.')
+
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        help='Time each phase of the simulated days and each agent method, '
+             'and write a summary to stderr.')
+
+    parser.add_argument(
+        '--profile-json',
+        help='With --profile, also write the summary to this file as JSON.')
+
+    parser.add_argument(
+        '--profile-runs',
+        help='With --profile, run every simulation under cProfile and write '
+             'its stats to this directory, as <agent>-<seed>.prof.')
+
     cmd_args = parser.parse_args()
-    all_instances = read_instances(cmd_args.product_data)
-    shuffle(all_instances)
+    tracer = make_tracer(cmd_args)
+
+    if cmd_args.output_format == 'npy' and cmd_args.output == '-':
+        parser.error('the npy format needs an --output file')
+
+    if (cmd_args.profile_json is not None or
+            cmd_args.profile_runs is not None) and not cmd_args.profile:
+        parser.error('--profile-json and --profile-runs need --profile')
+
+    if cmd_args.profile and (
+            cmd_args.workers > 1 or cmd_args.cache is not None):
+        parser.error('profiling is only supported in a single process, '
+                     'without the cache')
+
+    #the profiler sees the days through the tracer's events, and passes them
+    #on to the tracer
+    profiler = None
+    if cmd_args.profile:
+        from .profiler import Profiler
+        profiler = tracer = Profiler(tracer, cmd_args.profile_runs)
+
+    if tracer is not None and cmd_args.workers > 1:
+        parser.error('tracing is only supported in a single process')
+
+    if tracer is not None and cmd_args.cache is not None:
+        parser.error('cached simulations can\'t be traced')
+
+    if cmd_args.parallel_folds and (
+            not cmd_args.packed or cmd_args.stream or cmd_args.workers < 2):
+        parser.error('--parallel-folds needs --packed and --workers, and '
+                     'can\'t be combined with --stream')
+
+    specs = cmd_args.agent or DEFAULT_AGENTS
+    try:
+        agent_ids = [agent.id for agent in make_agents(seeds[0], specs)]
+    except (ValueError, TypeError) as error:
+        parser.error('invalid --agent: {}'.format(error))
+
+    duplicates = sorted(set(
+        agent_id for agent_id in agent_ids if agent_ids.count(agent_id) > 1))
+    if duplicates:
+        parser.error('more than one agent is called {}; give each its own '
+                     'id, e.g. --agent {}:id=...'.format(
+                         ", ".join(duplicates), duplicates[0]))
+
+    if cmd_args.shuffle_seed is not None:
+        shuffle_instances = Random(cmd_args.shuffle_seed).shuffle
+    else:
+        shuffle_instances = shuffle
+
+    cache = None
+    if cmd_args.cache is not None:
+        from .dataset import file_digest, fingerprint
+
+        cache = ResultCache(cmd_args.cache, cmd_args.cache_size << 20)
+
+        #everything else every simulation's result depends on
+        constants = (
+            NUM_DAYS, MAXIMUM_VALUE, INITIAL_MONEY, DAILY_EARNINGS,
+            cmd_args.generator, source_fingerprint(learning_case),
+            modules_fingerprint(Product.__module__.rpartition(".")[0],
+                                DRAW_MODULES),
+            file_digest(cmd_args.product_data.name))
+
+    if cmd_args.stream:
+        from .streaming import StreamedFold, fold_counts
+
+        product_path = cmd_args.product_data.name
+        counts = fold_counts(product_path, len(seeds), packed=cmd_args.packed)
+        all_instances = StreamedFold(
+            product_path, len(seeds), None, False, packed=cmd_args.packed,
+            counts=counts)
+    elif cmd_args.packed:
+        from .dataset import load_packed
+
+        #shuffling the indices draws the same permutation as shuffling the
+        #instances themselves
+        all_instances = load_packed(cmd_args.product_data.name)
+        order = list(range(len(all_instances)))
+        shuffle_instances(order)
+        all_instances = all_instances.select(order)
+    else:
+        all_instances = read_instances(cmd_args.product_data)
+        shuffle_instances(all_instances)
 
     #all_instances contains a randomly ordered list of all training instances
     #each instance is a list -- all features, followed by a 'G' or 'B' to
-    #indicate condition
+    #indicate condition (or PackedInstances of them)
 
-    fold_size = len(all_instances)/len(seeds)
+    if cmd_args.stream:
+        #hashed folds differ a little in size; test on as many instances as
+        #the smallest one has
+        fold_size = min(counts)
+    else:
+        fold_size = len(all_instances)/len(seeds)
 
-    #The average value on a given day for a given agent.
-    #i.e. averages["FC"][10] to get FC's average on the eleventh day.
-    averages = OrderedDict()
+    #every (agent, training, test, seed, tape) simulation to run, in the
+    #order of the table
+    runs = []
+
+    #the result cache key of every run, or None
+    keys = []
+
+    #agent id -> incremental agent that learns every instance, which is the
+    #first seed's agent (incremental agents hold no state that depends on
+    #their seed)
+    incremental_agents = {}
 
     for seed_index, seed in enumerate(seeds):
         #divide instances into test and training data
-        test_instances = []
-        training_instances = []
+        if cmd_args.stream:
+            test_instances = StreamedFold(
+                product_path, len(seeds), seed_index, True, limit=fold_size,
+                packed=cmd_args.packed, counts=counts)
+            training_instances = StreamedFold(
+                product_path, len(seeds), seed_index, False,
+                packed=cmd_args.packed, counts=counts)
+
+            #the whole fold is held out, even what isn't tested
+            held_out = StreamedFold(
+                product_path, len(seeds), seed_index, True,
+                packed=cmd_args.packed, counts=counts)
+        else:
+            test_instances, training_instances = split_fold(
+                all_instances, fold_size, seed_index)
+            held_out = test_instances
 
-        for i in range(len(all_instances)):
-            if (i >= fold_size * seed_index) and \
-                    i < fold_size * (seed_index + 1):
-                test_instances.append(all_instances[i])
-            else:
-                training_instances.append(all_instances[i])
+        #every agent replays the same products for this seed
+        tape = ProductTape(seed, len(test_instances),
+                           generator=cmd_args.generator)
+
+        if cache is not None:
+            test_fingerprint = fingerprint(test_instances)
+            training_fingerprint = fingerprint(training_instances)
+            held_out_fingerprint = fingerprint(held_out)
 
         #initialize the agents we'll be simulating
-        agents = [
-            RationalBaselineAgent("RB"),
-            #Agent1234("1234")
-        ]
+        agents = make_agents(seed, specs)
         for agent in agents:
-            debug_print("Simulating Agent: {}".format(agent))
-
-            #run the simulation
-            daily_balance = learning_case(
-                agent, training_instances, test_instances, seed)
-
-            if not agent.id in averages:
-                averages[agent.id] = []
-
-            for d in range(0, len(test_instances)):
-                if len(averages[agent.id]) < d+1:
-                    averages[agent.id].append(0)
-                averages[agent.id][d] += daily_balance[d]/len(test_instances)
-
-    table_header = "Day"
-    for agent_id in averages.keys():
-        table_header += "\t{}".format(agent_id)
-    print(table_header)
-
-    for d in range(0, len(test_instances)):
-        table_row = "{}".format(d+1)
-        for agent_id in averages.keys():
-            table_row += "\t{}".format(averages[agent_id][d])
-        print(table_row)
+            if cmd_args.prob_cache > 0:
+                agent.enable_prob_cache(cmd_args.prob_cache)
+
+            #the agent is keyed before it learns anything
+            if cache is not None:
+                keys.append(run_key(
+                    agent_fingerprint(agent), seed, constants,
+                    test_fingerprint, agent.incremental,
+                    held_out_fingerprint if agent.incremental
+                    else training_fingerprint))
+            else:
+                keys.append(None)
+
+            if not agent.incremental:
+                runs.append(
+                    (agent, training_instances, test_instances, seed, tape))
+                continue
+
+            #incremental agents learn every instance once, before their first
+            #simulation, and only unlearn each fold's test instances
+            if agent.id not in incremental_agents:
+                incremental_agents[agent.id] = agent
+
+            runs.append((incremental_agents[agent.id], HeldOut(held_out),
+                         test_instances, seed, tape))
+
+    #instrument the agents before they learn anything, so their learning is
+    #timed too; incremental agents take part in several runs, but are only
+    #instrumented once
+    if profiler is not None:
+        for run in runs:
+            profiler.instrument(run[0])
+
+    if cmd_args.parallel_folds:
+        results = run_folds_in_pool(
+            runs, keys, cache, all_instances, seeds, fold_size,
+            cmd_args.generator, cmd_args.workers)
+    elif cmd_args.workers > 1:
+        results = run_in_pool(
+            runs, keys, cache, all_instances, cmd_args.workers)
+    else:
+        results = run_serially(runs, keys, cache, all_instances, tracer)
+
+    #The statistics of each agent's balance on each day, across seeds.
+    #i.e. aggregator.stats["FC"].mean(10) for FC's average on the eleventh day.
+    aggregator = Aggregator(fold_size, quantiles=cmd_args.stats)
+
+    for index, daily_balance in enumerate(results):
+        agent, training_instances, test_instances, seed, tape = runs[index]
+        aggregator.add(agent.id, daily_balance)
+
+    writer = open_writer(
+        cmd_args.output, cmd_args.output_format,
+        aggregator.columns(cmd_args.stats), fold_size)
+
+    for d in range(0, fold_size):
+        writer.write_row(d, aggregator.row(d, cmd_args.stats))
+
+    writer.close()
+
+    if cmd_args.trace is not None:
+        tracer.close()
+
+    if profiler is not None:
+        profiler.write_summary(sys.stderr)
+
+        if cmd_args.profile_json is not None:
+            with open(cmd_args.profile_json, 'w') as out:
+                profiler.write_json(out)
+
+    if cmd_args.prob_cache > 0 and cmd_args.workers == 1:
+        report_prob_caches([run[0] for run in runs], sys.stderr)
+
+    if cache is not None:
+        sys.stderr.write("result cache: {} hits, {} misses\n".format(
+            cache.hits, cache.misses))
+
+
+def run_serially(runs, keys, cache, all_instances, tracer=None):
+    """
+    Runs simulate for every (agent, training, test, seed, tape) in runs, in
+    order, as a generator of their results.
+
+    The results of runs whose key is in the cache are taken from it, and the
+    others are stored in it. Incremental agents learn all_instances before
+    their first run that isn't cached.
+    """
+    learned = set()
+
+    for run, key in zip(runs, keys):
+        daily_balance = cache.get(key) if key is not None else None
+
+        if daily_balance is None:
+            _learn_once(run[0], all_instances, learned)
+            daily_balance = simulate(*run, tracer=tracer)
+
+            if key is not None:
+                cache.put(key, daily_balance)
+
+        yield daily_balance
+
+
+def run_in_pool(runs, keys, cache, all_instances, workers):
+    """
+    Like run_serially, but runs what isn't cached across a pool of processes
+    with simulate_in_pool, and returns a list.
+    """
+    results = [cache.get(key) if key is not None else None for key in keys]
+    pending = [index for index, daily_balance in enumerate(results)
+               if daily_balance is None]
+
+    learned = set()
+    for index in pending:
+        _learn_once(runs[index][0], all_instances, learned)
+
+    computed = simulate_in_pool([runs[index] for index in pending], workers)
+
+    for index, daily_balance in zip(pending, computed):
+        results[index] = daily_balance
+
+        if keys[index] is not None:
+            cache.put(keys[index], daily_balance)
+
+    return results
+
+
+def run_folds_in_pool(runs, keys, cache, all_instances, seeds, fold_size,
+                      generator, workers):
+    """
+    Like run_in_pool, but runs what isn't cached a fold at a time across a
+    pool of processes with simulate_fold.
+
+    all_instances, which must be PackedInstances, are written once to a
+    temporary file that every process memory-maps, so each fold's task is
+    only its index, its seed and its agents, none of which have learned
+    anything yet. Incremental agents are sent too, and learn their fold's
+    training instances like any other agent.
+    """
+    import os
+    import tempfile
+    from concurrent.futures import ProcessPoolExecutor
+
+    from .dataset import dump_packed
+
+    results = [cache.get(key) if key is not None else None for key in keys]
+
+    #fold -> indices of the runs of the fold that aren't cached
+    pending = OrderedDict()
+    for index, daily_balance in enumerate(results):
+        if daily_balance is None:
+            fold = seeds.index(runs[index][3])
+            pending.setdefault(fold, []).append(index)
+
+    if not pending:
+        return results
+
+    handle, shared_path = tempfile.mkstemp(suffix=".packed")
+    os.close(handle)
+
+    try:
+        dump_packed(all_instances, shared_path)
+
+        with ProcessPoolExecutor(workers) as executor:
+            computed = executor.map(
+                simulate_fold,
+                [shared_path for fold in pending],
+                [fold_size for fold in pending],
+                list(pending),
+                [seeds[fold] for fold in pending],
+                [generator for fold in pending],
+                [[runs[index][0] for index in pending[fold]]
+                 for fold in pending])
+
+            for fold, balances in zip(list(pending), computed):
+                for index, daily_balance in zip(pending[fold], balances):
+                    results[index] = daily_balance
+
+                    if keys[index] is not None:
+                        cache.put(keys[index], daily_balance)
+    finally:
+        os.remove(shared_path)
+
+    return results
+
+
+def _learn_once(agent, all_instances, learned):
+    if agent.incremental and id(agent) not in learned:
+        agent.learn(all_instances)
+        learned.add(id(agent))
+
+
+def report_prob_caches(agents, out):
+    """
+    Writes the hits and misses of the agents' ProbCaches, summed by agent id.
+    """
+    #agent id -> [hits, misses]
+    totals = OrderedDict()
+    seen = set()
+
+    for agent in agents:
+        #incremental agents take part in several runs
+        if id(agent) in seen or agent.prob_cache is None:
+            continue
+        seen.add(id(agent))
+
+        counts = totals.setdefault(agent.id, [0, 0])
+        counts[0] += agent.prob_cache.hits
+        counts[1] += agent.prob_cache.misses
+
+    for agent_id, (hits, misses) in totals.items():
+        lookups = hits + misses
+        hit_rate = hits*1.0/lookups if lookups else 0.0
+
+        out.write("{}\tprob cache: {} hits, {} misses ({:.1%})\n".format(
+            agent_id, hits, misses, hit_rate))
+
+
+def make_tracer(cmd_args):
+    """
+    Creates the Tracer asked for on the command line, or a text Tracer on
+    stdout in DEBUG mode. Returns None when nothing should be traced.
+    """
+    if cmd_args.trace is not None:
+        mode = 'wb' if cmd_args.trace_format == 'binary' else 'w'
+        return Tracer(
+            open(cmd_args.trace, mode), cmd_args.trace_format,
+            cmd_args.trace_sample, cmd_args.trace_seed)
+
+    if DEBUG:
+        return Tracer(sys.stdout, 'text', cmd_args.trace_sample,
+                      cmd_args.trace_seed)
+
+    return None
 
 
 #invoke the "main" function when this module is run on its own
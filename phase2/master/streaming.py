@@ -0,0 +1,159 @@
+"""
+Streaming folds of a product file, for data sets larger than memory.
+
+Instead of shuffling every instance and slicing the shuffled list into folds,
+each row of the file is assigned to a fold by hashing its row number, and a
+StreamedFold reads the file each time it is iterated over, keeping only the
+rows of its fold. Memory use does not depend on the size of the file.
+
+A StreamedFold can be given to Agent.learn and to learning_case in place of a
+list of instances: it has a len(), and iterating over it gives each instance
+as a list of 'T'/'F' features followed by 'G'/'B'. It can't be indexed.
+"""
+import csv
+
+
+#: The number of rows a packed file is read in at a time.
+CHUNK_SIZE = 1 << 16
+
+MASK_64 = (1 << 64) - 1
+
+
+def fold_of(row, num_folds, salt=0):
+    """
+    The fold a row belongs to: a SplitMix64 hash of the row number (and the
+    salt), modulo the number of folds.
+    """
+    z = ((row ^ (salt*0x9E3779B97F4A7C15)) + 0x9E3779B97F4A7C15) & MASK_64
+    z = ((z ^ (z >> 30))*0xBF58476D1CE4E5B9) & MASK_64
+    z = ((z ^ (z >> 27))*0x94D049BB133111EB) & MASK_64
+
+    return (z ^ (z >> 31)) % num_folds
+
+
+def folds_of(rows, num_folds, salt=0):
+    """
+    The vectorized fold_of, for a NumPy array of row numbers.
+    """
+    import numpy
+
+    z = rows.astype(numpy.uint64) ^ \
+        numpy.uint64((salt*0x9E3779B97F4A7C15) & MASK_64)
+    z += numpy.uint64(0x9E3779B97F4A7C15)
+    z = (z ^ (z >> numpy.uint64(30)))*numpy.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> numpy.uint64(27)))*numpy.uint64(0x94D049BB133111EB)
+
+    return (z ^ (z >> numpy.uint64(31))) % numpy.uint64(num_folds)
+
+
+def fold_counts(path, num_folds, salt=0, packed=False):
+    """
+    The number of rows in each fold of a product file, in one pass.
+    """
+    counts = [0]*num_folds
+
+    for fold, instance in _rows(path, num_folds, salt, packed):
+        counts[fold] += 1
+
+    return counts
+
+
+class StreamedFold(object):
+    """
+    The instances of a product file that are in one fold (test=True) or in
+    every other fold (test=False), read from the file as they're iterated
+    over.
+
+    Args:
+        path: the product file.
+        num_folds: the number of folds.
+        fold: the index of the fold. With None and test=False, every instance
+              is given.
+        test: whether to give the fold's instances, or all the others.
+        salt: changes which fold every row is assigned to.
+        limit: the most instances to give. Test folds are cut to the same
+               length so every fold has the same number of days.
+        packed: read the instances through the bit-packed cache of
+                load_packed instead of parsing the CSV.
+        counts: the fold_counts of the file, if known, so len() needs no
+                extra pass over it.
+    """
+
+    def __init__(self, path, num_folds, fold, test, salt=0, limit=None,
+                 packed=False, counts=None):
+        self.path = path
+        self.num_folds = num_folds
+        self.fold = fold
+        self.test = test
+        self.salt = salt
+        self.limit = limit
+        self.packed = packed
+        self.counts = counts
+
+    def __iter__(self):
+        given = 0
+
+        for fold, instance in _rows(
+                self.path, self.num_folds, self.salt, self.packed):
+            if (fold == self.fold) != self.test:
+                continue
+
+            if self.limit is not None and given == self.limit:
+                return
+
+            given += 1
+            yield instance
+
+    def __len__(self):
+        if self.counts is None:
+            self.counts = fold_counts(
+                self.path, self.num_folds, self.salt, self.packed)
+
+        if self.fold is None:
+            length = sum(self.counts)
+        elif self.test:
+            length = self.counts[self.fold]
+        else:
+            length = sum(self.counts) - self.counts[self.fold]
+
+        if self.limit is not None:
+            length = min(length, self.limit)
+
+        return length
+
+
+def _rows(path, num_folds, salt, packed):
+    """
+    Every (fold, instance) pair of a product file, in file order.
+    """
+    if packed:
+        for pair in _packed_rows(path, num_folds, salt):
+            yield pair
+        return
+
+    with open(path) as product_data:
+        data_reader = csv.reader(product_data)
+
+        #strip out the header line
+        next(data_reader)
+
+        for row, line in enumerate(data_reader):
+            yield fold_of(row, num_folds, salt), line
+
+
+def _packed_rows(path, num_folds, salt):
+    import numpy
+
+    from .dataset import load_packed, unpack
+
+    instances = load_packed(path)
+    num_features = instances.num_features
+
+    for start in range(0, len(instances), CHUNK_SIZE):
+        end = min(start + CHUNK_SIZE, len(instances))
+        folds = folds_of(numpy.arange(start, end), num_folds, salt)
+
+        for fold, mask, condition in zip(
+                folds.tolist(), instances.features[start:end].tolist(),
+                instances.conditions[start:end].tolist()):
+            yield fold, unpack(mask, condition, num_features)
@@ -0,0 +1,343 @@
+"""
+Parameter sweeps over the simulator's economy, for the learning case.
+
+A sweep simulates the agents of simulator.make_agents on a product file
+under many settings of the simulator's constants, given by a JSON spec, and
+writes one tidy table with a row per setting, agent and seed:
+
+    python -m phase2.master.sweep data.csv spec.json --workers 4
+
+The spec has the format of phase 1's sweeps (see phase1/master/sweep.py),
+but only sweeps the constants the learning case uses: a product's value is
+still drawn and capped by MAXIMUM_VALUE, and the agent starts with
+INITIAL_MONEY and earns DAILY_EARNINGS, but its condition comes from the
+product file, so there are no market odds, and the number of days is the
+number of test instances of a fold. For example:
+
+    {
+        "grid": {"MAXIMUM_VALUE": [10000, 100000]},
+        "random": {"count": 20, "seed": 0, "INITIAL_MONEY": [500, 5000]},
+        "seeds": [0, 1, 2, 3, 4]
+    }
+
+As in the simulator, the products are divided into a fold per seed, and each
+seed's agents are tested on its fold after learning from the others. The
+constants don't change what an agent learns, nor the draws behind the
+products, so each fold's agents learn once and replay the same ProductTape
+under every setting; the runs are scheduled in a group per fold.
+
+With --objective, the sweep races the settings: the folds are simulated a
+batch at a time, and after each batch the settings whose 95% confidence
+interval of the objective agent's final balance lies entirely below
+another setting's are dropped.
+"""
+import argparse
+import csv
+import itertools
+import json
+import sys
+from random import Random
+
+from . import simulator
+from .aggregate import DailyStats
+from .tape import GENERATORS, ProductTape
+
+
+#: The constants a sweep can set, in the order of the table's columns.
+PARAMETERS = ["MAXIMUM_VALUE", "INITIAL_MONEY", "DAILY_EARNINGS"]
+
+#: The seeds simulated when the spec gives none, one per fold.
+DEFAULT_SEEDS = list(range(0, 5))
+
+#: The columns of the table, after the parameters.
+COLUMNS = ["agent", "seed", "final_balance", "min_balance"]
+
+
+def settings(spec):
+    """
+    Every setting of a spec, as a dict of the constants it sets.
+    """
+    for key in spec:
+        if key not in ["grid", "random", "seeds"]:
+            raise ValueError("Unknown spec entry: {}".format(key))
+
+    result = []
+
+    grid = spec.get("grid", {})
+    _check_parameters(grid)
+    if grid:
+        names = sorted(grid)
+        for values in itertools.product(*[grid[name] for name in names]):
+            result.append(dict(zip(names, values)))
+
+    if "random" in spec:
+        ranges = dict(spec["random"])
+        count = ranges.pop("count")
+        rand = Random(ranges.pop("seed", None))
+        _check_parameters(ranges)
+
+        for i in range(0, count):
+            setting = {}
+            for name in sorted(ranges):
+                setting[name] = _draw(rand, ranges[name])
+            result.append(setting)
+
+    if not result:
+        result.append({})
+
+    return result
+
+
+def _check_parameters(parameters):
+    for name in parameters:
+        if name not in PARAMETERS:
+            raise ValueError("{} can't be swept".format(name))
+
+
+def _draw(rand, values):
+    low, high = values
+    if isinstance(low, int) and isinstance(high, int):
+        return rand.randint(low, high)
+
+    return rand.uniform(low, high)
+
+
+class Constants(object):
+    """
+    Sets the simulator's constants to a setting's values for the length of a
+    with block, so learning_case simulates that setting's economy.
+    """
+
+    def __init__(self, setting):
+        self.setting = setting
+        self.saved = None
+
+    def __enter__(self):
+        self.saved = {}
+
+        for name, value in self.setting.items():
+            self.saved[name] = getattr(simulator, name)
+            setattr(simulator, name, value)
+
+        return self
+
+    def __exit__(self, *exc_info):
+        for name, value in self.saved.items():
+            setattr(simulator, name, value)
+
+
+def value_of(setting, name):
+    """
+    The value of a constant in a setting, or the simulator's if it isn't set.
+    """
+    if name in setting:
+        return setting[name]
+
+    return getattr(simulator, name)
+
+
+def run_group(seed, training_instances, test_instances, generator, group):
+    """
+    Simulates every agent under every setting of a group on one fold.
+
+    Args:
+        seed: the seed of the tape and the agents.
+        training_instances: the instances the agents learn from.
+        test_instances: the instances of the fold.
+        generator: the generator to draw the tape with.
+        group: a list of (setting index, setting) pairs.
+    Returns:
+        A list of (setting index, agent id, seed, final balance, min balance)
+        rows.
+    """
+    tape = ProductTape(seed, len(test_instances), generator=generator)
+    agents = simulator.make_agents(seed)
+
+    for agent in agents:
+        agent.learn(training_instances)
+
+    rows = []
+
+    for index, setting in group:
+        with Constants(setting):
+            for agent in agents:
+                daily_balance = simulator.learning_case(
+                    agent, None, test_instances, seed, tape)
+
+                rows.append((index, agent.id, seed, daily_balance[-1],
+                             min(daily_balance)))
+
+    return rows
+
+
+def schedule(all_settings, alive, folds, generator):
+    """
+    The runs of the living settings on the given (seed, training, test)
+    folds, as arguments of run_group: one group per fold.
+    """
+    group = [(index, all_settings[index]) for index in alive]
+    if not group:
+        return []
+
+    return [(seed, training_instances, test_instances, generator, group)
+            for seed, training_instances, test_instances in folds]
+
+
+def prune(statistics, alive):
+    """
+    The living settings whose objective's confidence interval doesn't lie
+    entirely below another's.
+    """
+    intervals = {}
+    for index in alive:
+        if statistics[index].count >= 2:
+            intervals[index] = statistics[index].ci95(0)
+
+    if not intervals:
+        return alive
+
+    best_low = max(low for low, high in intervals.values())
+
+    return [index for index in alive
+            if index not in intervals or intervals[index][1] >= best_low]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Sweep the simulator\'s constants on a product file.')
+
+    parser.add_argument(
+        'product_data',
+        type=argparse.FileType('r'),
+        help='The product file to learn from and test on.')
+
+    parser.add_argument(
+        'spec',
+        type=argparse.FileType('r'),
+        help='The JSON spec of the settings to simulate.')
+
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help='The number of processes to run the simulations in.')
+
+    parser.add_argument(
+        '--generator',
+        choices=GENERATORS,
+        default='random',
+        help='The generator to draw the products\' values and prices with.')
+
+    parser.add_argument(
+        '--shuffle-seed',
+        type=int,
+        default=0,
+        help='Seed the shuffle that divides the products into folds.')
+
+    parser.add_argument(
+        '--objective',
+        help='Race the settings on the final balance of the agent with this '
+             'id, dropping those that are clearly worse.')
+
+    parser.add_argument(
+        '--batch',
+        type=int,
+        default=2,
+        help='With --objective, the number of folds to simulate between '
+             'prunings.')
+
+    parser.add_argument(
+        '--output',
+        default='-',
+        help='The file to write the table to. Defaults to stdout.')
+
+    parser.add_argument(
+        '--output-format',
+        choices=['tsv', 'csv'],
+        default='tsv',
+        help='The format of the table.')
+
+    cmd_args = parser.parse_args()
+
+    spec = json.load(cmd_args.spec)
+
+    try:
+        all_settings = settings(spec)
+    except (KeyError, ValueError) as error:
+        parser.error('invalid spec: {}'.format(error))
+
+    seeds = spec.get("seeds", DEFAULT_SEEDS)
+
+    agent_ids = [agent.id for agent in simulator.make_agents(seeds[0])]
+    if cmd_args.objective is not None and \
+            cmd_args.objective not in agent_ids:
+        parser.error('--objective must be the id of an agent: {}'.format(
+            ", ".join(agent_ids)))
+
+    all_instances = simulator.read_instances(cmd_args.product_data)
+    Random(cmd_args.shuffle_seed).shuffle(all_instances)
+
+    fold_size = len(all_instances)//len(seeds)
+    folds = []
+    for fold, seed in enumerate(seeds):
+        test_instances, training_instances = simulator.split_fold(
+            all_instances, fold_size, fold)
+        folds.append((seed, training_instances, test_instances))
+
+    if cmd_args.objective is None:
+        batches = [folds]
+    else:
+        batches = [folds[start:start + cmd_args.batch]
+                   for start in range(0, len(folds), max(cmd_args.batch, 1))]
+
+    out = sys.stdout if cmd_args.output == '-' else open(cmd_args.output, 'w')
+    writer = csv.writer(
+        out, delimiter='\t' if cmd_args.output_format == 'tsv' else ',',
+        lineterminator='\n')
+    writer.writerow(["setting"] + PARAMETERS + COLUMNS)
+
+    alive = list(range(0, len(all_settings)))
+    statistics = [DailyStats(1) for setting in all_settings]
+
+    executor = None
+    if cmd_args.workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        executor = ProcessPoolExecutor(cmd_args.workers)
+
+    try:
+        for batch in batches:
+            groups = schedule(all_settings, alive, batch, cmd_args.generator)
+            if not groups:
+                continue
+
+            arguments = [list(column) for column in zip(*groups)]
+
+            if executor is not None:
+                results = executor.map(run_group, *arguments)
+            else:
+                results = map(run_group, *arguments)
+
+            for rows in results:
+                for index, agent_id, seed, final, lowest in rows:
+                    setting = all_settings[index]
+                    writer.writerow(
+                        [index] +
+                        [value_of(setting, name) for name in PARAMETERS] +
+                        [agent_id, seed, final, lowest])
+
+                    if agent_id == cmd_args.objective:
+                        statistics[index].add([final])
+
+            if cmd_args.objective is not None:
+                alive = prune(statistics, alive)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    if out is not sys.stdout:
+        out.close()
+
+
+#invoke the "main" function when this module is run on its own
+if __name__ == "__main__":
+    main()
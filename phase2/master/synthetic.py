@@ -0,0 +1,264 @@
+"""
+Synthetic product datasets, of any size, in the format of phase2/data.
+
+    python -m phase2.master.synthetic big.csv --rows 10000000 --features 10
+
+writes a CSV with the F1..Fn,Condition header of the datasets in phase2/data
+(or, with --format packed, a file of packed instances for map_packed). The
+instances are drawn a chunk at a time and written as they're drawn, so the
+memory used doesn't depend on the number of rows, and the same seed always
+gives the same file.
+
+How a product's condition depends on its features is one of DEPENDENCES:
+
+    independent: it doesn't; every feature is 'T' with its own probability.
+    naive_bayes: each feature is 'T' with a probability that depends on the
+                 condition only, as a naive Bayes classifier assumes.
+    interaction: the features are fair coins, and a product is more likely
+                 to be good when exactly one of its first two features is
+                 'T', which no feature says on its own.
+
+--strength, from 0 to 1, sets how much the condition depends on the
+features; either way, a --good-rate fraction of the products are good.
+"""
+import argparse
+import sys
+
+import numpy
+
+from .dataset import MAX_FEATURES, PackedInstances, PackedWriter
+
+
+#: The ways the condition can depend on the features.
+DEPENDENCES = ["independent", "naive_bayes", "interaction"]
+
+#: The formats the instances can be written in.
+FORMATS = ["csv", "packed"]
+
+#: The number of instances drawn at a time.
+CHUNK_ROWS = 1 << 16
+
+
+def feature_names(num_features):
+    """
+    The names of the features: F1, F2, ...
+    """
+    return ["F{}".format(i + 1) for i in range(0, num_features)]
+
+
+def chunks(rows, num_features, good_rate=0.5, dependence="naive_bayes",
+           strength=0.5, seed=0):
+    """
+    Draws synthetic instances, a chunk at a time.
+
+    Args:
+        rows: the number of instances.
+        num_features: the number of features of every instance.
+        good_rate: the probability of an instance being in good condition.
+        dependence: how the condition depends on the features; one of
+                    DEPENDENCES.
+        strength: how much the condition depends on the features, from 0
+                  (not at all) to 1.
+        seed: seed for the random number generator.
+    Returns:
+        A generator of (features, conditions) pairs of arrays: each
+        instance's feature bitmask (bit i is set when feature i is 'T') and
+        its condition (1 for good).
+    """
+    if dependence not in DEPENDENCES:
+        raise ValueError("Unknown dependence: {}".format(dependence))
+
+    if not 0 < num_features <= MAX_FEATURES:
+        raise ValueError("The number of features must be from 1 to {}".format(
+            MAX_FEATURES))
+
+    if dependence == "interaction" and num_features < 2:
+        raise ValueError("Interactions need at least 2 features")
+
+    if not 0 <= good_rate <= 1 or not 0 <= strength <= 1:
+        raise ValueError("The good rate and strength must be from 0 to 1")
+
+    return _draw_chunks(
+        rows, num_features, good_rate, dependence, strength, seed)
+
+
+def _draw_chunks(rows, num_features, good_rate, dependence, strength, seed):
+    random = numpy.random.RandomState(seed)
+
+    #each feature's probability of being 'T', and how much a good condition
+    #raises it (and a bad one lowers it) in the naive Bayes case
+    base = random.uniform(0.3, 0.7, num_features)
+    shift = strength*random.uniform(-0.3, 0.3, num_features)
+
+    #by condition: 0 for bad, 1 for good
+    if dependence == "naive_bayes":
+        odds = numpy.array([base - shift, base + shift])
+    else:
+        odds = numpy.array([base, base])
+
+    #how far an interaction moves the probability of a good condition
+    swing = strength*min(good_rate, 1 - good_rate)
+
+    bits = numpy.arange(num_features, dtype=numpy.uint64)
+
+    for start in range(0, rows, CHUNK_ROWS):
+        size = min(CHUNK_ROWS, rows - start)
+
+        #a row of draws per instance -- its condition's, then its features'
+        #-- so the instances don't depend on the size of a chunk
+        draws = random.random_sample((size, num_features + 1))
+
+        if dependence == "interaction":
+            is_true = draws[:, 1:] < 0.5
+            exactly_one = is_true[:, 0] != is_true[:, 1]
+            prob_of_good = good_rate + swing*numpy.where(exactly_one, 1, -1)
+            conditions = (draws[:, 0] < prob_of_good).astype(numpy.uint8)
+        else:
+            conditions = (draws[:, 0] < good_rate).astype(numpy.uint8)
+            is_true = draws[:, 1:] < odds[conditions]
+
+        features = (is_true.astype(numpy.uint64) << bits).sum(
+            axis=1, dtype=numpy.uint64)
+
+        yield features, conditions
+
+
+def synthetic_instances(rows, num_features, *args, **kwargs):
+    """
+    The instances chunks draws, in memory, as PackedInstances. Takes the
+    same arguments as chunks.
+    """
+    drawn = list(chunks(rows, num_features, *args, **kwargs))
+
+    if not drawn:
+        return PackedInstances(
+            feature_names(num_features), numpy.zeros(0, dtype=numpy.uint64),
+            numpy.zeros(0, dtype=numpy.uint8))
+
+    return PackedInstances(
+        feature_names(num_features),
+        numpy.concatenate([features for features, conditions in drawn]),
+        numpy.concatenate([conditions for features, conditions in drawn]))
+
+
+def write_csv(out, instance_chunks, num_features):
+    """
+    Writes instances as a product CSV, like the ones in phase2/data.
+
+    Args:
+        out: the file to write to, opened in binary mode.
+        instance_chunks: (features, conditions) pairs, as chunks gives them.
+        num_features: the number of features of every instance.
+    """
+    header = ",".join(feature_names(num_features) + ["Condition"])
+    out.write(header.encode("ascii") + b"\r\n")
+
+    bits = numpy.arange(num_features, dtype=numpy.uint64)
+
+    for features, conditions in instance_chunks:
+        #each line as a row of characters: a letter and a comma for each
+        #feature, then the condition and the line break
+        is_true = (features[:, numpy.newaxis] >> bits) & numpy.uint64(1)
+
+        lines = numpy.empty((len(features), 2*num_features + 3), dtype="S1")
+        lines[:, 0:2*num_features:2] = numpy.where(is_true, b"T", b"F")
+        lines[:, 1:2*num_features:2] = b","
+        lines[:, 2*num_features] = numpy.where(conditions, b"G", b"B")
+        lines[:, 2*num_features + 1] = b"\r"
+        lines[:, 2*num_features + 2] = b"\n"
+
+        out.write(lines.tobytes())
+
+
+def write_packed(path, instance_chunks, rows, num_features):
+    """
+    Writes instances as packed instances, for map_packed.
+    """
+    writer = PackedWriter(path, rows, feature_names(num_features))
+
+    for features, conditions in instance_chunks:
+        writer.write(features, conditions)
+
+    writer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Generate a synthetic product dataset.')
+
+    parser.add_argument(
+        'output',
+        help='The file to write the dataset to, or - for stdout (CSV only).')
+
+    parser.add_argument(
+        '--rows',
+        type=int,
+        default=1000,
+        help='The number of products.')
+
+    parser.add_argument(
+        '--features',
+        type=int,
+        default=10,
+        help='The number of features of every product, at most {}.'.format(
+            MAX_FEATURES))
+
+    parser.add_argument(
+        '--good-rate',
+        type=float,
+        default=0.5,
+        help='The fraction of the products that are in good condition.')
+
+    parser.add_argument(
+        '--dependence',
+        choices=DEPENDENCES,
+        default='naive_bayes',
+        help='How the condition depends on the features.')
+
+    parser.add_argument(
+        '--strength',
+        type=float,
+        default=0.5,
+        help='How much the condition depends on the features, from 0 to 1.')
+
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=0,
+        help='Seed for the random number generator.')
+
+    parser.add_argument(
+        '--format',
+        choices=FORMATS,
+        default='csv',
+        help='Write a product CSV, or packed instances for map_packed.')
+
+    cmd_args = parser.parse_args()
+
+    if cmd_args.rows < 0:
+        parser.error('--rows can\'t be negative')
+
+    if cmd_args.format == 'packed' and cmd_args.output == '-':
+        parser.error('packed instances need an output file')
+
+    try:
+        instance_chunks = chunks(
+            cmd_args.rows, cmd_args.features, cmd_args.good_rate,
+            cmd_args.dependence, cmd_args.strength, cmd_args.seed)
+    except ValueError as error:
+        parser.error(str(error))
+
+    if cmd_args.format == 'packed':
+        write_packed(cmd_args.output, instance_chunks, cmd_args.rows,
+                     cmd_args.features)
+    elif cmd_args.output == '-':
+        write_csv(getattr(sys.stdout, 'buffer', sys.stdout), instance_chunks,
+                  cmd_args.features)
+    else:
+        with open(cmd_args.output, 'wb') as out:
+            write_csv(out, instance_chunks, cmd_args.features)
+
+
+#invoke the "main" function when this module is run on its own
+if __name__ == "__main__":
+    main()
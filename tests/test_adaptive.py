@@ -0,0 +1,72 @@
+"""
+Tests of the adaptive seed count.
+"""
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from collections import OrderedDict
+
+from phase1.master import simulator
+from phase1.master.aggregate import DailyStats
+
+
+def metric(values):
+    stats = DailyStats(1)
+    for value in values:
+        stats.add([value])
+
+    return stats
+
+
+class AdaptiveTest(unittest.TestCase):
+
+    def test_seed_batches(self):
+        self.assertEqual(
+            list(simulator.seed_batches([0, 1, 1234], 4, 12)),
+            [[0, 1, 1234], [1235, 1236, 1237, 1238],
+             [1239, 1240, 1241, 1242], [1243]])
+
+        #without room for more, only the given seeds are simulated
+        self.assertEqual(
+            list(simulator.seed_batches([0, 1, 2], 4, 2)), [[0, 1]])
+
+    def test_converged(self):
+        metrics = OrderedDict([
+            ("steady", metric([1000, 1000, 1000])),
+            ("close", metric([1000, 1010, 990, 1005])),
+            ("noisy", metric([100, 5000, 20, 9000])),
+            ("alone", metric([1000])),
+        ])
+
+        self.assertEqual(simulator.converged(metrics, 0.05),
+                         ["steady", "close"])
+        self.assertEqual(simulator.converged(metrics, 0.0), ["steady"])
+        self.assertEqual(simulator.converged(metrics, 100),
+                         ["steady", "close", "noisy"])
+
+    def test_wide_target_stops_after_the_given_seeds(self):
+        directory = tempfile.mkdtemp()
+
+        try:
+            paths = [os.path.join(directory, name)
+                     for name in ["fixed.tsv", "adaptive.tsv"]]
+
+            with open(os.devnull, "w") as devnull:
+                for path, options in zip(paths,
+                                         [[], ["--target-width", "100"]]):
+                    subprocess.check_call(
+                        [sys.executable, "-m", "phase1.master.simulator",
+                         "--output", path] + options,
+                        stderr=devnull)
+
+            with open(paths[0]) as fixed, open(paths[1]) as adaptive:
+                self.assertEqual(adaptive.read(), fixed.read())
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+"""
+Tests of the streaming statistics of daily balances.
+"""
+import math
+import unittest
+from random import Random
+
+from phase1.master.aggregate import Aggregator, DailyStats, QuantileSketch
+
+
+def runs(count, num_days, seed):
+    """
+    Daily balances that stay ints until a random day, like the simulator's.
+    """
+    rand = Random(seed)
+    result = []
+
+    for i in range(0, count):
+        first_purchase = rand.randint(0, num_days)
+        result.append(
+            [1000 + 100*d if d < first_purchase else rand.uniform(0, 5000)
+             for d in range(0, num_days)])
+
+    return result
+
+
+class DailyStatsTest(unittest.TestCase):
+
+    def test_matches_two_pass_statistics(self):
+        balances = runs(20, 5, 0)
+        stats = DailyStats(5)
+        for daily_balance in balances:
+            stats.add(daily_balance)
+
+        for d in range(0, 5):
+            day = [float(daily_balance[d]) for daily_balance in balances]
+            mean = sum(day)/len(day)
+            std = math.sqrt(
+                sum((x - mean)**2 for x in day)/(len(day) - 1))
+
+            self.assertAlmostEqual(stats.mean(d), mean, places=6)
+            self.assertAlmostEqual(stats.std(d), std, places=6)
+
+    def test_int_days_are_reported_as_ints(self):
+        stats = DailyStats(3)
+        stats.add([1100, 1200, 1250.5])
+        stats.add([1100, 1200.5, 1300.0])
+
+        self.assertEqual(stats.mean(0), 1100)
+        self.assertIsInstance(stats.mean(0), int)
+        self.assertIsInstance(stats.mean(1), float)
+        self.assertEqual(stats.mean(1), 1200.25)
+
+    def test_merge_matches_adding_every_run(self):
+        balances = runs(30, 8, 1)
+
+        whole = DailyStats(8, quantiles=True)
+        for daily_balance in balances:
+            whole.add(daily_balance)
+
+        merged = DailyStats(8, quantiles=True)
+        for start in range(0, 30, 7):
+            part = DailyStats(8, quantiles=True)
+            for daily_balance in balances[start:start + 7]:
+                part.add(daily_balance)
+            merged.merge(part)
+
+        self.assertEqual(merged.count, whole.count)
+        self.assertEqual(merged.int_sums, whole.int_sums)
+
+        for d in range(0, 8):
+            self.assertEqual(type(merged.mean(d)), type(whole.mean(d)))
+            self.assertAlmostEqual(merged.mean(d), whole.mean(d), places=6)
+            self.assertAlmostEqual(merged.std(d), whole.std(d), places=6)
+
+            #fewer values than a sketch holds are kept exactly
+            self.assertEqual(merged.quantile(d, 0.5),
+                             whole.quantile(d, 0.5))
+
+
+class QuantileSketchTest(unittest.TestCase):
+
+    def test_quantiles_are_close(self):
+        rand = Random(2)
+        values = [rand.random() for i in range(0, 20000)]
+
+        sketch = QuantileSketch(128)
+        halves = [QuantileSketch(128), QuantileSketch(128)]
+
+        for index, value in enumerate(values):
+            sketch.add(value)
+            halves[index % 2].add(value)
+        halves[0].merge(halves[1])
+
+        for q in [0.05, 0.5, 0.95]:
+            self.assertAlmostEqual(sketch.quantile(q), q, delta=0.03)
+            self.assertAlmostEqual(halves[0].quantile(q), q, delta=0.03)
+
+
+class AggregatorTest(unittest.TestCase):
+
+    def test_rows_follow_columns(self):
+        aggregator = Aggregator(2, quantiles=True)
+        aggregator.add("A", [1100, 1200.0])
+        aggregator.add("B", [1100, 1200])
+        aggregator.add("A", [1100, 1300.0])
+
+        columns = aggregator.columns(True)
+        row = aggregator.row(1, True)
+
+        self.assertEqual(len(row), len(columns))
+        self.assertEqual(columns[0], "A")
+        self.assertEqual(row[0], 1250.0)
+        self.assertEqual(aggregator.row(0), [1100, 1100])
+        self.assertEqual(aggregator.row(1), [1250.0, 1200])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+"""
+Tests of the auction engine for the multi-agent case.
+"""
+import unittest
+
+from phase1.agents import Agent
+from phase1.master import simulator
+from phase1.master.auction import auction_case, run_auction
+from phase1.master.product import Product
+from phase1.master.tape import ProductTape
+
+
+class LimitAgent(Agent):
+    """
+    Bids the least it may up to a limit, or a fixed bid if one is given.
+    """
+
+    def __init__(self, id, limit, bid=None):
+        self.limit = limit
+        self.bid = bid
+        super(LimitAgent, self).__init__(id, 100000)
+
+    def my_bid_is(self):
+        if self.bid is not None:
+            return self.bid
+
+        return self.min_bid if self.min_bid <= self.limit else None
+
+
+class RunAuctionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.prod = Product(1000.0, 100.0)
+
+    def test_highest_limit_wins_just_above_the_next(self):
+        agents = [LimitAgent("A", 300), LimitAgent("B", 500),
+                  LimitAgent("C", 200)]
+
+        winner, bid, rounds = run_auction(
+            agents, self.prod, 0.5, [0, 1, 2], 10)
+
+        self.assertEqual(winner, 1)
+        self.assertTrue(300 < bid <= 310, bid)
+        self.assertGreater(rounds, 1)
+
+    def test_ties_go_to_the_first_asked(self):
+        agents = [LimitAgent("A", 100), LimitAgent("B", 100)]
+
+        self.assertEqual(
+            run_auction(agents, self.prod, 0.5, [1, 0], 10)[:2], (1, 100.0))
+        self.assertEqual(
+            run_auction(agents, self.prod, 0.5, [0, 1], 10)[:2], (0, 100.0))
+
+    def test_no_bids(self):
+        agents = [LimitAgent("A", 50)]
+
+        self.assertEqual(
+            run_auction(agents, self.prod, 0.5, [0], 10), (None, None, 1))
+
+    def test_bids_below_the_least_bid_are_rejected(self):
+        agents = [LimitAgent("A", 0, bid=50.0)]
+
+        self.assertRaises(
+            ValueError, run_auction, agents, self.prod, 0.5, [0], 10)
+
+
+class AuctionCaseTest(unittest.TestCase):
+
+    def test_a_lone_agent_matches_the_single_agent_case(self):
+        for seed in [0, 1]:
+            tape = ProductTape(seed, simulator.NUM_DAYS, simulator.FAIR)
+
+            for agent, fresh_agent in zip(simulator.make_agents(seed),
+                                          simulator.make_agents(seed)):
+                self.assertEqual(
+                    auction_case([agent], simulator.FAIR, seed, tape),
+                    [simulator.no_learning_case(
+                        fresh_agent, simulator.FAIR, seed, tape)])
+
+    def test_balances_add_up(self):
+        tape = ProductTape(2, simulator.NUM_DAYS, simulator.FAVORABLE)
+        agents = simulator.make_agents(2)
+
+        daily_balances = auction_case(agents, simulator.FAVORABLE, 2, tape)
+
+        self.assertEqual(len(daily_balances), len(agents))
+        for agent, daily_balance in zip(agents, daily_balances):
+            self.assertEqual(len(daily_balance), simulator.NUM_DAYS)
+            self.assertEqual(agent.balance, daily_balance[-1])
+            self.assertGreaterEqual(min(daily_balance), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+"""
+Tests of the agents' batch methods against their one-product counterparts.
+"""
+import csv
+import os
+import unittest
+
+from phase1.agents import registry as registry1
+from phase1.master.product import Product
+from phase2.agents import registry as registry2
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+PRODUCT_PATH = os.path.join(
+    os.path.dirname(__file__), os.pardir, "phase2", "data",
+    "five_feats_25_cd.csv")
+
+#: The arguments of the agents whose constructors need some.
+ARGUMENTS = {"PB": "percent_worth=75"}
+
+
+def make_agents(registry):
+    """
+    Two identical agents of every class of a registry, one to decide in
+    batches and one product at a time.
+    """
+    pairs = []
+
+    for entry in registry.entries():
+        spec = entry.short_name
+        if spec in ARGUMENTS:
+            spec = "{}:{}".format(spec, ARGUMENTS[spec])
+
+        pairs.append((registry.make_agent(spec, 0),
+                      registry.make_agent(spec, 0)))
+
+    return pairs
+
+
+@unittest.skipIf(numpy is None, "NumPy is not installed")
+class BatchTest(unittest.TestCase):
+
+    def setUp(self):
+        rand = numpy.random.RandomState(0)
+
+        self.values = rand.uniform(0, 50000, 500)
+        self.prices = self.values*rand.uniform(0, 1, 500)
+        self.probs = rand.uniform(0, 1, 500)
+
+        with open(PRODUCT_PATH) as product_data:
+            #strip out the header line
+            self.instances = list(csv.reader(product_data))[1:]
+        self.features = [instance[:-1] for instance in self.instances[:500]]
+
+    def assert_decides_alike(self, batch_agent, agent, product=Product):
+        will_buy = batch_agent.will_buy_batch(
+            self.values, self.prices, self.probs)
+
+        self.assertEqual(will_buy.dtype, bool)
+        self.assertEqual(
+            will_buy.tolist(),
+            [agent.will_buy(product(value, price), prob)
+             for value, price, prob
+             in zip(self.values, self.prices, self.probs)])
+
+    def test_phase1_agents(self):
+        for batch_agent, agent in make_agents(registry1):
+            self.assert_decides_alike(batch_agent, agent)
+
+    def test_phase2_agents(self):
+        from phase2.master.product import Product as Product2
+
+        for batch_agent, agent in make_agents(registry2):
+            batch_agent.learn(self.instances)
+            agent.learn(self.instances)
+
+            self.assert_decides_alike(batch_agent, agent, Product2)
+
+            self.assertEqual(
+                batch_agent.compute_prob_of_good_batch(
+                    self.features).tolist(),
+                [agent.compute_prob_of_good(features)
+                 for features in self.features])
+
+            self.assertEqual(
+                batch_agent.will_buy_given_features_batch(
+                    self.values, self.prices, self.features).tolist(),
+                [agent.will_buy_given_features(
+                    Product2(value, price), features)
+                 for value, price, features
+                 in zip(self.values, self.prices, self.features)])
+
+
+if __name__ == '__main__':
+    unittest.main()
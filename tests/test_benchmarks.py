@@ -0,0 +1,66 @@
+"""
+Tests of the benchmark suite's bookkeeping.
+"""
+import unittest
+
+from benchmarks.compare import compare
+
+try:
+    from benchmarks import run
+except ImportError:
+    #the benchmarks of phase 2 need NumPy
+    run = None
+
+
+class Lines(object):
+    """
+    A file that keeps what is written to it.
+    """
+
+    def __init__(self):
+        self.text = ""
+
+    def write(self, text):
+        self.text += text
+
+
+def results(**throughputs):
+    return {"results": dict((name, {"throughput": throughput})
+                            for name, throughput in throughputs.items())}
+
+
+class CompareTest(unittest.TestCase):
+
+    def test_flags_drops_beyond_the_tolerance(self):
+        out = Lines()
+        regressions = compare(
+            results(steady=100.0, slower=100.0, faster=100.0, gone=5.0),
+            results(steady=95.0, slower=80.0, faster=300.0, added=1.0),
+            0.1, out)
+
+        self.assertEqual(regressions, ["slower"])
+        self.assertIn("REGRESSION", out.text)
+        self.assertIn("new", out.text)
+        self.assertIn("missing", out.text)
+        self.assertIn("1 of 4 benchmarks regressed", out.text)
+
+
+@unittest.skipIf(run is None, "NumPy is not installed")
+class RunTest(unittest.TestCase):
+
+    def test_best_time_is_the_fastest(self):
+        calls = []
+
+        self.assertGreaterEqual(run.best_time(lambda: calls.append(1), 3), 0)
+        self.assertEqual(len(calls), 3)
+
+    def test_every_registered_agent_is_benchmarked(self):
+        self.assertEqual([agent.id for agent in run.phase1_agents()],
+                         ["FC", "HP", "PB75"])
+        self.assertEqual(
+            sorted(agent.id for agent in run.learning_agents()),
+            ["DT", "FQ", "NB", "RB"])
+
+
+if __name__ == '__main__':
+    unittest.main()
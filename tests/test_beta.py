@@ -0,0 +1,90 @@
+"""
+Tests of the inverse-transform Beta samplers of both phases.
+"""
+import math
+import unittest
+from random import Random
+
+from phase1.master import beta as beta1
+from phase1.master import simulator as simulator1
+from phase2.master import beta as beta2
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+#: The shapes the samplers are checked with: the market presets, which have
+#: closed forms, and shapes that need a table.
+SHAPES = [
+    simulator1.UNFAVORABLE,
+    simulator1.FAIR,
+    simulator1.FAVORABLE,
+    (0.5, 0.5),
+    (2.5, 4.5),
+]
+
+#: The number of draws of each sample.
+NUM_DRAWS = 20000
+
+
+def ks_statistic(first, second):
+    """
+    The two-sample Kolmogorov-Smirnov statistic: the largest difference
+    between the empirical distribution functions of two samples.
+    """
+    first = sorted(first)
+    second = sorted(second)
+    i = j = 0
+    statistic = 0.0
+
+    while i < len(first) and j < len(second):
+        value = min(first[i], second[j])
+
+        while i < len(first) and first[i] == value:
+            i += 1
+        while j < len(second) and second[j] == value:
+            j += 1
+
+        statistic = max(statistic, abs(i*1.0/len(first) -
+                                       j*1.0/len(second)))
+
+    return statistic
+
+
+class BetaSamplerTest(unittest.TestCase):
+
+    def test_matches_betavariate(self):
+        #at the 0.1% level, for two samples of NUM_DRAWS draws
+        critical = 1.95*math.sqrt(2.0/NUM_DRAWS)
+
+        for module in [beta1, beta2]:
+            for alpha, beta in SHAPES:
+                rand = Random(0)
+                sampler = module.BetaSampler(alpha, beta)
+
+                fast = [sampler.sample(rand.random())
+                        for i in range(0, NUM_DRAWS)]
+                slow = [rand.betavariate(alpha, beta)
+                        for i in range(0, NUM_DRAWS)]
+
+                self.assertLess(ks_statistic(fast, slow), critical,
+                                "Beta({}, {})".format(alpha, beta))
+
+    @unittest.skipIf(numpy is None, "NumPy is not installed")
+    def test_samples_equal_sample(self):
+        us = Random(1).random
+        draws = [us() for i in range(0, 1000)] + [0.0, 0.5]
+
+        for module in [beta1, beta2]:
+            for alpha, beta in SHAPES:
+                sampler = module.BetaSampler(alpha, beta)
+
+                self.assertEqual(
+                    sampler.samples(numpy.array(draws)).tolist(),
+                    [sampler.sample(u) for u in draws])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+"""
+Tests of the counter-based generator.
+"""
+import unittest
+
+from phase1.master import simulator as simulator1
+from phase1.master.counter_random import (
+    BETA_STREAM, PRICE_STREAM, VALUE_STREAM, WORKING_STREAM, CounterRandom)
+from phase1.master.tape import ProductTape
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+STREAMS = [VALUE_STREAM, PRICE_STREAM, BETA_STREAM, WORKING_STREAM]
+
+
+class CounterRandomTest(unittest.TestCase):
+
+    @unittest.skipIf(numpy is None, "NumPy is not installed")
+    def test_vectorized_draws_equal_scalar_draws(self):
+        days = numpy.array([0, 1, 2, 999, 123456, 1 << 30])
+
+        for seed in [0, 1, 1234]:
+            rand = CounterRandom(seed)
+
+            for stream in STREAMS:
+                self.assertEqual(
+                    rand.randoms(days, stream).tolist(),
+                    [rand.random(int(day), stream) for day in days])
+
+            for alpha, beta in [simulator1.UNFAVORABLE, (2.5, 4.5)]:
+                self.assertEqual(
+                    rand.betavariates(days, alpha, beta).tolist(),
+                    [rand.betavariate(int(day), alpha, beta)
+                     for day in days])
+
+    def test_any_day_can_be_drawn_alone(self):
+        whole = ProductTape(7, 100, simulator1.FAIR, "counter")
+        last = ProductTape(7, 10, simulator1.FAIR, "counter", first_day=90)
+
+        self.assertEqual(list(whole.value_draws[90:]), list(last.value_draws))
+        self.assertEqual(list(whole.probs[90:]), list(last.probs))
+        self.assertEqual(whole.working[90:], last.working)
+
+
+if __name__ == "__main__":
+    unittest.main()
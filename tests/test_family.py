@@ -0,0 +1,57 @@
+"""
+Tests of agent families against their members simulated one at a time.
+"""
+import unittest
+
+from phase1.agents import PercentBelieverFamily
+from phase1.agents.agent_family import AgentFamily
+from phase1.master import simulator
+from phase1.master.tape import ProductTape
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+PERCENTS = [0, 12.5, 25, 50, 62.5, 75, 90, 100]
+
+
+@unittest.skipIf(numpy is None, "NumPy is not installed")
+class PercentBelieverFamilyTest(unittest.TestCase):
+
+    def test_batch_matches_members(self):
+        family = PercentBelieverFamily("PBF", PERCENTS)
+        rand = numpy.random.RandomState(0)
+
+        for day in range(0, 100):
+            values = rand.uniform(0, 50000, len(family))
+            prices = values*rand.uniform(0, 1, len(family))
+            prob = rand.uniform()
+
+            #the default batch method asks every member in turn
+            self.assertEqual(
+                family.will_buy_batch(values, prices, prob).tolist(),
+                AgentFamily.will_buy_batch(
+                    family, values, prices, prob).tolist())
+
+    def test_family_case_matches_no_learning_case(self):
+        from phase1.master.lockstep import family_case
+
+        family = PercentBelieverFamily("PBF", PERCENTS)
+
+        for seed in [0, 1]:
+            tape = ProductTape(seed, simulator.NUM_DAYS, simulator.FAIR)
+            daily_balances = family_case(family, tape)
+
+            for index in range(0, len(family)):
+                member = family.member(index)
+                self.assertEqual(member.id, family.ids[index])
+                self.assertEqual(
+                    daily_balances[:, index].tolist(),
+                    simulator.no_learning_case(
+                        member, simulator.FAIR, seed, tape))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+"""
+Tests of long-horizon simulation against the no learning case.
+"""
+import unittest
+
+from phase1.master import simulator
+from phase1.master.horizon import BalanceReducer, long_horizon_case
+from phase1.master.tape import ProductTape
+
+
+class LongHorizonTest(unittest.TestCase):
+
+    def test_reduces_the_no_learning_case(self):
+        for generator in ["random", "counter"]:
+            for num_buckets in [1, 7, 1000]:
+                for agent, fresh_agent in zip(simulator.make_agents(3),
+                                              simulator.make_agents(3)):
+                    reducer = long_horizon_case(
+                        agent, simulator.FAIR, 3, simulator.NUM_DAYS,
+                        num_buckets, generator)
+
+                    tape = ProductTape(3, simulator.NUM_DAYS, simulator.FAIR,
+                                       generator)
+                    daily_balance = simulator.no_learning_case(
+                        fresh_agent, simulator.FAIR, 3, tape)
+
+                    self.assert_reduces(reducer, daily_balance)
+
+    def assert_reduces(self, reducer, daily_balance):
+        start = 0
+
+        for bucket in range(0, reducer.num_buckets):
+            end = reducer.last_day(bucket) + 1
+            days = daily_balance[start:end]
+
+            self.assertEqual(reducer.samples[bucket], days[-1])
+            self.assertEqual(reducer.mins[bucket], min(days))
+            self.assertEqual(reducer.maxes[bucket], max(days))
+            self.assertAlmostEqual(reducer.means[bucket],
+                                   sum(days)*1.0/len(days), places=6)
+            start = end
+
+        self.assertEqual(start, len(daily_balance))
+
+    def test_buckets(self):
+        reducer = BalanceReducer(10, 4)
+
+        self.assertEqual(reducer.bucket_size, 3)
+        self.assertEqual(reducer.num_buckets, 4)
+        self.assertEqual([reducer.last_day(bucket) for bucket in range(0, 4)],
+                         [2, 5, 8, 9])
+
+        self.assertRaises(ValueError, BalanceReducer, 0, 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
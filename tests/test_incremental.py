@@ -0,0 +1,96 @@
+"""
+Tests of incremental agents, which unlearn each fold's test instances instead
+of learning the fold's training instances afresh.
+"""
+import csv
+import os
+import unittest
+
+from phase2.agents.registry import make_agent
+from phase2.master import simulator
+from phase2.master.tape import ProductTape
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+PRODUCT_PATH = os.path.join(
+    os.path.dirname(__file__), os.pardir, "phase2", "data",
+    "five_feats_25_cd.csv")
+
+#the table agents need NumPy
+INCREMENTAL_AGENTS = ["RB"] + (["NB", "FQ", "DT"] if numpy else [])
+
+NUM_FOLDS = 5
+
+
+def read_products():
+    with open(PRODUCT_PATH) as product_data:
+        rows = list(csv.reader(product_data))
+
+    #strip out the header line
+    return rows[1:]
+
+
+class IncrementalTest(unittest.TestCase):
+
+    def setUp(self):
+        self.instances = read_products()
+        self.fold_size = len(self.instances)//NUM_FOLDS
+
+    def assert_same_probs(self, agent, expected, instances):
+        for instance in instances:
+            features = instance[:-1]
+            self.assertEqual(agent.compute_prob_of_good(features),
+                             expected.compute_prob_of_good(features))
+
+    def test_unlearn_matches_learning_afresh(self):
+        for spec in INCREMENTAL_AGENTS:
+            agent = make_agent(spec, 0)
+            self.assertTrue(agent.incremental)
+            agent.learn(self.instances)
+
+            for fold in range(0, NUM_FOLDS):
+                test_instances, training_instances = simulator.split_fold(
+                    self.instances, self.fold_size, fold)
+
+                fresh = make_agent(spec, 0)
+                fresh.learn(training_instances)
+
+                agent.unlearn(test_instances)
+                self.assert_same_probs(agent, fresh, self.instances)
+
+                agent.relearn(test_instances)
+
+            everything = make_agent(spec, 0)
+            everything.learn(self.instances)
+            self.assert_same_probs(agent, everything, self.instances)
+
+    def test_held_out_run_matches_learning_case(self):
+        test_instances, training_instances = simulator.split_fold(
+            self.instances, self.fold_size, 1)
+        tape = ProductTape(1, len(test_instances))
+
+        agent = make_agent("RB", 1)
+        agent.learn(self.instances)
+        incremental = simulator.simulate(
+            agent, simulator.HeldOut(test_instances), test_instances, 1, tape)
+
+        expected = simulator.learning_case(
+            make_agent("RB", 1), training_instances, test_instances, 1, tape)
+
+        self.assertEqual(incremental, expected)
+
+    def test_unlearning_everything(self):
+        agent = make_agent("RB", 0)
+        agent.learn(self.instances)
+        agent.unlearn(self.instances)
+
+        #with no products left, the market is as likely good as bad
+        self.assertEqual(agent.market_condition, 0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+"""
+Tests of the lockstep engine against the scalar no learning case.
+"""
+import unittest
+
+from phase1.agents import PercentBeliever
+from phase1.master import simulator
+from phase1.master.tape import ProductTape
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+SEEDS = [0, 1, 2]
+
+
+class CautiousBeliever(PercentBeliever):
+    """
+    Overrides will_buy but inherits PercentBeliever's batch rule, so lockstep
+    must call will_buy.
+    """
+
+    def will_buy(self, prod, prob_of_good):
+        return prob_of_good > 0.25 and \
+            PercentBeliever.will_buy(self, prod, prob_of_good)
+
+
+@unittest.skipIf(numpy is None, "NumPy is not installed")
+class LockstepTest(unittest.TestCase):
+
+    def assert_same_as_scalar(self, make_agents, generator):
+        from phase1.master.lockstep import lockstep_case
+
+        lanes = []
+        expected = []
+
+        for seed in SEEDS:
+            tape = ProductTape(seed, simulator.NUM_DAYS, simulator.FAIR,
+                               generator)
+            lanes.extend((agent, tape) for agent in make_agents(seed))
+
+            for agent in make_agents(seed):
+                expected.append(simulator.no_learning_case(
+                    agent, simulator.FAIR, seed, tape))
+
+        results = lockstep_case(lanes)
+
+        self.assertEqual(results, expected)
+        for result, daily_balance, (agent, tape) in zip(
+                results, expected, lanes):
+            #balances stay ints until the first purchase, as in the table
+            self.assertEqual([type(balance) for balance in result],
+                             [type(balance) for balance in daily_balance])
+            self.assertEqual(agent.balance, result[-1])
+
+    def test_default_agents(self):
+        for generator in ["random", "counter"]:
+            self.assert_same_as_scalar(simulator.make_agents, generator)
+
+    def test_subclass_overriding_will_buy(self):
+        def make_agents(seed):
+            return [CautiousBeliever("CB", 50), PercentBeliever("PB", 50)]
+
+        self.assert_same_as_scalar(make_agents, "random")
+
+
+if __name__ == '__main__':
+    unittest.main()
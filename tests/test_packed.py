@@ -0,0 +1,60 @@
+"""
+Tests of bit-packed instances against the lists read_instances returns.
+"""
+import csv
+import os
+import unittest
+
+from phase2.master import simulator
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+PRODUCT_PATH = os.path.join(
+    os.path.dirname(__file__), os.pardir, "phase2", "data",
+    "five_feats_25_cd.csv")
+
+
+@unittest.skipIf(numpy is None, "NumPy is not installed")
+class PackedInstancesTest(unittest.TestCase):
+
+    def setUp(self):
+        from phase2.master.dataset import pack_instances
+
+        with open(PRODUCT_PATH) as product_data:
+            self.packed = pack_instances(product_data)
+
+        with open(PRODUCT_PATH) as product_data:
+            #strip out the header line
+            self.instances = list(csv.reader(product_data))[1:]
+
+    def test_unpacks_to_the_csv(self):
+        self.assertEqual(len(self.packed), len(self.instances))
+        self.assertEqual(list(self.packed), self.instances)
+        self.assertEqual(self.packed[7], self.instances[7])
+
+    def test_split_fold_matches_lists(self):
+        fold_size = len(self.instances)//5
+
+        for fold in range(0, 5):
+            packed_test, packed_training = simulator.split_fold(
+                self.packed, fold_size, fold)
+            test_instances, training_instances = simulator.split_fold(
+                self.instances, fold_size, fold)
+
+            self.assertEqual(list(packed_test), test_instances)
+            self.assertEqual(list(packed_training), training_instances)
+
+    def test_exclude_range_at_the_ends(self):
+        self.assertEqual(list(self.packed.exclude_range(0, 10)),
+                         self.instances[10:])
+        self.assertEqual(
+            list(self.packed.exclude_range(10, len(self.packed))),
+            self.instances[:10])
+
+
+if __name__ == '__main__':
+    unittest.main()
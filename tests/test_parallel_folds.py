@@ -0,0 +1,102 @@
+"""
+Tests of evaluating the folds in parallel over a shared dataset.
+"""
+import os
+import shutil
+import tempfile
+import unittest
+
+from phase2.master import simulator
+from phase2.master.tape import ProductTape
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+PRODUCT_PATH = os.path.join(
+    os.path.dirname(__file__), os.pardir, "phase2", "data",
+    "five_feats_25_cd.csv")
+
+SEEDS = [0, 1, 2, 3, 1234]
+
+SPECS = ["RB", "FQ", "PB:percent_worth=50"]
+
+
+def make_runs(all_instances, fold_size):
+    """
+    The runs of main(), with incremental agents shared across the folds.
+    """
+    runs = []
+    incremental_agents = {}
+
+    for fold, seed in enumerate(SEEDS):
+        test_instances, training_instances = simulator.split_fold(
+            all_instances, fold_size, fold)
+        tape = ProductTape(seed, len(test_instances))
+
+        for agent in simulator.make_agents(seed, SPECS):
+            if not agent.incremental:
+                runs.append(
+                    (agent, training_instances, test_instances, seed, tape))
+                continue
+
+            agent = incremental_agents.setdefault(agent.id, agent)
+            runs.append((agent, simulator.HeldOut(test_instances),
+                         test_instances, seed, tape))
+
+    return runs
+
+
+@unittest.skipIf(numpy is None, "NumPy is not installed")
+class ParallelFoldsTest(unittest.TestCase):
+
+    def setUp(self):
+        from phase2.master.dataset import pack_instances
+
+        with open(PRODUCT_PATH) as product_data:
+            self.instances = pack_instances(product_data)
+
+        self.fold_size = len(self.instances)//len(SEEDS)
+
+    def test_matches_serial_runs(self):
+        runs = make_runs(self.instances, self.fold_size)
+        keys = [None]*len(runs)
+
+        expected = list(simulator.run_serially(
+            runs, keys, None, self.instances))
+
+        for workers in [1, 3]:
+            results = simulator.run_folds_in_pool(
+                make_runs(self.instances, self.fold_size), keys, None,
+                self.instances, SEEDS, self.fold_size, "random", workers)
+
+            self.assertEqual(results, expected)
+
+    def test_shared_folds_match_in_memory_folds(self):
+        from phase2.master.dataset import dump_packed
+
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, "products.packed")
+
+        try:
+            dump_packed(self.instances, path)
+            balances = simulator.simulate_fold(
+                path, self.fold_size, 1, 1, "random",
+                simulator.make_agents(1, SPECS))
+        finally:
+            shutil.rmtree(directory)
+
+        test_instances, training_instances = simulator.split_fold(
+            self.instances, self.fold_size, 1)
+        tape = ProductTape(1, len(test_instances))
+
+        self.assertEqual(balances, [
+            simulator.learning_case(
+                agent, training_instances, test_instances, 1, tape)
+            for agent in simulator.make_agents(1, SPECS)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+"""
+Tests of the agents' cache of compute_prob_of_good results.
+"""
+import csv
+import os
+import unittest
+
+from phase2.agents import RationalBaselineAgent
+from phase2.agents.prob_cache import ProbCache
+from phase2.master.product import Product
+
+
+PRODUCT_PATH = os.path.join(
+    os.path.dirname(__file__), os.pardir, "phase2", "data",
+    "five_feats_25_cd.csv")
+
+
+class ProbCacheTest(unittest.TestCase):
+
+    def test_forgets_least_recently_used(self):
+        computed = []
+
+        def compute(features):
+            computed.append(features)
+            return len(computed)
+
+        cache = ProbCache(2)
+        self.assertEqual(cache.get(["T"], compute), 1)
+        self.assertEqual(cache.get(["F"], compute), 2)
+        self.assertEqual(cache.get(["T"], compute), 1)
+        self.assertEqual(cache.get(["T", "T"], compute), 3)
+
+        #["F"] was the least recently used, so it is computed again
+        self.assertEqual(cache.get(["F"], compute), 4)
+        self.assertEqual(cache.get(["T", "T"], compute), 3)
+
+        self.assertEqual((cache.hits, cache.misses), (2, 4))
+        self.assertEqual(cache.hit_rate(), 2/6.0)
+
+    def test_must_hold_an_entry(self):
+        self.assertRaises(ValueError, ProbCache, 0)
+
+
+class CachingAgentTest(unittest.TestCase):
+
+    def setUp(self):
+        with open(PRODUCT_PATH) as product_data:
+            #strip out the header line
+            self.instances = list(csv.reader(product_data))[1:]
+
+    def decisions(self, agent):
+        return [agent.will_buy_given_features(
+                    Product(1000.0, 100.0*(index % 10)), instance[:-1])
+                for index, instance in enumerate(self.instances)]
+
+    def test_cached_decisions_match(self):
+        agent = RationalBaselineAgent("RB")
+        cached = RationalBaselineAgent("RB")
+        cached.enable_prob_cache(8)
+
+        for learner in [agent, cached]:
+            learner.learn(self.instances[:500])
+
+        self.assertEqual(self.decisions(cached), self.decisions(agent))
+        self.assertGreater(cached.prob_cache.hits, 0)
+
+    def test_learning_clears_the_cache(self):
+        agent = RationalBaselineAgent("RB")
+        agent.enable_prob_cache(64)
+        agent.learn(self.instances[:500])
+        self.decisions(agent)
+
+        for method in [agent.unlearn, agent.relearn]:
+            self.assertTrue(agent.prob_cache.entries)
+            method(self.instances[:100])
+            self.assertFalse(agent.prob_cache.entries)
+
+            #the probabilities are the agent's new ones
+            features = self.instances[0][:-1]
+            self.assertEqual(
+                agent.prob_cache.get(features, agent.compute_prob_of_good),
+                agent.market_condition)
+            self.decisions(agent)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+"""
+Tests of the profiler, which stands in for a Tracer.
+"""
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from phase1.agents import HalfProbAgent
+from phase1.master import simulator
+from phase1.master.profiler import PHASES, Profiler
+from phase1.master.tape import ProductTape
+from phase1.master.trace import Tracer, read_binary_trace
+
+
+class ProfilerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tape = ProductTape(0, simulator.NUM_DAYS, simulator.FAIR)
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def simulate(self, tracer):
+        return simulator.no_learning_case(
+            HalfProbAgent("HP"), simulator.FAIR, 0, self.tape, tracer)
+
+    def test_times_every_phase_and_method(self):
+        profiler = Profiler(runs_directory=self.directory)
+
+        self.assertEqual(self.simulate(profiler), self.simulate(None))
+
+        phases = profiler.phases["HP"]
+        self.assertEqual(
+            [name for name in PHASES if name in phases],
+            ["draw", "decide", "settle", "record"])
+        for name in phases:
+            self.assertEqual(phases[name][0], simulator.NUM_DAYS)
+
+        self.assertEqual(profiler.methods["HP"]["will_buy"][0],
+                         simulator.NUM_DAYS)
+        self.assertTrue(os.path.exists(
+            os.path.join(self.directory, "HP-0.prof")))
+
+        path = os.path.join(self.directory, "summary.json")
+        with open(path, "w") as out:
+            profiler.write_json(out)
+        with open(path) as summary_file:
+            summary = json.load(summary_file)
+        self.assertEqual(summary["phases"]["HP"]["draw"]["calls"],
+                         simulator.NUM_DAYS)
+        self.assertEqual(len(profiler.rows()), len(phases) + 1)
+
+    def test_forwards_to_the_tracer(self):
+        out = io.BytesIO()
+        traced = self.simulate(Profiler(Tracer(out, "binary")))
+
+        out.seek(0)
+        balances = [event["balance"] for event in read_binary_trace(out)
+                    if event["event"] == "balance"]
+        self.assertEqual(balances, traced)
+
+    def test_instruments_an_agent_once(self):
+        profiler = Profiler()
+        agent = HalfProbAgent("HP")
+
+        profiler.instrument(agent)
+        profiler.instrument(agent)
+        agent.will_buy(None, 0.7)
+
+        self.assertEqual(profiler.methods["HP"]["will_buy"][0], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+"""
+Tests of the agent registries.
+"""
+import unittest
+
+from phase1.agents import registry as registry1
+from phase2.agents import registry as registry2
+
+
+class RegistryTest(unittest.TestCase):
+
+    def test_abstract_classes_are_not_listed(self):
+        names = [entry.name for entry in registry2.entries()]
+
+        self.assertNotIn("TableAgent", names)
+        self.assertIn("NaiveBayesAgent", names)
+
+        #but they can still be imported from the package
+        self.assertEqual(registry2.module_of("TableAgent"), "table_agent")
+
+    def test_every_agent_has_a_short_name(self):
+        for registry in [registry1, registry2]:
+            for entry in registry.entries():
+                self.assertTrue(entry.short_name, entry.name)
+
+    def test_make_agent(self):
+        for registry in [registry1, registry2]:
+            agent = registry.make_agent("PB:percent_worth=75")
+            self.assertEqual(agent.id, "PB75")
+            self.assertEqual(agent.percent_worth, 75)
+
+            agent = registry.make_agent("FC:id=coin", seed=3)
+            self.assertEqual(agent.id, "coin")
+
+            self.assertRaises(
+                ValueError, registry.make_agent, "PB:percent=75")
+            self.assertRaises(ValueError, registry.make_agent, "Nobody")
+
+    def test_parse_spec(self):
+        name, arguments = registry1.parse_spec("PB:percent_worth=7.5,id=12")
+
+        self.assertEqual(name, "PB")
+        self.assertEqual(list(arguments.items()),
+                         [("percent_worth", 7.5), ("id", "12")])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+"""
+Tests of the result cache and its keys.
+"""
+import shutil
+import tempfile
+import threading
+import unittest
+
+from phase1.agents import PercentBeliever
+from phase1.master.result_cache import (
+    ResultCache, agent_fingerprint, run_key)
+
+
+class ResultCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_round_trip_keeps_leading_ints(self):
+        cache = ResultCache(self.directory)
+        daily_balance = [1100, 1200, 1250.5, 1350.5]
+
+        self.assertIsNone(cache.get("key"))
+        cache.put("key", daily_balance)
+
+        restored = ResultCache(self.directory).get("key")
+        self.assertEqual(restored, daily_balance)
+        self.assertEqual([type(balance) for balance in restored],
+                         [int, int, float, float])
+
+    def test_evicts_least_recently_used(self):
+        cache = ResultCache(self.directory, max_bytes=200)
+
+        cache.put("old", [1.0]*10)
+        cache.put("new", [2.0]*10)
+        cache.get("new")
+        cache.put("newest", [3.0]*10)
+
+        self.assertIsNone(cache.get("old"))
+        self.assertEqual(cache.get("newest"), [3.0]*10)
+        self.assertLessEqual(cache.size, 200)
+
+    def test_fingerprint_follows_attributes(self):
+        self.assertEqual(agent_fingerprint(PercentBeliever("PB", 50)),
+                         agent_fingerprint(PercentBeliever("PB", 50)))
+        self.assertNotEqual(agent_fingerprint(PercentBeliever("PB", 50)),
+                            agent_fingerprint(PercentBeliever("PB", 75)))
+
+    def test_unpicklable_agents_are_not_cached(self):
+        for unpicklable in [lambda x: x, threading.Lock()]:
+            agent = PercentBeliever("PB", 50)
+            agent.helper = unpicklable
+
+            self.assertIsNone(agent_fingerprint(agent))
+            self.assertIsNone(run_key(agent_fingerprint(agent), 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
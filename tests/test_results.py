@@ -0,0 +1,81 @@
+"""
+Tests of the writers of the result table.
+"""
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from phase1.master.results import COLUMNS_SUFFIX, open_writer
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+AGENT_IDS = ["FC", "PB0"]
+
+ROWS = [[1130.35254918, 1100], [1443.5, 1200], [1443.25, 1300]]
+
+
+class WriterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "table")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, format, agent_ids=AGENT_IDS):
+        writer = open_writer(self.path, format, agent_ids, len(ROWS))
+        for day, values in enumerate(ROWS):
+            writer.write_row(day, values)
+        writer.close()
+
+    def test_tsv_is_printed_as_always(self):
+        self.write("tsv")
+
+        with open(self.path) as table:
+            self.assertEqual(table.read(), "\n".join([
+                "Day\tFC\tPB0",
+                "1\t1130.35254918\t1100",
+                "2\t1443.5\t1200",
+                "3\t1443.25\t1300",
+            ]) + "\n")
+
+    def test_csv(self):
+        self.write("csv", ["FC", "PB,0"])
+
+        with open(self.path) as table:
+            self.assertEqual(table.readline(), 'Day,FC,"PB,0"\n')
+            self.assertEqual(table.readline(), "1,1130.35254918,1100\n")
+
+    @unittest.skipIf(numpy is None, "NumPy is not installed")
+    def test_npy_columns(self):
+        self.write("npy")
+
+        table = numpy.load(self.path)
+        with open(self.path + COLUMNS_SUFFIX) as columns:
+            names = json.load(columns)
+
+        self.assertEqual(names, ["Day"] + AGENT_IDS)
+        self.assertTrue(table.flags.f_contiguous)
+        self.assertEqual(table[:, 0].tolist(), [1, 2, 3])
+        self.assertEqual(table[:, names.index("PB0")].tolist(),
+                         [1100, 1200, 1300])
+        self.assertEqual(table[:, 1:].tolist(), ROWS)
+
+    @unittest.skipIf(numpy is None, "NumPy is not installed")
+    def test_npy_rejects_duplicate_ids(self):
+        self.assertRaises(
+            ValueError, open_writer, self.path, "npy", ["FC", "FC"], 3)
+
+    def test_npy_needs_a_file(self):
+        self.assertRaises(ValueError, open_writer, "-", "npy", AGENT_IDS, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
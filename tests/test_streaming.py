@@ -0,0 +1,75 @@
+"""
+Tests of streaming folds over the bit-packed cache.
+
+Run them from the repository's root:
+
+    python -m unittest discover tests
+"""
+import os
+import shutil
+import tempfile
+import unittest
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+@unittest.skipIf(numpy is None, "NumPy is not installed")
+class PackedStreamingTest(unittest.TestCase):
+
+    def setUp(self):
+        from phase2.master import dataset
+        from phase2.master.synthetic import chunks, write_csv
+
+        self.dataset = dataset
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "products.csv")
+
+        #more rows than a chunk, so the cache is written in several
+        self.rows = dataset.CHUNK_ROWS + 1000
+
+        with open(self.path, "wb") as out:
+            write_csv(out, chunks(self.rows, 6, seed=1), 6)
+
+        #building the cache must never read the whole CSV into memory
+        self.pack_instances = dataset.pack_instances
+
+        def pack_instances(product_data):
+            raise AssertionError("pack_instances was called")
+
+        dataset.pack_instances = pack_instances
+
+    def tearDown(self):
+        self.dataset.pack_instances = self.pack_instances
+        shutil.rmtree(self.directory)
+
+    def test_cache_is_built_in_chunks_and_mapped(self):
+        instances = self.dataset.load_packed(self.path)
+
+        self.assertTrue(os.path.exists(self.path + self.dataset.CACHE_SUFFIX))
+        self.assertIsInstance(instances.features, numpy.memmap)
+        self.assertEqual(len(instances), self.rows)
+
+        with open(self.path) as product_data:
+            expected = self.pack_instances(product_data)
+
+        self.assertTrue(numpy.array_equal(
+            instances.features, expected.features))
+        self.assertTrue(numpy.array_equal(
+            instances.conditions, expected.conditions))
+
+    def test_packed_folds_match_csv_folds(self):
+        from phase2.master.streaming import StreamedFold
+
+        for test in [True, False]:
+            packed = StreamedFold(self.path, 5, 2, test, packed=True)
+            parsed = StreamedFold(self.path, 5, 2, test, packed=False)
+
+            self.assertEqual(len(packed), len(parsed))
+            self.assertEqual(list(packed), list(parsed))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+"""
+Tests of the parameter sweeps.
+"""
+import csv
+import os
+import unittest
+
+from phase1.master import simulator as simulator1
+from phase1.master import sweep as sweep1
+from phase1.master.aggregate import DailyStats
+from phase1.master.tape import ProductTape
+from phase2.master import simulator as simulator2
+from phase2.master import sweep as sweep2
+
+
+PRODUCT_PATH = os.path.join(
+    os.path.dirname(__file__), os.pardir, "phase2", "data",
+    "five_feats_25_cd.csv")
+
+
+class SettingsTest(unittest.TestCase):
+
+    def test_grid_and_random_settings(self):
+        spec = {
+            "grid": {"INITIAL_MONEY": [500, 5000],
+                     "market_odds": ["FAIR", [2, 1]]},
+            "random": {"count": 3, "seed": 0, "DAILY_EARNINGS": [50, 150]},
+        }
+
+        all_settings = sweep1.settings(spec)
+
+        self.assertEqual(all_settings[:4], [
+            {"INITIAL_MONEY": 500, "market_odds": simulator1.FAIR},
+            {"INITIAL_MONEY": 500, "market_odds": (2, 1)},
+            {"INITIAL_MONEY": 5000, "market_odds": simulator1.FAIR},
+            {"INITIAL_MONEY": 5000, "market_odds": (2, 1)},
+        ])
+        self.assertEqual(len(all_settings), 7)
+        for setting in all_settings[4:]:
+            self.assertTrue(50 <= setting["DAILY_EARNINGS"] <= 150)
+
+        self.assertEqual(sweep1.settings(spec), all_settings)
+        self.assertEqual(sweep1.settings({}), [{}])
+
+    def test_invalid_specs(self):
+        for spec in [{"grids": {}}, {"grid": {"SEED": [1]}},
+                     {"grid": {"market_odds": ["GOOD"]}}]:
+            self.assertRaises(ValueError, sweep1.settings, spec)
+
+        #phase 2's days come from the folds, and it has no market odds
+        self.assertRaises(
+            ValueError, sweep2.settings, {"grid": {"NUM_DAYS": [10]}})
+
+    def test_constants_are_restored(self):
+        try:
+            with sweep1.Constants({"INITIAL_MONEY": 7}):
+                self.assertEqual(simulator1.INITIAL_MONEY, 7)
+                raise KeyError
+        except KeyError:
+            pass
+
+        self.assertEqual(simulator1.INITIAL_MONEY, 1000)
+
+    def test_prune_drops_clearly_worse_settings(self):
+        statistics = [DailyStats(1) for i in range(0, 3)]
+        for final in [100, 101, 102]:
+            statistics[0].add([final])
+            statistics[1].add([final + 1])
+            statistics[2].add([final + 1000])
+
+        self.assertEqual(sweep1.prune(statistics, [0, 1, 2]), [2])
+        self.assertEqual(sweep1.prune(statistics, [0, 1]), [0, 1])
+
+
+class RunGroupTest(unittest.TestCase):
+
+    def test_phase1_groups_match_no_learning_case(self):
+        #a group's settings all have the same number of days
+        group = [(0, {"NUM_DAYS": 300}),
+                 (1, {"NUM_DAYS": 300, "INITIAL_MONEY": 500,
+                      "DAILY_EARNINGS": 10})]
+        rows = sweep1.run_group(4, simulator1.FAIR, 300, "random", group)
+
+        expected = []
+        for index, setting in group:
+            with sweep1.Constants(setting):
+                tape = ProductTape(4, 300, simulator1.FAIR)
+
+                for agent in simulator1.make_agents(4):
+                    daily_balance = simulator1.no_learning_case(
+                        agent, simulator1.FAIR, 4, tape)
+                    expected.append((index, agent.id, 4, daily_balance[-1],
+                                     min(daily_balance)))
+
+        self.assertEqual(rows, expected)
+
+    def test_phase2_groups_match_learning_case(self):
+        with open(PRODUCT_PATH) as product_data:
+            #strip out the header line
+            instances = list(csv.reader(product_data))[1:]
+
+        test_instances, training_instances = simulator2.split_fold(
+            instances, 200, 1)
+        group = [(0, {}), (1, {"MAXIMUM_VALUE": 100})]
+
+        rows = sweep2.run_group(
+            1, training_instances, test_instances, "random", group)
+
+        expected = []
+        for index, setting in group:
+            with sweep2.Constants(setting):
+                for agent in simulator2.make_agents(1):
+                    daily_balance = simulator2.learning_case(
+                        agent, training_instances, test_instances, 1)
+                    expected.append((index, agent.id, 1, daily_balance[-1],
+                                     min(daily_balance)))
+
+        self.assertEqual(rows, expected)
+        self.assertNotEqual(rows[0][3], rows[1][3])
+
+
+if __name__ == '__main__':
+    unittest.main()
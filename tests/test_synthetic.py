@@ -0,0 +1,137 @@
+"""
+Tests of the synthetic datasets against the format of phase2/data.
+"""
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from phase2.master import simulator
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+PRODUCT_PATH = os.path.join(
+    os.path.dirname(__file__), os.pardir, "phase2", "data",
+    "five_feats_25_cd.csv")
+
+
+@unittest.skipIf(numpy is None, "NumPy is not installed")
+class SyntheticTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def csv_bytes(self, rows, num_features, **kwargs):
+        from phase2.master.synthetic import chunks, write_csv
+
+        out = io.BytesIO()
+        write_csv(out, chunks(rows, num_features, **kwargs), num_features)
+
+        return out.getvalue()
+
+    def test_csv_has_the_format_of_the_data(self):
+        with open(PRODUCT_PATH, "rb") as product_data:
+            expected_header = product_data.readline()
+
+        lines = self.csv_bytes(30, 5).split(b"\r\n")
+
+        self.assertEqual(lines[0] + b"\r\n", expected_header)
+        self.assertEqual(len(lines), 32)
+        self.assertEqual(lines[-1], b"")
+        for line in lines[1:-1]:
+            cells = line.split(b",")
+            self.assertEqual(len(cells), 6)
+            self.assertTrue(all(cell in [b"T", b"F"] for cell in cells[:5]))
+            self.assertIn(cells[5], [b"G", b"B"])
+
+    def test_csv_reads_as_the_instances(self):
+        from phase2.master.synthetic import synthetic_instances
+
+        for dependence in ["independent", "naive_bayes", "interaction"]:
+            path = os.path.join(self.directory, dependence + ".csv")
+            with open(path, "wb") as out:
+                out.write(self.csv_bytes(200, 7, dependence=dependence,
+                                         seed=3))
+
+            with open(path) as product_data:
+                instances = simulator.read_instances(product_data)
+
+            self.assertEqual(
+                instances,
+                list(synthetic_instances(200, 7, dependence=dependence,
+                                         seed=3)))
+
+    def test_seed_gives_the_same_file(self):
+        self.assertEqual(self.csv_bytes(500, 10, seed=1),
+                         self.csv_bytes(500, 10, seed=1))
+        self.assertNotEqual(self.csv_bytes(500, 10, seed=1),
+                            self.csv_bytes(500, 10, seed=2))
+
+    def test_chunk_size_does_not_change_the_instances(self):
+        from phase2.master import synthetic
+
+        whole = self.csv_bytes(1000, 10, seed=5)
+
+        saved = synthetic.CHUNK_ROWS
+        synthetic.CHUNK_ROWS = 64
+        try:
+            self.assertEqual(self.csv_bytes(1000, 10, seed=5), whole)
+        finally:
+            synthetic.CHUNK_ROWS = saved
+
+    def test_packed_file_maps_to_the_instances(self):
+        from phase2.master.dataset import map_packed
+        from phase2.master.synthetic import (
+            chunks, synthetic_instances, write_packed)
+
+        path = os.path.join(self.directory, "synthetic.packed")
+        write_packed(path, chunks(300, 8, seed=4), 300, 8)
+
+        mapped = map_packed(path)
+        instances = synthetic_instances(300, 8, seed=4)
+
+        self.assertEqual(mapped.feature_names, instances.feature_names)
+        self.assertTrue(numpy.array_equal(mapped.features, instances.features))
+        self.assertTrue(
+            numpy.array_equal(mapped.conditions, instances.conditions))
+
+    def test_good_rate_and_strength(self):
+        from phase2.master.synthetic import synthetic_instances
+
+        instances = synthetic_instances(20000, 4, good_rate=0.25, seed=0)
+        self.assertAlmostEqual(instances.conditions.mean(), 0.25, delta=0.02)
+
+        #without any dependence, the features say nothing of the condition
+        instances = synthetic_instances(20000, 4, strength=0, seed=0)
+        for bit in range(0, 4):
+            is_true = (instances.features >> numpy.uint64(bit)) & \
+                numpy.uint64(1)
+            good = instances.conditions == 1
+            self.assertAlmostEqual(is_true[good].mean(),
+                                   is_true[~good].mean(), delta=0.03)
+
+    def test_rejects_bad_arguments(self):
+        from phase2.master.synthetic import chunks
+
+        self.assertRaises(ValueError, chunks, 10, 0)
+        self.assertRaises(ValueError, chunks, 10, 3, dependence="linear")
+        self.assertRaises(ValueError, chunks, 10, 1, dependence="interaction")
+        self.assertRaises(ValueError, chunks, 10, 3, good_rate=1.5)
+
+    def test_no_rows(self):
+        from phase2.master.synthetic import synthetic_instances
+
+        self.assertEqual(len(synthetic_instances(0, 3)), 0)
+        self.assertEqual(self.csv_bytes(0, 3), b"F1,F2,F3,Condition\r\n")
+
+
+if __name__ == '__main__':
+    unittest.main()
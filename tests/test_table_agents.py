@@ -0,0 +1,125 @@
+"""
+Tests of the table agents against direct computations over the instances.
+"""
+import csv
+import itertools
+import math
+import os
+import unittest
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+PRODUCT_PATH = os.path.join(
+    os.path.dirname(__file__), os.pardir, "phase2", "data",
+    "five_feats_25_cd.csv")
+
+
+def read_products():
+    with open(PRODUCT_PATH) as product_data:
+        #strip out the header line
+        return list(csv.reader(product_data))[1:]
+
+
+def log_likelihood(instances, index, feature, alpha):
+    """
+    The smoothed log probability of a feature's value among instances.
+    """
+    matching = sum(1 for instance in instances if instance[index] == feature)
+
+    return math.log((matching + alpha)/(len(instances) + 2*alpha))
+
+
+def naive_bayes(instances, features, alpha):
+    """
+    The naive Bayes probability of a good condition, one product at a time.
+    """
+    goods = [instance for instance in instances if instance[-1] == 'G']
+    bads = [instance for instance in instances if instance[-1] != 'G']
+    num_total = len(instances) + 2*alpha
+
+    log_good = math.log((len(goods) + alpha)/num_total)
+    log_bad = math.log((len(bads) + alpha)/num_total)
+
+    for index, feature in enumerate(features):
+        log_good += log_likelihood(goods, index, feature, alpha)
+        log_bad += log_likelihood(bads, index, feature, alpha)
+
+    return 1/(1 + math.exp(log_bad - log_good))
+
+
+@unittest.skipIf(numpy is None, "NumPy is not installed")
+class TableAgentTest(unittest.TestCase):
+
+    def setUp(self):
+        self.instances = read_products()
+        self.num_features = len(self.instances[0]) - 1
+        self.combinations = [
+            list(combination) for combination
+            in itertools.product("TF", repeat=self.num_features)]
+
+    def test_naive_bayes(self):
+        from phase2.agents import NaiveBayesAgent
+
+        agent = NaiveBayesAgent("NB", smoothing=1.0)
+        agent.learn(self.instances)
+
+        for features in self.combinations:
+            self.assertAlmostEqual(
+                agent.compute_prob_of_good(features),
+                naive_bayes(self.instances, features, 1.0), places=9)
+
+    def test_frequency(self):
+        from phase2.agents import FrequencyAgent
+
+        agent = FrequencyAgent("FQ", smoothing=2.0)
+        agent.learn(self.instances)
+
+        goods = sum(1 for instance in self.instances if instance[-1] == 'G')
+        market_condition = goods*1.0/len(self.instances)
+
+        for features in self.combinations:
+            matching = [instance for instance in self.instances
+                        if instance[:-1] == features]
+            matching_goods = sum(
+                1 for instance in matching if instance[-1] == 'G')
+
+            self.assertAlmostEqual(
+                agent.compute_prob_of_good(features),
+                (matching_goods + 2.0*market_condition)/(len(matching) + 2.0),
+                places=9)
+
+    def test_packed_instances_learn_the_same_tables(self):
+        from phase2.agents import (
+            DecisionTreeAgent, FrequencyAgent, NaiveBayesAgent)
+        from phase2.master.dataset import pack_instances
+
+        with open(PRODUCT_PATH) as product_data:
+            packed = pack_instances(product_data)
+
+        for agent_type in [NaiveBayesAgent, FrequencyAgent,
+                           DecisionTreeAgent]:
+            from_lists = agent_type("A")
+            from_lists.learn(self.instances)
+            from_packed = agent_type("A")
+            from_packed.learn(packed)
+
+            self.assertEqual(from_lists.table.tolist(),
+                             from_packed.table.tolist())
+            self.assertTrue(((from_lists.table >= 0) &
+                             (from_lists.table <= 1)).all())
+
+    def test_too_many_features(self):
+        from phase2.agents import FrequencyAgent
+
+        agent = FrequencyAgent("FQ")
+        agent.MAX_FEATURES = 3
+
+        self.assertRaises(ValueError, agent.learn, self.instances)
+
+
+if __name__ == '__main__':
+    unittest.main()
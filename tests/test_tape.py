@@ -0,0 +1,87 @@
+"""
+Tests of product tapes against the simulator's original sequential draws.
+"""
+import unittest
+from itertools import islice
+from random import Random
+
+from phase1.master import simulator
+from phase1.master.product import Product
+from phase1.master.tape import ProductTape, stream_products
+
+
+SEEDS = [0, 1, 1234]
+
+MARKETS = [simulator.UNFAVORABLE, simulator.FAIR, simulator.FAVORABLE]
+
+
+def original_case(agent, market_odds, seed):
+    """
+    no_learning_case as it was before tapes, drawing each day's product from
+    its own Random(seed).
+    """
+    rand = Random(seed)
+
+    agent.balance = simulator.INITIAL_MONEY
+    daily_balance = []
+
+    for d in range(0, simulator.NUM_DAYS):
+        max_value = min(agent.balance, simulator.MAXIMUM_VALUE)
+        value = rand.random()*max_value
+        price = rand.random()*value
+
+        prob = rand.betavariate(market_odds[0], market_odds[1])
+        product_working = rand.random() <= prob
+
+        prod = Product(value, price)
+
+        if agent.will_buy(prod, prob):
+            agent.balance -= prod.price
+
+            if product_working:
+                agent.balance += prod.value
+
+        agent.balance += simulator.DAILY_EARNINGS
+        daily_balance.append(agent.balance)
+
+    return daily_balance
+
+
+class ProductTapeTest(unittest.TestCase):
+
+    def test_replays_match_the_original_draws(self):
+        for market_odds in MARKETS:
+            for seed in SEEDS:
+                #every agent of the seed replays the same tape
+                tape = ProductTape(seed, simulator.NUM_DAYS, market_odds)
+
+                for agent, fresh_agent in zip(simulator.make_agents(seed),
+                                              simulator.make_agents(seed)):
+                    self.assertEqual(
+                        simulator.no_learning_case(
+                            agent, market_odds, seed, tape),
+                        original_case(fresh_agent, market_odds, seed))
+
+    def test_streams_match_tapes(self):
+        for generator in ["random", "counter"]:
+            tape = ProductTape(5, 200, simulator.FAIR, generator)
+            draws = list(islice(
+                stream_products(5, simulator.FAIR, generator), 200))
+
+            self.assertEqual(
+                draws,
+                [(tape.value_draws[d], tape.price_draws[d], tape.probs[d],
+                  bool(tape.working[d])) for d in range(0, 200)])
+
+    def test_learning_tapes_only_draw_values_and_prices(self):
+        tape = ProductTape(5, 10)
+        rand = Random(5)
+
+        self.assertEqual(len(tape.probs), 0)
+        for d in range(0, 10):
+            self.assertEqual(tape.value_draws[d], rand.random())
+            self.assertEqual(tape.price_draws[d], rand.random())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+"""
+Tests of simulation traces.
+"""
+import io
+import unittest
+
+from phase1.agents import HalfProbAgent, PercentBeliever
+from phase1.master.trace import Tracer, read_binary_trace
+
+
+NUM_DAYS = 1000
+
+
+def sampled_days(tracer, agent, seed):
+    tracer.run_start(agent, seed)
+
+    return [day for day in range(0, NUM_DAYS) if tracer.sample(day)]
+
+
+class TracerTest(unittest.TestCase):
+
+    def test_sampled_days_follow_the_run_seed(self):
+        tracer = Tracer(io.BytesIO(), "binary", 0.05)
+        days = [sampled_days(tracer, agent, seed)
+                for agent, seed in [(HalfProbAgent("HP"), 3),
+                                    (PercentBeliever("PB", 50), 3),
+                                    (HalfProbAgent("HP"), 4)]]
+
+        #every agent of a seed is traced on the same days
+        self.assertEqual(days[0], days[1])
+        self.assertNotEqual(days[0], days[2])
+        self.assertTrue(0 < len(days[0]) < NUM_DAYS)
+
+    def test_trace_seed(self):
+        def days_of_runs(seeds):
+            tracer = Tracer(io.BytesIO(), "binary", 0.05, 7)
+            return [sampled_days(tracer, HalfProbAgent("HP"), seed)
+                    for seed in seeds]
+
+        days = days_of_runs([3, 4])
+
+        #the given seed chooses the days, whatever the runs' seeds
+        self.assertEqual(days_of_runs([5, 6]), days)
+        self.assertNotEqual(days[0], days[1])
+
+    def test_binary_trace_reads_back(self):
+        out = io.BytesIO()
+        tracer = Tracer(out, "binary")
+        agent = PercentBeliever("PB", 50)
+
+        tracer.run_start(agent, 3)
+        tracer.day_start(0, 1000)
+        tracer.balance(0, 1100.5)
+        tracer.run_end(agent)
+
+        out.seek(0)
+        events = list(read_binary_trace(out))
+
+        self.assertEqual(events[0]["event"], "run_start")
+        self.assertEqual(events[0]["agent"], "PB")
+        self.assertEqual(events[0]["seed"], 3)
+        self.assertEqual(
+            [event["balance"] for event in events
+             if event["event"] == "balance"],
+            [1100.5])
+
+
+if __name__ == '__main__':
+    unittest.main()
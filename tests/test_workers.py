@@ -0,0 +1,68 @@
+"""
+Tests of running simulations across a pool of processes.
+"""
+import os
+import shutil
+import tempfile
+import unittest
+
+from phase1.master import simulator
+from phase1.master.result_cache import ResultCache
+from phase1.master.tape import ProductTape
+
+
+def make_runs(seeds):
+    runs = []
+
+    for seed in seeds:
+        tape = ProductTape(seed, simulator.NUM_DAYS, simulator.FAIR)
+        runs.extend((agent, seed, tape)
+                    for agent in simulator.make_agents(seed))
+
+    return runs
+
+
+class WorkersTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_pool_matches_serial_run(self):
+        keys = [None]*len(make_runs([0, 1]))
+
+        expected = list(simulator.run_serially(
+            make_runs([0, 1]), keys, None, simulator.FAIR))
+        results = simulator.run_in_pool(
+            make_runs([0, 1]), keys, None, simulator.FAIR, 3)
+
+        self.assertEqual(results, expected)
+        self.assertEqual([[type(balance) for balance in result]
+                          for result in results],
+                         [[type(balance) for balance in result]
+                          for result in expected])
+
+    def test_cached_and_computed_results_keep_their_order(self):
+        cache = ResultCache(self.directory)
+        keys = ["run{}".format(index)
+                for index in range(0, len(make_runs([2])))]
+
+        expected = list(simulator.run_serially(
+            make_runs([2]), keys, cache, simulator.FAIR))
+
+        #forget every other result, so the pool computes them again
+        for key in keys[::2]:
+            os.remove(cache._path(key))
+        cache = ResultCache(self.directory)
+
+        results = simulator.run_in_pool(
+            make_runs([2]), keys, cache, simulator.FAIR, 2)
+
+        self.assertEqual(results, expected)
+        self.assertEqual(cache.hits, len(keys[1::2]))
+
+
+if __name__ == '__main__':
+    unittest.main()